@@ -0,0 +1,349 @@
+###############################################################################
+#
+# File:      benchmark.py
+# Author(s): Nico
+# Scope:     Offline replay benchmark of the polling, matching and posting pipeline
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tracemalloc
+
+import discord
+
+from bot import GuysVintedBot
+from utils.defines import BRANDS, CLOTHES_STATES, MAX_WORKERS
+from utils.sender import MessageScheduler
+from utils.workers import TaskPool
+from utils.tracing import STAGES, percentile
+from utils.stub_api import StubApi, load_clothes, synthetic_clothes
+
+
+class FakeChannel:
+    """
+    Discord channel sink: counts messages instead of sending them
+    """
+    def __init__(self, channel_id: int, name: str, latency: float = 0.0) -> None:
+        """
+        Args:
+            channel_id: int, channel id
+            name: str, channel name
+            latency: float, time in seconds each send takes
+        """
+        self.id = channel_id
+        self.name = name
+        self.latency = latency
+        self.messages = 0
+        self.embeds = 0
+
+    async def send(self, content: str = None, embeds: list = (), **kwargs) -> "FakeChannel":
+        """
+        Args:
+            content: str, message content
+            embeds: list, message embeds
+            **kwargs: other channel.send arguments (view...)
+
+        Returns: FakeChannel, stands for the sent message
+        """
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        self.messages += 1
+        self.embeds += len(embeds)
+
+        return self
+
+
+def synthetic_requests(clothes: list, count: int, seed: int = 0) -> dict:
+    """
+    Generates clothe requests on the brands of the clothes, with search texts taken from their titles
+
+    Args:
+        clothes: list, replayed clothes
+        count: int, number of requests
+        seed: int, random seed (same seed, same requests)
+
+    Returns: dict, request_id -> clothe request
+    """
+    rng = random.Random(seed)
+    brands = sorted({clothe["brand_title"] for clothe in clothes if clothe["brand_title"] in BRANDS}) or \
+        sorted(BRANDS)
+    words = sorted({word for clothe in clothes for word in clothe["title"].lower().split() if len(word) > 3})
+    requests = {}
+
+    for index in range(count):
+        request_id = f"bench{index}"
+        requests[request_id] = {"_id": request_id,
+                                "name": f"bench {index}",
+                                "brand_ids": BRANDS[rng.choice(brands)],
+                                "status_ids": ",".join(rng.sample(sorted(CLOTHES_STATES.values()),
+                                                                  rng.randint(1, len(CLOTHES_STATES)))),
+                                "price_from": str(rng.choice((0, 0, 10, 20))),
+                                "price_to": str(rng.choice((50, 100, 200, 1000))),
+                                # A quarter of the requests without search text (everything matches)
+                                "search_text": rng.choice(words) if words and rng.random() >= 0.25 else ""}
+
+    return requests
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """
+    Replays clothes through GuysVintedBot.poll_due_shards (API calls, dedup, matching, enrichment and posting),
+    against the stub API and fake channels
+
+    Args:
+        args: argparse.Namespace, command line arguments
+
+    Returns: dict, benchmark results
+    """
+    clothes = load_clothes(args.payloads) if args.payloads else synthetic_clothes(int(args.clothes), int(args.seed))
+    stub = StubApi(clothes, batch=int(args.batch), latency=float(args.api_latency) / 1000)
+    await stub.start()
+
+    bot = GuysVintedBot(intents=discord.Intents.default(), guild_id=None, endpoints=[stub.url],
+                        workers=int(args.workers), cache_file=None, store_file=None, metrics_port=0)
+    send_latency = float(args.send_latency) / 1000
+
+    if not args.paced:
+        # Discord rate limits are not what we measure here
+        bot.sender = MessageScheduler(channel_rate=1e9, channel_burst=10 ** 6, global_rate=1e9,
+                                      global_burst=10 ** 6, metrics=bot.metrics)
+
+    bot.all_clothes_channel = FakeChannel(0, "all_clothes", send_latency)
+    bot.logs_channel = FakeChannel(1, "logs", send_latency)
+    requests = synthetic_requests(clothes, int(args.requests), int(args.seed))
+    channels = {request_id: FakeChannel(index + 2, request_id, send_latency)
+                for index, request_id in enumerate(requests)}
+    bot.set_requests(requests, channels)
+    bot.pool = TaskPool("matching", bot.workers)
+
+    try:
+        # First poll of each shard: clothes already published are only marked as seen (as on startup)
+        await bot.poll_due_shards(list(bot.shards.values()), time.time())
+        await bot.pool.join()
+
+        if args.allocations:
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+
+        poll_durations = []
+        start = time.perf_counter()
+
+        while not stub.exhausted and len(poll_durations) < int(args.polls):
+            stub.advance()
+            poll_start = time.perf_counter()
+            await bot.poll_due_shards(list(bot.shards.values()), time.time())
+            poll_durations.append(time.perf_counter() - poll_start)
+
+        # Matching and posts run in the matching pool, in background
+        await bot.pool.join()
+        elapsed = time.perf_counter() - start
+        results = {"clothes": len(clothes),
+                   "requests": len(requests),
+                   "shards": len(bot.shards),
+                   "polls": len(poll_durations),
+                   "elapsed": round(elapsed, 3)}
+
+        if args.allocations:
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            top = after.compare_to(before, "lineno")[:int(args.top)]
+            results["allocations"] = {"current_kb": round(current / 1024, 1),
+                                      "peak_kb": round(peak / 1024, 1),
+                                      "top": [f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                                              f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks)"
+                                              for stat in top]}
+
+    finally:
+        await bot.close()
+        await stub.stop()
+
+    items = bot.poll_new_clothes.summary()[1]
+    poll_durations.sort()
+    summary = bot.traces.summary()
+    results.update({"items": int(items),
+                    "items_per_sec": round(items / elapsed, 1) if elapsed else 0.0,
+                    "posted": int(bot.posted_total.get("posted")),
+                    "messages": sum(channel.messages for channel in [bot.all_clothes_channel, *channels.values()]),
+                    "api_calls": stub.calls,
+                    "poll": {"p50": round(percentile(poll_durations, 0.5), 4),
+                             "p99": round(percentile(poll_durations, 0.99), 4)} if poll_durations else {},
+                    "stages": {stage: {"p50": round(summary[stage]["p50"], 4), "p99": round(summary[stage]["p99"], 4)}
+                               for stage in STAGES if stage in summary}})
+
+    return results
+
+
+def print_results(results: dict, previous: dict = None) -> None:
+    """
+    Prints benchmark results, with the change from a previous run if given
+
+    Args:
+        results: dict, benchmark results
+        previous: dict, previous benchmark results
+
+    Returns: None
+    """
+    def line(name: str, value: float, previous_value: float = None, unit: str = "") -> str:
+        change = f" ({(value - previous_value) / previous_value:+.1%})" if previous_value else ""
+        return f"{name:<16}{value}{unit}{change}"
+
+    previous = previous or {}
+
+    print(f"{results['clothes']} clothes, {results['requests']} requests, {results['shards']} shard(s), "
+          f"{results['polls']} polls in {results['elapsed']}s")
+    print(line("items/sec", results["items_per_sec"], previous.get("items_per_sec")))
+    print(f"{'items':<16}{results['items']} new, {results['posted']} posted, {results['messages']} messages")
+    print(f"{'api calls':<16}{results['api_calls']}")
+
+    for name, stats in [("poll", results["poll"]), *results["stages"].items()]:
+        if not stats:
+            continue
+
+        previous_stats = previous.get("poll", {}) if name == "poll" else previous.get("stages", {}).get(name, {})
+        print(line(f"{name} p50", stats["p50"], previous_stats.get("p50"), "s"))
+        print(line(f"{name} p99", stats["p99"], previous_stats.get("p99"), "s"))
+
+    if "allocations" in results:
+        allocations = results["allocations"]
+        previous_allocations = previous.get("allocations", {})
+        print(line("peak memory", allocations["peak_kb"], previous_allocations.get("peak_kb"), " KiB"))
+
+        for top in allocations["top"]:
+            print(f"{'':<16}{top}")
+
+
+if __name__ == "__main__":
+    # Get arguments
+    parser = argparse.ArgumentParser(description="GuysVintedBot offline benchmark")
+    parser.add_argument(
+        "--payloads",
+        action="store",
+        default=None,
+        help="Specify recorded GET_CLOTHES_ROUTE payloads (JSON lines) to replay - synthetic clothes otherwise",
+        required=False
+    )
+    parser.add_argument(
+        "--clothes",
+        action="store",
+        default=20000,
+        help="Specify number of synthetic clothes",
+        required=False
+    )
+    parser.add_argument(
+        "--requests",
+        action="store",
+        default=50,
+        help="Specify number of synthetic requests",
+        required=False
+    )
+    parser.add_argument(
+        "--batch",
+        action="store",
+        default=40,
+        help="Specify number of clothes published between two polls",
+        required=False
+    )
+    parser.add_argument(
+        "--polls",
+        action="store",
+        default=500,
+        help="Specify max number of polls",
+        required=False
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        action="store",
+        default=MAX_WORKERS,
+        help="Specify max number of matching jobs running concurrently",
+        required=False
+    )
+    parser.add_argument(
+        "--api-latency",
+        action="store",
+        default=0,
+        help="Specify stub API latency in ms",
+        required=False
+    )
+    parser.add_argument(
+        "--send-latency",
+        action="store",
+        default=0,
+        help="Specify fake Discord send latency in ms",
+        required=False
+    )
+    parser.add_argument(
+        "--paced",
+        action="store_true",
+        help="Keep Discord rate limits pacing",
+        required=False
+    )
+    parser.add_argument(
+        "--no-allocations",
+        action="store_false",
+        dest="allocations",
+        help="Do not trace allocations (tracemalloc slows the run down)",
+        required=False
+    )
+    parser.add_argument(
+        "--top",
+        action="store",
+        default=10,
+        help="Specify number of allocation sites shown",
+        required=False
+    )
+    parser.add_argument(
+        "--seed",
+        action="store",
+        default=0,
+        help="Specify random seed of synthetic clothes and requests",
+        required=False
+    )
+    parser.add_argument(
+        "--output",
+        action="store",
+        default=None,
+        help="Specify file where results are saved (JSON)",
+        required=False
+    )
+    parser.add_argument(
+        "--compare",
+        action="store",
+        default=None,
+        help="Specify results of a previous run (JSON) to compare with",
+        required=False
+    )
+    parser.add_argument(
+        "--log-level",
+        action="store",
+        default="WARNING",
+        help="Specify log level",
+        required=False
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(),
+                        format="%(asctime)s -- %(filename)s -- %(funcName)s -- %(levelname)s -- %(message)s")
+
+    results = asyncio.run(run(args))
+
+    previous = None
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            previous = json.load(file)
+
+    print_results(results, previous)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
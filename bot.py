@@ -11,21 +11,35 @@ import time
 
 import discord
 import asyncio
-import requests
-import json
+import aiohttp
 import os
-import sys
-import datetime
 import logging
 
 from discord import app_commands
-from utils.defines import API_HOST, GET_CLOTHES_ROUTE, REQUESTS_CHANNEL_IDS_ROUTE, WAIT_TIME, PER_PAGE, \
-                            USER_INFOS_ROUTE, GET_IMAGES_URL_ROUTE, NO_IMAGE_AVAILABLE_URL, BRANDS, CLOTHES_STATES, \
-                              FUZZ_RATIO, GET_CLOTHES_FROM_STOCK_ROUTE
-from utils.buttons import BuyButtons, StockButtons
-from utils.utils import reformat_list_strings
-from concurrent.futures import ThreadPoolExecutor
-from thefuzz import fuzz
+from typing import Optional
+from utils.defines import GET_CLOTHES_ROUTE, REQUESTS_CHANNEL_IDS_ROUTE, PER_PAGE, \
+                            MAX_WORKERS, CACHE_MAX_SIZE, CACHE_MAX_AGE, SEEN_CACHE_FILE, \
+                              CATCH_UP_WINDOW, ENRICH_CONCURRENCY, POLL_MAX_ERRORS, POLL_MAX_PAGES, WAIT_TIME, \
+                              REQUESTS_SYNC_INTERVAL, STARTUP_RETRY_MAX_DELAY, \
+                              POSTED_STORE_FILE, METRICS_PORT, NEW_ITEMS_BUCKETS
+from utils.api_client import ApiClient, ApiResponse
+from utils.recorder import ApiRecorder
+from utils.workers import TaskPool
+from utils.shards import Shard, plan_shards
+from utils.buttons import BuyButtons, BuyHandler, StockHandler
+from utils.store import PostedStore
+from utils.stock import StockIndex
+from utils.components import ComponentRouter
+from utils.retry import backoff_delay
+from utils.cache import SeenCache
+from utils.matcher import RequestMatcher
+from utils.fuzzy import FuzzyMatcher
+from utils.enrichment import Enricher
+from utils.latency import LatencyStats
+from utils.metrics import MetricsRegistry, MetricsServer
+from utils.tracing import TraceRecorder
+from utils.sender import MessageScheduler, PRIORITY_MATCH
+from utils.utils import get_publish_timestamp
 
 
 class GuysVintedBot(discord.Client):
@@ -34,34 +48,203 @@ class GuysVintedBot(discord.Client):
     All the bot functionalities all located here.
     Thanks, Hugo and Riccardo, for being the way you are.
     """
-    def __init__(self, guild_id, port, *args, **kwargs) -> None:
+    def __init__(self, guild_id, endpoints, *args, workers=MAX_WORKERS, cache_file=SEEN_CACHE_FILE,
+                 store_file=POSTED_STORE_FILE,
+                 catch_up_window=CATCH_UP_WINDOW, enrich_concurrency=ENRICH_CONCURRENCY,
+                 sync_interval=REQUESTS_SYNC_INTERVAL, metrics_port=METRICS_PORT, record_dir=None, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         # Guild id to sync
         self.guild_id = guild_id
-        self.port = port
+        # Max number of matching jobs running concurrently
+        self.workers = workers
+        # Long-lived bounded pool, (re)created when the main loop starts
+        self.pool = None
+        # Seen clothes ids, persisted for warm restarts
+        self.seen = SeenCache(CACHE_MAX_SIZE, CACHE_MAX_AGE)
+        self.cache_file = cache_file
+        # Posted clothes, read by buy buttons on click
+        self.store = PostedStore(store_file)
+        # Max age in seconds of clothes published while the bot was down and still posted on restart
+        self.catch_up_window = catch_up_window
+        # Polls skipped after an unexpected exception
+        self.failed_polls = 0
+        # API calls recording for replay (see replay.py), None if not recording
+        self.recorder = ApiRecorder(record_dir) if record_dir else None
+        # Shared API client (pooled keep-alive session, spread over the API instances)
+        self.api = ApiClient(endpoints, recorder=self.recorder)
+        # Running requests and their channels, request_id -> request / channel (see add_request, remove_request...)
         self.requests = {}
         self.channels = {}
+        # Paused requests, request_id -> (request, channel)
+        self.paused = {}
+        # Background sync of requests with DB
+        self.sync_interval = sync_interval
+        self.sync_task = None
+        # Compiled index of self.requests - rebuild with rebuild_matcher() whenever requests change
+        self.matcher = RequestMatcher(self.requests)
+        # Batched search text matching
+        self.fuzzy = FuzzyMatcher()
+        # Per-stage latencies of the matching pipeline
+        self.latencies = LatencyStats()
+        # Prometheus metrics, served locally on metrics_port (0: not served)
+        self.metrics = MetricsRegistry()
+        self.metrics_server = MetricsServer(self.metrics, metrics_port) if metrics_port else None
+        self.polls_total = self.metrics.counter("polls_total", "Global request shards API calls by outcome",
+                                                ("outcome",))
+        self.skipped_polls_total = self.metrics.counter("skipped_polls_total",
+                                                        "Polls skipped after an unexpected exception")
+        self.poll_seconds = self.metrics.histogram("poll_seconds", "Global request shard API call duration")
+        self.poll_new_clothes = self.metrics.histogram("poll_new_clothes", "New clothes per shard API call",
+                                                       buckets=NEW_ITEMS_BUCKETS)
+        self.matches_total = self.metrics.counter("matches_total", "Clothes matching a request", ("request_id",))
+        self.posted_total = self.metrics.counter("posted_clothes_total", "Matching clothes posted by outcome",
+                                                 ("outcome",))
+        self.enrichment_wait_seconds = self.metrics.histogram("enrichment_wait_seconds",
+                                                              "Time waited for a matching clothe enrichment")
+        self.post_seconds = self.metrics.histogram("post_seconds", "Time to send the posts of one poll")
+        # Current states, read on each scrape
+        self.metrics.gauge("matching_pool_jobs", "Matching jobs by state", ("state",),
+                           collect=self.collect_pool_jobs)
+        self.metrics.gauge("poll_interval_seconds", "Current polling interval of each shard", ("shard",),
+                           collect=lambda: {(shard.brand_ids,): shard.poller.interval
+                                            for shard in self.shards.values()})
+        self.metrics.gauge("poll_decision", "Last polling interval decision of each shard (1 for the current one)",
+                           ("shard", "decision"),
+                           collect=lambda: {(shard.brand_ids, shard.poller.decision): 1
+                                            for shard in self.shards.values()})
+        self.metrics.gauge("poll_decisions", "Polling interval changes of each shard since it was planned",
+                           ("shard", "decision"), collect=self.collect_poll_decisions)
+        self.metrics.gauge("poll_possibly_missed_clothes",
+                           "Estimated clothes missed by unresolved page overflows of each shard since it was planned",
+                           ("shard",), collect=lambda: {(shard.brand_ids,): shard.poller.possibly_missed
+                                                        for shard in self.shards.values()})
+        # New clothes traces, listing to post delays (see /stats)
+        self.traces = TraceRecorder(self.metrics)
+        # Seller infos and images fetching, shared between requests
+        self.enricher = Enricher(self.api, concurrency=enrich_concurrency, latencies=self.latencies)
+        # Outbound messages scheduling (rate limits and priorities)
+        self.sender = MessageScheduler(metrics=self.metrics)
         self.all_clothes_channel = ""
         self.logs_channel = ""
         self.stock_channel = ""
-        self.clothes_ids = self.get_clothes_ids_in_stock()
+        # Ids of clothes in stock, for AutoBuy duplicate checks
+        self.stock = StockIndex(self.api)
+        # Persistent buttons handlers (see on_interaction), created once: a reconnection must not reset them (e.g.
+        # clothes being bought)
+        self.components = ComponentRouter()
+        self.components.add("buy", BuyHandler.PATTERN, BuyHandler(store=self.store,
+                                                                  stock=self.stock,
+                                                                  channels=self.named_channel,
+                                                                  api=self.api,
+                                                                  sender=self.sender,
+                                                                  latencies=self.latencies,
+                                                                  metrics=self.metrics,
+                                                                  traces=self.traces).handle)
+        self.components.add("stock", StockHandler.PATTERN, StockHandler(stock=self.stock,
+                                                                        api=self.api,
+                                                                        channels=self.named_channel,
+                                                                        sender=self.sender,
+                                                                        metrics=self.metrics).handle)
+        self.startup_task = None
         self.task = ""
+        # Global request shards (query plan), re-planned with rebuild_matcher()
+        self.shards = {}
         self.tree = app_commands.CommandTree(self)
 
     async def setup_hook(self) -> None:
         """
-        Called when the bot starts. Launches all clothes requests and associated channels to post.
+        Called when the bot starts, before connecting to Discord. Loads seen clothes, the rest of the startup runs in
+        background so that the bot connects right away.
 
         Returns:
             None
         """
+        if self.cache_file:
+            self.seen.load(self.cache_file)
+
+        self.api.start_health_checks()
+
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+
+        self.startup_task = self.loop.create_task(self.startup())
+
+    async def startup(self) -> None:
+        """
+        Loads clothes in stock and active requests concurrently (retrying until the API answers), then launches all
+        clothes requests.
+
+        Returns:
+            None
+        """
+        attempt = 0
+
+        while True:
+            try:
+                _, loaded = await asyncio.gather(self.stock.refresh(), self.fetch_active_requests_and_channels())
+                break
+
+            except Exception as e:
+                delay = backoff_delay(attempt, max_delay=STARTUP_RETRY_MAX_DELAY)
+                attempt += 1
+                logging.error(f"Could not load stock and active requests (attempt {attempt}), retrying in "
+                              f"{delay:.2f} seconds: {e!r}")
+                await asyncio.sleep(delay)
+
+        logging.info(f"Found existing requests: {loaded[0]} (corresponding channel_ids: {loaded[1]})")
+
+        self.stock.start_reconciling()
+
+        await self.launch_requests(loaded)
+
+    async def close(self) -> None:
+        """
+        Called when the bot shuts down. Stops the running jobs and closes the API session.
+
+        Returns:
+            None
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+        self.seen.close()
+        self.store.close()
+        self.stock.close()
+        self.sender.close()
+
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+
+        await self.api.close()
+
+        if self.recorder is not None:
+            self.recorder.close()
+
+        await super().close()
+
+    async def launch_requests(self, loaded: Optional[tuple] = None) -> None:
+        """
+        Launches all clothes requests and associated channels to post.
+
+        Args:
+            loaded (Optional[tuple]): active requests and channel_ids if already loaded
+
+        Returns:
+            None, raises an exception if active requests could not be loaded
+        """
         # Acquire requests and channel_ids
-        clothe_requests, channel_ids = self.load_all_active_requests_and_channels()
+        clothe_requests, channel_ids = loaded if loaded is not None else \
+            await self.load_all_active_requests_and_channels()
 
         if clothe_requests:
             # Run tasks
-            logging.info(f"Running tasks for requests: {clothe_requests}, channel_ids: {channel_ids}")
+            logging.info(f"Running tasks for {len(clothe_requests)} request(s)",
+                         extra={"request_ids": [str(request["_id"]) for request in clothe_requests],
+                                "channel_ids": channel_ids})
+            self.pool = TaskPool("matching", self.workers)
             self.task = self.loop.create_task(self.get_clothes(clothe_requests, channel_ids))
+            self.sync_task = self.loop.create_task(self.sync_requests_forever())
 
         else:
             # Log message
@@ -79,212 +262,532 @@ class GuysVintedBot(discord.Client):
         self.logs_channel = self.get_channel(int(os.getenv("LOGS_CHANNEL_ID")))
         self.stock_channel = self.get_channel(int(os.getenv("STOCK_CHANNEL_ID")))
 
-        # Enable stock buttons on startup
-        for clothe_id in self.clothes_ids:
-            self.add_view(StockButtons(clothe_id=clothe_id,
-                                       port=self.port,
-                                       logs_channel=self.logs_channel))
-
         logging.info(f"Ready & logged in as {self.user}")
 
-    def get_clothes_ids_in_stock(self) -> list[str]:
+    def collect_pool_jobs(self) -> dict:
         """
-        Get all ids of clothes in stock
+        Returns:
+            dict, (state,) -> number of matching jobs running or waiting for a worker (matching_pool_jobs gauge)
+        """
+        if self.pool is None:
+            return {("running",): 0, ("waiting",): 0}
+
+        return {("running",): self.pool.in_flight, ("waiting",): self.pool.waiting}
 
+    def collect_poll_decisions(self) -> dict:
+        """
         Returns:
-            list[str], list of found clothes ids
+            dict, (shard, decision) -> number of interval changes of each shard (poll_decisions gauge)
+        """
+        decisions = {}
+
+        for shard in self.shards.values():
+            decisions[(shard.brand_ids, "speedup")] = shard.poller.speedups
+            decisions[(shard.brand_ids, "slowdown")] = shard.poller.slowdowns
+            decisions[(shard.brand_ids, "error")] = shard.poller.errors
+
+        return decisions
+
+    def named_channel(self, name: str) -> Optional[discord.TextChannel]:
         """
-        # API call
-        clothes_in_stock = requests.get(f"{API_HOST}:{self.port}/{GET_CLOTHES_FROM_STOCK_ROUTE}",
-                                        data=json.dumps({"which": "in_stock"}))
+        Read by the buttons handlers on each click (channels are only known once the bot is ready)
+
+        Args:
+            name (str): "all_clothes_channel", "logs_channel" or "stock_channel"
 
-        # Case success
-        if clothes_in_stock.status_code == 200:
-            stock_clothes = json.loads(clothes_in_stock.json()["data"])["found_clothes"]
-            clothes_ids = [clothe["clothe_id"] for clothe in stock_clothes if clothe["state"] == "in_stock"]
+        Returns:
+            Optional[discord.TextChannel], channel, None until the bot is ready
+        """
+        return getattr(self, name) or None
 
-            logging.info(f"Found following clothes ids (in_stock mode): {clothes_ids}")
+    async def on_interaction(self, interaction: discord.Interaction) -> None:
+        """
+        Called on every interaction. Routes persistent buttons clicks (slash commands are handled by the tree).
 
-            return clothes_ids
+        Args:
+            interaction (discord.Interaction): interaction to route
 
-        # Case no success - end the program
-        else:
-            logging.error(f"There was an issue while retrieving in_stock clothes (API status_code: "
-                          f"{clothes_in_stock.status_code})")
-            sys.exit(1)
+        Returns:
+            None
+        """
+        await self.components.dispatch(interaction)
 
-    def get_clothes_api(self, brand_ids: str, status_ids: str) -> requests.Response:
+    async def get_clothes_api(self, brand_ids: str, status_ids: str, page: int = 1) -> ApiResponse:
         """
-        Embedded function to be executed in a separated thread. Performs a global clothe request to the API
+        Performs a global clothe request to the API
         The used request contains all the referenced brands and clothes states
 
         Args:
             brand_ids (str): list of concatenated brand ids (e.g. '14,25,5218')
             status_ids (str): list of concatenated status ids (e.g. '14,25,5218')
+            page (int): page to get (1 = newest clothes)
 
         Returns:
-            requests.Response, API response
+            ApiResponse, API response
         """
-        logging.info("Sending global clothes request")
+        logging.info(f"Sending global clothes request (brand_ids {brand_ids}, page {page})")
         # Request the API to get new clothes
-        response = requests.get(f"{API_HOST}:{self.port}/{GET_CLOTHES_ROUTE}",
-                                data=json.dumps({"per_page": PER_PAGE,
-                                                 "brand_ids": brand_ids,
-                                                 "status_ids": status_ids}))
+        response = await self.api.get(GET_CLOTHES_ROUTE, {"per_page": PER_PAGE,
+                                                          "page": page,
+                                                          "brand_ids": brand_ids,
+                                                          "status_ids": status_ids})
 
         return response
 
-    async def find_matching_and_post(self, request: dict, new_clothes: list) -> None:
+    def rebuild_matcher(self) -> None:
         """
-        Find matching between a given request and new_clothes
-        Matching = (same brand) + (clothe state matching) + (price matching) + (search_text matching)
+        Recompiles the requests index and the global request shards. To be called whenever self.requests changes
+
+        Returns: None
+        """
+        self.matcher = RequestMatcher(self.requests)
+        self.shards = plan_shards(self.requests, self.shards)
+
+    def set_requests(self, requests: dict, channels: dict, rebuild: bool = True) -> None:
+        """
+        Swaps running requests and their channels at once (new dicts, never mutated afterwards), then recompiles the
+        matcher - polls in progress keep using the previous ones
+
+        Args:
+            requests: dict, request_id -> clothe request
+            channels: dict, request_id -> channel
+            rebuild: bool, whether to recompile now (False: the caller calls rebuild_matcher() after a batch of changes)
+
+        Returns: None
+        """
+        self.requests = requests
+        self.channels = channels
+
+        if rebuild:
+            self.rebuild_matcher()
+
+    def add_request(self, request: dict, channel: discord.abc.Messageable, rebuild: bool = True) -> None:
+        """
+        Starts (or restarts with new filters) a request, without pausing the others
 
         Args:
-            request: dict, clothe request
-            new_clothes: list, new clothes found
+            request: dict, clothe request (with its "_id")
+            channel: discord.abc.Messageable, channel to post in
+            rebuild: bool, see set_requests
 
         Returns: None
+        """
+        request_id = str(request["_id"])
+
+        # Updating a paused request keeps it paused
+        if request_id in self.paused:
+            self.paused[request_id] = (request, channel)
+            logging.info(f"Updated paused request {request_id}", extra={"request_id": request_id})
+            return
+
+        self.set_requests({**self.requests, request_id: request}, {**self.channels, request_id: channel}, rebuild)
 
+        logging.info(f"Request {request_id} running", extra={"request_id": request_id,
+                                                             "channel_id": getattr(channel, "id", None)})
+
+    def update_request(self, request: dict, rebuild: bool = True) -> None:
         """
-        # Matching clothes to return
-        matching = []
+        Changes the filters of a request, keeping its channel
 
-        # Build embedded message if matching found
-        all_embeds = []
-        embeds = []
+        Args:
+            request: dict, clothe request (with its "_id")
+            rebuild: bool, see set_requests
+
+        Returns: None
+        """
+        request_id = str(request["_id"])
+        channel = self.paused[request_id][1] if request_id in self.paused else self.channels.get(request_id)
 
-        # Get channel_id
-        channel = self.channels[str(request["_id"])]
+        self.add_request(request, channel, rebuild)
 
-        # We need to format new_clothes to find matching
-        for clothe in new_clothes:
-            # Brand matching
-            if clothe["brand_title"] not in BRANDS.keys():
-                continue
-            if BRANDS[clothe["brand_title"]] != request["brand_ids"]:
-                continue
+    def remove_request(self, request_id: str, rebuild: bool = True) -> bool:
+        """
+        Stops a request (running or paused)
+
+        Args:
+            request_id: str, request id
+            rebuild: bool, see set_requests
+
+        Returns: bool, whether the request was found
+        """
+        if self.paused.pop(request_id, None) is not None:
+            logging.info(f"Removed paused request {request_id}")
+            return True
+
+        if request_id not in self.requests:
+            return False
+
+        self.set_requests({key: value for key, value in self.requests.items() if key != request_id},
+                          {key: value for key, value in self.channels.items() if key != request_id}, rebuild)
+
+        logging.info(f"Removed request {request_id}")
+
+        return True
+
+    def pause_request(self, request_id: str) -> bool:
+        """
+        Stops posting for a request until resume_request() (local only, not saved in DB)
+
+        Args:
+            request_id: str, request id
+
+        Returns: bool, whether the request was running
+        """
+        if request_id not in self.requests:
+            return False
+
+        paused = (self.requests[request_id], self.channels.get(request_id))
+        self.remove_request(request_id)
+        self.paused[request_id] = paused
+
+        logging.info(f"Paused request {request_id}")
+
+        return True
+
+    def resume_request(self, request_id: str) -> bool:
+        """
+        Args:
+            request_id: str, request id
+
+        Returns: bool, whether the request was paused
+        """
+        if request_id not in self.paused:
+            return False
+
+        request, channel = self.paused.pop(request_id)
+        self.add_request(request, channel)
+
+        return True
+
+    def find_request_id(self, name: str) -> Optional[str]:
+        """
+        Args:
+            name: str, request name
+
+        Returns: Optional[str], id of the running or paused request with this name
+        """
+        for request_id, request in list(self.requests.items()) + [(request_id, request) for request_id, (request, _)
+                                                                   in self.paused.items()]:
+            if request["name"] == name:
+                return request_id
+
+        return None
+
+    def sync_requests(self, clothe_requests: list[dict], channel_ids: list[str]) -> None:
+        """
+        Applies the difference between running requests and the active requests found in DB, through add_request,
+        update_request and remove_request: new ones are added, missing ones removed, changed ones updated. Unchanged
+        requests are untouched, paused ones stay paused. The matcher is recompiled once for all the changes.
+
+        Args:
+            clothe_requests (list[dict]): active requests in DB
+            channel_ids (list[str]): corresponding channel_ids
+
+        Returns: None
+        """
+        active = {str(request["_id"]): (request, channel_id) for request, channel_id in zip(clothe_requests,
+                                                                                          channel_ids)}
+        changes = 0
+
+        for request_id, (request, channel_id) in active.items():
+            if request_id in self.paused:
+                if self.paused[request_id][0] != request:
+                    self.update_request(request, rebuild=False)
+                    changes += 1
 
-            # Clothe state matching
-            if CLOTHES_STATES[clothe["status"]] not in request["status_ids"]:
                 continue
 
-            # Price matching
-            if not ((float(clothe["price_no_fee"]) >= float(request["price_from"])) and
-                    (float(clothe["price_no_fee"]) <= float(request["price_to"]))):
+            channel = self.channels.get(request_id)
+
+            # New request, or moved to another channel
+            if channel is None or channel.id != int(channel_id):
+                channel = self.get_channel(int(channel_id))
+
+                if channel is None:
+                    logging.warning(f"Channel {channel_id} not found for request {request_id} - not running")
+
+                    if self.remove_request(request_id, rebuild=False):
+                        changes += 1
+
+                    continue
+
+                self.add_request(request, channel, rebuild=False)
+                changes += 1
+
+            elif self.requests.get(request_id) != request:
+                self.update_request(request, rebuild=False)
+                changes += 1
+
+        for request_id in [request_id for request_id in [*self.requests, *self.paused] if request_id not in active]:
+            if self.remove_request(request_id, rebuild=False):
+                changes += 1
+
+        if changes:
+            self.rebuild_matcher()
+            logging.info(f"Synced requests with DB: {changes} change(s), {len(self.requests)} running, "
+                         f"{len(self.paused)} paused")
+
+    async def sync_requests_forever(self) -> None:
+        """
+        Background sync of running requests with the active requests in DB
+
+        Returns: None
+        """
+        while True:
+            await asyncio.sleep(self.sync_interval)
+
+            try:
+                clothe_requests, channel_ids = await self.fetch_active_requests_and_channels()
+                self.sync_requests(clothe_requests, channel_ids)
+
+            except Exception as e:
+                logging.warning(f"Could not sync requests with DB, will retry: {e!r}")
+
+    def score_search_texts(self, matches: dict) -> dict:
+        """
+        Scores all candidate clothes titles against their requests search texts in one batch
+
+        Args:
+            matches: dict, request_id -> (CompiledRequest, list of candidate clothes), see RequestMatcher.match
+
+        Returns: dict, (title, search_text) -> ratio, only for pairs reaching FUZZ_RATIO
+        """
+        titles_by_search_text = {}
+
+        for compiled, candidates in matches.values():
+            if compiled.search_text:
+                titles_by_search_text.setdefault(compiled.search_text, []).extend(clothe["title"]
+                                                                                  for clothe in candidates)
+
+        return self.fuzzy.score_batch(titles_by_search_text)
+
+    def select_matching(self, new_clothes: list, matches: dict, scores: dict) -> list:
+        """
+        Checks the search_text matching of candidates and groups matching requests by clothe
+
+        Args:
+            new_clothes: list, new clothes found (oldest first)
+            matches: dict, request_id -> (CompiledRequest, list of candidate clothes), see RequestMatcher.match
+            scores: dict, (title, search_text) -> ratio for pairs reaching FUZZ_RATIO
+
+        Returns: list, (clothe, list of (CompiledRequest, ratio)) for each matching clothe, oldest first
+        """
+        requests_by_clothe = {}
+
+        for compiled, candidates in matches.values():
+            # Request removed in the meantime
+            if compiled.request_id not in self.channels:
                 continue
 
-            # Search text matching - use Levenshtein Distance
-            if request["search_text"]:
-                ratio = fuzz.partial_ratio(clothe["title"], request["search_text"])
+            for clothe in candidates:
+                # No search text: everything matches
+                ratio = 100
+
+                # Search text matching - use Levenshtein Distance
+                if compiled.search_text:
+                    ratio = scores.get((clothe["title"], compiled.search_text))
+
+                    if ratio is None:
+                        continue
+
+                logging.debug(f"Matching found between request: {compiled.request_id} and clothe: {clothe['id']} "
+                              f"(fuzz_ratio: {ratio})",
+                              extra={"clothe_id": clothe["id"], "request_id": compiled.request_id, "ratio": ratio})
+
+                requests_by_clothe.setdefault(clothe["id"], []).append((compiled, ratio))
+
+        return [(clothe, requests_by_clothe[clothe["id"]]) for clothe in new_clothes
+                if clothe["id"] in requests_by_clothe]
+
+    async def find_matching_and_post(self, new_clothes: list, timings: Optional[dict] = None) -> None:
+        """
+        Find matching between requests and new_clothes, then post
+        Matching = (same brand) + (clothe state matching) + (price matching) + (search_text matching)
+        Each matching clothe is posted in every matching request channel and once in the global channel
 
-                if not ratio >= FUZZ_RATIO:
+        Args:
+            new_clothes: list, new clothes found (oldest first)
+            timings: Optional[dict], clothe id -> poll timestamps, to trace matching clothes (not traced if None)
+
+        Returns: None
+
+        """
+        match_start = time.time()
+        # Route clothes to candidate requests (brand, state and price)
+        matches = self.matcher.match(new_clothes)
+        # Then on search texts, all at once
+        scores = self.score_search_texts(matches)
+        # Matching clothes, with their matching requests
+        matching = self.select_matching(new_clothes, matches, scores)
+        match_end = time.time()
+
+        if not matching:
+            return
+
+        for _, requests_matching in matching:
+            for compiled, _ in requests_matching:
+                self.matches_total.inc(compiled.request_id)
+
+        # Only clothes which will be posted are traced
+        if timings is not None:
+            self.traces.start([clothe for clothe, _ in matching], timings)
+
+        for clothe, _ in matching:
+            self.traces.span(clothe["id"], "match", match_start, match_end)
+
+        # New poll, new clothes to enrich
+        self.enricher.start_poll()
+
+        # Seller ratings and images of all matching clothes, fetched concurrently (once per clothe)
+        enrich_start = time.time()
+        enrichments = [asyncio.ensure_future(self.enricher.enrich(clothe)) for clothe, _ in matching]
+        posts = []
+
+        try:
+            # Post from oldest to newest, each one as soon as it is enriched
+            for (clothe, requests_matching), enrichment in zip(matching, enrichments):
+                start = time.time()
+
+                # A clothe we can't enrich is skipped, the others are still posted
+                try:
+                    user_reviews, user_stars, url_list = await enrichment
+
+                except Exception as e:
+                    self.posted_total.inc("enrichment_failed")
+                    logging.error(f"Could not enrich clothe {clothe['id']}, skipped: {e!r}")
                     continue
 
-                logging.info(f"Selected clothe: {clothe}, fuzz_ratio: {ratio}")
+                self.latencies.record("enrichment_wait", time.time() - start)
+                self.enrichment_wait_seconds.observe(time.time() - start)
+                self.traces.span(clothe["id"], "enrichment", enrich_start, time.time())
+
+                embeds = self.build_embeds(clothe, user_reviews, user_stars, url_list)
+
+                # Buy buttons only carry ids, details are read from the store on click
+                self.store.save(clothe, embeds)
+
+                posts.append(asyncio.ensure_future(
+                    self.track_posts(clothe, self.post_clothe(clothe, requests_matching, embeds), time.time())))
+                self.posted_total.inc("posted")
+
+            # Wait for everything to be sent (failed posts are logged by the sender)
+            start = time.time()
+            await asyncio.gather(*posts, return_exceptions=True)
+            self.latencies.record("post", time.time() - start)
+            self.post_seconds.observe(time.time() - start)
 
-            logging.info(f"Matching found between request: {request} and clothe: {clothe}")
+        finally:
+            # Do not leave enrichments running in case something went wrong
+            for enrichment in enrichments:
+                enrichment.cancel()
 
-            # Once here, clothe has been selected to be posted
-            matching.append(clothe)
+    async def track_posts(self, clothe: dict, sends: list, start: float) -> None:
+        """
+        Waits for the posts of a clothe, then closes its trace (listing to post delay)
+
+        Args:
+            clothe: dict, clothe dict
+            sends: list, asyncio.Future of each post (see post_clothe)
+            start: float, timestamp when the posts were scheduled
+
+        Returns: None
+        """
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        end = time.time()
+
+        # Failed posts are logged by the sender, the clothe counts as posted if one of them went through
+        if not all(isinstance(result, Exception) for result in results):
+            self.traces.span(clothe["id"], "send", start, end)
+            self.traces.finish(clothe["id"], end)
+
+    def post_clothe(self, clothe: dict, requests_matching: list, embeds: list[discord.Embed]) -> list:
+        """
+        Schedules the posts of a clothe in each matching request channel, and once in the global channel along with
+        the names of the matching requests (the clothe has to be saved in self.store first)
+
+        Args:
+            clothe: dict, clothe dict
+            requests_matching: list, list of (CompiledRequest, ratio) matching the clothe
+            embeds: list[discord.Embed], embeds to post
+
+        Returns: list, asyncio.Future of each post
+        """
+        sends = []
+
+        for compiled, ratio in requests_matching:
+            # A request whose channel is gone is skipped, the others are still posted
+            if not self.channels.get(compiled.request_id):
+                logging.error(f"No channel found for request {compiled.request_id}, clothe {clothe['id']} not posted")
+                continue
 
-            # Call the API to get user infos
-            user_infos = requests.get(f"{API_HOST}:{self.port}/{USER_INFOS_ROUTE}",
-                                      data=json.dumps({"user_id": clothe["seller_id"]}))
+            sends.append(self.sender.send(
+                self.channels[compiled.request_id],
+                PRIORITY_MATCH,
+                embeds=embeds,
+                view=BuyButtons(request_id=compiled.request_id,
+                                clothe=clothe,
+                                ratio=ratio)))
+
+        # Global channel: buttons refer to the best matching request
+        best, best_ratio = max(requests_matching, key=lambda request_matching: request_matching[1])
+        names = ", ".join(compiled.request["name"] for compiled, _ in requests_matching)
+
+        sends.append(self.sender.send(
+            self.all_clothes_channel,
+            PRIORITY_MATCH,
+            content=f"🔎 {names}",
+            embeds=embeds,
+            view=BuyButtons(request_id=best.request_id,
+                            clothe=clothe,
+                            ratio=best_ratio)))
+
+        return sends
+
+    @staticmethod
+    def build_embeds(clothe: dict, user_reviews: int, user_stars: int, url_list: list[str]) -> list[discord.Embed]:
+        """
+        Builds the embeds to post for a clothe, one per image
 
-            if user_infos.status_code != 200:
-                logging.error(f"Could not retrieve user infos for user_id: {clothe['seller_id']} "
-                              f"(channel: {channel})")
-                raise Exception(f"Could not retrieve user infos for user_id: {clothe['seller_id']} "
-                                f"(channel: {channel})")
+        Args:
+            clothe: dict, clothe dict
+            user_reviews: int, number of seller reviews
+            user_stars: int, number of seller stars
+            url_list: list[str], images urls
 
-            logging.info(f"Found user_infos: {user_infos.json()} for request: {request} "
-                         f"(channel: {channel})")
+        Returns: list[discord.Embed]
+        """
+        embeds = []
 
-            # Get result
-            user_reviews = json.loads(user_infos.json()["data"])["number_reviews"]
-            user_stars = json.loads(user_infos.json()["data"])["number_stars"]
+        # Convert publish date to timestamp for dynamic display
+        api_time_ts = get_publish_timestamp(clothe)
 
-            # Call the API to get images
-            images_url = requests.get(f"{API_HOST}:{self.port}/{GET_IMAGES_URL_ROUTE}",
-                                      data=json.dumps({"clothe_url": clothe["url"]}))
+        # Custom title in case we may have suspicious pictures
+        title = clothe["title"] if not clothe["is_photo_suspicious"] \
+            else clothe["title"] + " - PHOTOS SUSPICIEUSES"
 
-            # Handle case where we have no images (internal server error)
-            if images_url.status_code != 200:
-                logging.warning(f"No status_code 200 but {images_url.status_code} for request: {request} "
-                                f"(channel: {channel}) - forcing default no image available image")
-                # Default no image available image
-                url_list = [NO_IMAGE_AVAILABLE_URL]
+        # Build reviews display
+        reviews = "⭐" * user_stars if user_stars != 0 else "⛔"
 
+        for url in url_list:
+            # We force URL to everytime the product url
+            embed = discord.Embed(title=title,
+                                  color=discord.Color.dark_blue(),
+                                  url=clothe["url"]).set_image(url=url)
+            if api_time_ts != "NA":
+                embed.add_field(name="⌛ Publié", value=f"<t:{api_time_ts}:R>", inline=True)
             else:
-                # Retrieve images
-                url_list = images_url.json()["data"]["images_url"]
-
-                # Case no image received
-                if not url_list:
-                    logging.warning(f"No image found for request: {request} (channel: {channel}) - "
-                                    f"forcing default no image available image")
-                    # Default no image available image
-                    url_list = [NO_IMAGE_AVAILABLE_URL]
-
-                else:
-                    logging.info(f"Found {len(url_list)} images for request: {request} "
-                                 f"(channel: {channel})")
-                    logging.info(f"Images URLs: {url_list}")
-
-            # Convert publish date to timestamp for dynamic display (drop milliseconds)
-            try:
-                api_time = datetime.datetime.strptime(clothe["created_at_ts"], "%Y-%m-%dT%H:%M:%S%z")
-                api_time_ts = int(datetime.datetime.timestamp(api_time))
-            except Exception as e:
-                logging.warning(f"Exception for clothe {clothe} encountered during date formatting: {e}")
-                api_time_ts = "NA"
-
-            # Custom title in case we may have suspicious pictures
-            title = clothe["title"] if not clothe["is_photo_suspicious"] \
-                else clothe["title"] + " - PHOTOS SUSPICIEUSES"
-
-            # Build reviews display
-            reviews = "⭐" * user_stars if user_stars != 0 else "⛔"
-
-            for url in url_list:
-                # We force URL to everytime the product url
-                embed = discord.Embed(title=title,
-                                      color=discord.Color.dark_blue(),
-                                      url=clothe["url"]).set_image(url=url)
-                if api_time_ts != "NA":
-                    embed.add_field(name="⌛ Publié", value=f"<t:{api_time_ts}:R>", inline=True)
-                else:
-                    embed.add_field(name="⌛ Publié", value=f"{api_time_ts}", inline=True)
-                embed.add_field(name="👕️ Marque", value=clothe["brand_title"], inline=True)
-                embed.add_field(name="📏 Taille", value=clothe["size_title"], inline=True)
-                embed.add_field(name="🌟 Avis", value=reviews + f" ({user_reviews})", inline=True)
-                embed.add_field(name="💎 État", value=clothe["status"], inline=True)
-                embed.add_field(name="💰 Prix", value=f"{clothe['total_item_price']} € | "
-                                                     f"{clothe['price_no_fee']} € + "
-                                                     f"{clothe['service_fee']} € fees",
-                                inline=True)
-                embeds.append(embed)
-
-            await channel.send(embeds=embeds,
-                               view=BuyButtons(request_id=str(request["_id"]),
-                                               clothe=clothe,
-                                               embeds=embeds,
-                                               ratio=ratio,
-                                               logs_channel=self.logs_channel,
-                                               stock_channel=self.stock_channel,
-                                               port=self.port))
-            await self.all_clothes_channel.send(embeds=embeds,
-                                                view=BuyButtons(request_id=str(request["_id"]),
-                                                                clothe=clothe,
-                                                                embeds=embeds,
-                                                                ratio=ratio,
-                                                                logs_channel=self.logs_channel,
-                                                                stock_channel=self.stock_channel,
-                                                                port=self.port))
-
-            all_embeds.append(embeds)
-
-            embeds = []
+                embed.add_field(name="⌛ Publié", value=f"{api_time_ts}", inline=True)
+            embed.add_field(name="👕️ Marque", value=clothe["brand_title"], inline=True)
+            embed.add_field(name="📏 Taille", value=clothe["size_title"], inline=True)
+            embed.add_field(name="🌟 Avis", value=reviews + f" ({user_reviews})", inline=True)
+            embed.add_field(name="💎 État", value=clothe["status"], inline=True)
+            embed.add_field(name="💰 Prix", value=f"{clothe['total_item_price']} € | "
+                                                 f"{clothe['price_no_fee']} € + "
+                                                 f"{clothe['service_fee']} € fees",
+                            inline=True)
+            embeds.append(embed)
+
+        return embeds
 
     async def get_clothes(self, clothe_requests: list[dict], channel_ids: list[str]) -> None:
         """
@@ -302,71 +805,50 @@ class GuysVintedBot(discord.Client):
         await self.wait_until_ready()
 
         # Add keys in dicts = running tasks
-        for request, channel_id in zip(clothe_requests, channel_ids):
-            self.requests[str(request["_id"])] = request
-            self.channels[str(request["_id"])] = self.get_channel(int(channel_id))
-
-        # Define global cache
-        cache = []
+        self.sync_requests(clothe_requests, channel_ids)
 
-        # Minimal waiting time
-        wait_time = int(WAIT_TIME)
+        # Global cache of seen clothes ids - if warm (restart), catch up on clothes published in the meantime
+        cache = self.seen
 
-        # Define filters on brands and clothes status
-        brand_ids = reformat_list_strings(list(BRANDS.values()))
-        status_ids = reformat_list_strings(list(CLOTHES_STATES.values()))
+        if len(cache) > 0:
+            for shard in self.shards.values():
+                shard.catch_up = True
 
         try:
             # Infinite loop
             while not self.is_closed():
-                # To not get rate limited
                 start = time.time()
-                # Run in a separate thread to not freeze the bot - global clothes search
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(ThreadPoolExecutor(), self.get_clothes_api, brand_ids, status_ids)
-
-                if response.status_code != 200:
-                    logging.error(f"Could not retrieve clothes for global request, response: {response.text}")
-                    await self.logs_channel.send("⚠️ Les recherches ont été interrompues après un souci - erreur [1]")
-                    raise Exception(f"Could not retrieve clothes for global request")
-
-                # Load clothes
-                data = json.loads(response.json()["data"])
-
-                # To prevent the bot to post multiple messages on startup
-                if not cache:
-                    cache = [clothe["id"] for clothe in data]
 
-                # Now compare to cache
-                new_clothes = [clothe for clothe in data if clothe["id"] not in cache]
+                # Shards due for an API call (the plan changes with the requests, see rebuild_matcher)
+                due = [shard for shard in self.shards.values() if shard.next_due <= start]
+                failed = False
 
-                # Reverse list to post from oldest to newest
-                new_clothes.reverse()
+                if due:
+                    # One failed poll must not stop the searches: log it and go on
+                    try:
+                        await self.poll_due_shards(due, start)
 
-                # If new clothes we find if there are matching requests (coded in separate threads)
-                # If yes we post clothes in the corresponding channel (and global one) and update cache
-                if new_clothes:
-                    logging.info(f"Found {len(new_clothes)} new clothe(s) matching global filters in this API call")
+                    except Exception as e:
+                        failed = True
+                        self.failed_polls += 1
+                        self.skipped_polls_total.inc()
+                        logging.error(f"There was an exception while polling, poll skipped "
+                                      f"({self.failed_polls} so far): {e!r}")
 
-                    await asyncio.gather(*[self.find_matching_and_post(request, new_clothes)
-                                           for request in list(self.requests.values())])
+                # To not get API rate limited: wait for the next due shard
+                next_due = min((shard.next_due for shard in self.shards.values()),
+                               default=start + float(WAIT_TIME))
+                waiting_time = next_due - time.time()
 
-                    for clothe in new_clothes:
-                        # Update global cache
-                        cache.insert(0, clothe["id"])
-
-                    # Security for cache length
-                    if len(cache) > 4 * len(clothe_requests) * int(PER_PAGE):
-                        previous_size = len(cache)
-                        cache = cache[:3 * len(clothe_requests) * int(PER_PAGE)]
-                        logging.info(f"Cache size pruned from {previous_size} to {len(cache)}")
-
-                # To not get API rate limited
-                end = time.time()
-                waiting_time = wait_time - (end - start)
+                if failed:
+                    waiting_time = max(waiting_time, float(WAIT_TIME))
 
                 if waiting_time > 0:
-                    logging.info(f"Waiting for {waiting_time} seconds before next API call")
+                    # Every second or so: stats are only formatted when debugging
+                    if logging.getLogger().isEnabledFor(logging.DEBUG):
+                        logging.debug(f"Waiting for {waiting_time} seconds before next API call "
+                                      f"(poll scheduler stats: {[shard.poller.stats() for shard in due]})")
+
                     await asyncio.sleep(waiting_time)
 
         except Exception as e:
@@ -376,43 +858,303 @@ class GuysVintedBot(discord.Client):
             self.reset_global_task()
 
             # Write a message in the request channel (local only)
-            await self.logs_channel.send("⚠️ Les recherches ont été interrompues après un souci - erreur [2]")
+            self.sender.log(self.logs_channel, "⚠️ Les recherches ont été interrompues après un souci - erreur [2]")
+
+    async def poll_due_shards(self, due: list, now: float) -> None:
+        """
+        Polls due shards concurrently, then hands their new clothes over to the matching pool (matching, enrichment
+        and posts run in background, the next polls don't wait for them)
+
+        Args:
+            due (list): shards to poll
+            now (float): current timestamp
+
+        Returns:
+            None
+        """
+        cache = self.seen
+        # clothe id -> poll timestamps, for the traces of the clothes that will match
+        timings = {}
+
+        # Global clothes searches, concurrently (non-blocking API calls), a failing shard does not affect the others
+        results = await asyncio.gather(*[self.poll_shard(shard, now, timings) for shard in due],
+                                       return_exceptions=True)
+
+        # Merge shards results, post from oldest to newest (Vinted ids increase with time)
+        merged = {}
+
+        for shard, shard_clothes in zip(due, results):
+            if isinstance(shard_clothes, Exception):
+                logging.error(f"There was an exception while polling shard {shard}: {shard_clothes!r}")
+                self.record_shard_error(shard, now)
+                continue
+
+            for clothe in shard_clothes:
+                merged.setdefault(int(clothe["id"]), clothe)
+
+        new_clothes = [merged[clothe_id] for clothe_id in sorted(merged)]
+
+        # If new clothes we find if there are matching requests
+        # If yes we post clothes in the corresponding channels (and once in the global one)
+        if new_clothes:
+            logging.info(f"Found {len(new_clothes)} new clothe(s) matching global filters in {len(due)} API call(s)")
+
+            # Update global cache right away: next polls run while these clothes are being matched and posted
+            for clothe in new_clothes:
+                cache.add(int(clothe["id"]), now)
+
+            # At most `workers` polls matched and posted at the same time, the others wait in the pool (a full pool
+            # holds the polling loop)
+            await self.pool.submit(self.match_and_post(new_clothes, timings))
+
+        # Security for cache length and age
+        if cache.evict(now):
+            logging.info(f"Cache pruned, stats: {cache.stats()}")
+
+        cache.flush()
+
+    async def match_and_post(self, new_clothes: list, timings: dict) -> None:
+        """
+        Matching pool job of one poll: matches and posts its new clothes
+
+        Args:
+            new_clothes (list): new clothes found (oldest first)
+            timings (dict): clothe id -> poll timestamps (see poll_shard)
+
+        Returns:
+            None
+        """
+        try:
+            await self.find_matching_and_post(new_clothes, timings)
+
+        except Exception as e:
+            # Clothes are still marked as seen, not to fail on them again at each poll
+            logging.error(f"There was an exception while matching and posting {len(new_clothes)} clothe(s), "
+                          f"skipped: {e!r}")
+
+        finally:
+            # Traces of clothes not posted
+            self.traces.discard(new_clothes)
+
+        # Once per job: stats are only formatted when debugging (see /stats and the metrics endpoint otherwise)
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"Matching pool stats: {self.pool.stats()}, "
+                          f"enrichment stats: {self.enricher.stats()}, "
+                          f"sender stats: {self.sender.stats()}, "
+                          f"API stats: {self.api.stats()}, "
+                          f"latencies: {self.latencies.stats()}")
+
+    def record_shard_error(self, shard: Shard, now: float) -> None:
+        """
+        Backs off a failing shard, warns in the logs channel when it reaches POLL_MAX_ERRORS errors in a row
 
-    def load_all_active_requests_and_channels(self) -> tuple:
-            """
-            Loads all the active requests existing in the DB and associated channels ids.
+        Args:
+            shard (Shard): failing shard
+            now (float): current timestamp
+
+        Returns:
+            None
+        """
+        shard.next_due = now + shard.poller.record_error()
+
+        if shard.poller.consecutive_errors == POLL_MAX_ERRORS:
+            self.sender.log(self.logs_channel, "⚠️ Les recherches échouent en boucle, nouvelles tentatives en cours "
+                                               "- erreur [1]")
+
+    async def poll_shard(self, shard: Shard, now: float, timings: dict) -> list:
+        """
+        Polls one global request shard and schedules its next call
+
+        Args:
+            shard (Shard): shard to poll
+            now (float): current timestamp
+            timings (dict): where to put (API call, API response, dedup end) timestamps of new clothes
+
+        Returns:
+            list, new clothes (not in cache yet)
+        """
+        cache = self.seen
+
+        start = time.time()
+
+        try:
+            response = await self.get_clothes_api(shard.brand_ids, shard.status_ids)
+            error = None if response.status_code == 200 else f"response: {response.text}"
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = f"exception: {e!r}"
+
+        self.poll_seconds.observe(time.time() - start)
+        self.polls_total.inc("ok" if error is None else "error")
+
+        # API error - back off (searches go on), warn once after too many errors in a row
+        if error is not None:
+            logging.error(f"Could not retrieve clothes for global request (brand_ids {shard.brand_ids}), {error}")
+            self.record_shard_error(shard, now)
+
+            return []
 
-            Returns:
-                tuple, two elements, first one is a list of requests (dict) and the second one the list of associated
-                channels ids (int) in the same order.
-            """
+        if shard.poller.consecutive_errors >= POLL_MAX_ERRORS:
+            self.sender.log(self.logs_channel, "✅ Les recherches fonctionnent à nouveau")
+
+        # Load clothes
+        data = response.data
+        first_poll = shard.first_poll
+        shard.first_poll = False
+
+        # Overflow: the whole page is new, we may have missed clothes beyond it
+        if (shard.catch_up or shard.carried or not first_poll) and data and \
+                not any(int(clothe["id"]) in cache for clothe in data):
+            data = await self.get_overflowing_clothes(shard, data)
+
+        fetch_end = time.time()
+
+        # To prevent the bot to post multiple messages on startup (or when brands or states start being watched or
+        # the shards are re-planned), only clothes of brands and states polled by the previous shards and newer than
+        # what they saw are still posted
+        if first_poll and not shard.catch_up:
+            for clothe in data:
+                if not shard.is_carried_new(clothe):
+                    cache.add(int(clothe["id"]), now)
+
+        shard.observe(data, start)
+
+        # Now compare to cache
+        new_clothes = [clothe for clothe in data if not cache.seen(int(clothe["id"]), now)]
+        dedup_end = time.time()
+
+        # Adapt waiting time to the number of new clothes
+        shard.next_due = now + shard.poller.record(len(new_clothes))
+        self.poll_new_clothes.observe(len(new_clothes))
+
+        # First call after a restart: only keep clothes published within the catch-up window
+        if first_poll and shard.catch_up:
+            new_clothes = self.filter_catch_up(new_clothes, now)
+
+        # Same clothe found by two shards: the first timings are kept
+        for clothe in new_clothes:
+            timings.setdefault(int(clothe["id"]), (start, fetch_end, dedup_end))
+
+        return new_clothes
+
+    async def get_overflowing_clothes(self, shard: Shard, data: list) -> list:
+        """
+        Fetches the next pages until we reconnect with already seen clothes (at most POLL_MAX_PAGES pages)
+
+        Args:
+            shard (Shard): overflowing shard
+            data (list): first page, only new clothes
+
+        Returns:
+            list, clothes of all fetched pages (newest first, without duplicates)
+        """
+        pages = [data]
+        resolved = False
+
+        for page in range(2, POLL_MAX_PAGES + 1):
             try:
-                # Request the API to get {requests: channel_ids}
-                response = requests.get(f"{API_HOST}:{self.port}/{REQUESTS_CHANNEL_IDS_ROUTE}")
+                response = await self.get_clothes_api(shard.brand_ids, shard.status_ids, page)
 
-                # Case success - return requests and tasks
-                if response.status_code == 200:
-                    # Get data and return
-                    response_json = json.loads(response.json()["data"])
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warning(f"Could not retrieve page {page} of global request: {e!r}")
+                break
 
-                    clothe_requests = response_json["requests"]
-                    channel_ids = response_json["channel_ids"]
+            if response.status_code != 200:
+                logging.warning(f"Could not retrieve page {page} of global request, response: {response.text}")
+                break
 
-                    logging.info(f"Found existing requests: {clothe_requests} (corresponding channel_ids: "
-                                 f"{channel_ids})")
+            page_data = response.data
+            pages.append(page_data)
 
-                    return clothe_requests, channel_ids
+            # Last page or back to known clothes
+            if not page_data or any(int(clothe["id"]) in self.seen for clothe in page_data):
+                resolved = True
+                break
 
-                # Case no success - end the program
-                else:
-                    logging.error(f"There was an issue while retrieving active requests and corresponding channels "
-                                  f"- ending program (API status_code: {response.status_code})")
-                    sys.exit(1)
+        shard.poller.record_overflow(len(pages), resolved)
 
-            except Exception as e:
-                logging.error(f"There was an exception while retrieving active requests and corresponding channels "
-                              f"- ending program (exception: {e})")
-                sys.exit(1)
+        # Clothes may have shifted from one page to the next one in the meantime
+        clothes = {}
+
+        for page_data in pages:
+            for clothe in page_data:
+                clothes.setdefault(clothe["id"], clothe)
+
+        logging.info(f"Page overflow - fetched {len(pages)} page(s), {len(clothes)} clothes "
+                     f"({'resolved' if resolved else 'some clothes may have been missed'})")
+
+        return list(clothes.values())
+
+    def filter_catch_up(self, new_clothes: list, now: float) -> list:
+        """
+        Keeps clothes published within the catch-up window (published while the bot was down).
+        Older ones are only marked as seen.
+
+        Args:
+            new_clothes: list, clothes not in cache on the first call after a restart
+            now: float, current timestamp
+
+        Returns:
+            list, clothes to post
+        """
+        limit = now - self.catch_up_window
+        to_post = []
+
+        for clothe in new_clothes:
+            publish_ts = get_publish_timestamp(clothe)
+
+            if publish_ts != "NA" and publish_ts >= limit:
+                to_post.append(clothe)
+
+            else:
+                self.seen.add(int(clothe["id"]), now)
+
+        logging.info(f"Catching up on {len(to_post)} clothe(s) published while the bot was down "
+                     f"({len(new_clothes) - len(to_post)} older one(s) skipped)")
+
+        return to_post
+
+    async def fetch_active_requests_and_channels(self) -> tuple:
+        """
+        Fetches all the active requests existing in the DB and associated channels ids.
+
+        Returns:
+            tuple, two elements, first one is a list of requests (dict) and the second one the list of associated
+            channels ids (int) in the same order. Raises an exception if the API call fails.
+        """
+        # Request the API to get {requests: channel_ids}
+        response = await self.api.get(REQUESTS_CHANNEL_IDS_ROUTE)
+
+        if response.status_code != 200:
+            raise Exception(f"API status_code: {response.status_code}")
+
+        # Get data and return
+        response_json = response.data
+
+        return response_json["requests"], response_json["channel_ids"]
+
+    async def load_all_active_requests_and_channels(self) -> tuple:
+        """
+        Loads all the active requests existing in the DB and associated channels ids.
+
+        Returns:
+            tuple, two elements, first one is a list of requests (dict) and the second one the list of associated
+            channels ids (int) in the same order. Raises an exception if they could not be retrieved.
+        """
+        try:
+            clothe_requests, channel_ids = await self.fetch_active_requests_and_channels()
+
+            logging.info(f"Found {len(clothe_requests)} existing request(s)",
+                         extra={"request_ids": [str(request["_id"]) for request in clothe_requests],
+                                "channel_ids": channel_ids})
+
+            return clothe_requests, channel_ids
+
+        # Case no success - up to the caller (the bot keeps running)
+        except Exception as e:
+            logging.error(f"There was an exception while retrieving active requests and corresponding channels "
+                          f"(exception: {e})")
+            raise
 
     def reset_global_task(self) -> None:
         """
@@ -428,8 +1170,17 @@ class GuysVintedBot(discord.Client):
         except Exception as e:
             logging.warning(f"Global clothes requests task was never launched. Error: {e}")
 
+        # Stop the running jobs
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+        if self.sync_task is not None:
+            self.sync_task.cancel()
+            self.sync_task = None
+
         self.task = ""
-        self.requests = {}
-        self.channels = {}
+        self.paused = {}
+        self.set_requests({}, {})
 
         logging.info("All requests stopped successfully")
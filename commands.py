@@ -10,25 +10,23 @@
 import os
 
 import discord
-import requests
-import json
 import logging
 
 from utils.add_requests import AddRequestsForm
 from utils.login import Login
 from utils.pickup import PickUpModal, PickUpSelectView
 from utils.utils import reformat_list_strings
-from utils.defines import API_HOST, UPDATE_REQUESTS_ROUTE, ADD_ASSOCIATION_ROUTE, LOGIN_ROUTE, PER_PAGE, CATEGORY, \
-                            PICKUP_GET_ROUTE, PICKUP_POST_ROUTE
+from utils.defines import UPDATE_REQUESTS_ROUTE, ADD_ASSOCIATION_ROUTE, LOGIN_ROUTE, PER_PAGE, CATEGORY, \
+                            PICKUP_GET_ROUTE, PICKUP_POST_ROUTE, TRACE_WINDOW
+from utils.tracing import STAGES
 
 
-def define_commands(client: discord.Client, port: int) -> None:
+def define_commands(client: discord.Client) -> None:
     """
     Small function adding all the slash commands to the bot.
 
     Args:
-        client (discord.Client): our bot
-        port (int): API port to use
+        client (discord.Client): our bot (API calls go through client.api)
 
     Returns:
         None
@@ -79,13 +77,12 @@ def define_commands(client: discord.Client, port: int) -> None:
 
         try:
             # Attempt the request save
-            save_request = requests.post(f"{API_HOST}:{port}/{UPDATE_REQUESTS_ROUTE}",
-                                         data=json.dumps({"added": [request]}))
+            save_request = await client.api.post(UPDATE_REQUESTS_ROUTE, {"added": [request]})
 
             # Success
             if save_request.status_code == 200:
                 # Get request inserted id
-                inserted_id = json.loads(save_request.json()["data"])["added"][0]
+                inserted_id = save_request.data["added"][0]
 
                 logging.info(f"Success - request {request} successfully inserted in DBi (inserted id: {inserted_id})")
 
@@ -105,15 +102,14 @@ def define_commands(client: discord.Client, port: int) -> None:
                 logging.info(f"Attempting insertion of association: {association}")
 
                 # Call the API to insert the association
-                add_association = requests.post(f"{API_HOST}:{port}/{ADD_ASSOCIATION_ROUTE}",
-                                                data=json.dumps(association))
+                add_association = await client.api.post(ADD_ASSOCIATION_ROUTE, association)
 
                 # Health check and run task
                 if add_association.status_code == 200:
                     await interaction.followup.send(f"✅ Insertion réussie !\nRecherche: {request}\n"
                                                     f"Association: {association}", ephemeral=True)
-                    await client.logs_channel.send(f"✅ Insertion réussie !\nRecherche: {request}\n"
-                                                    f"Association: {association}")
+                    client.sender.log(client.logs_channel, f"✅ Insertion réussie !\nRecherche: {request}\n"
+                                                            f"Association: {association}")
 
                     logging.info(f"Success - association {association} successfully inserted in DB (request {request})")
 
@@ -121,8 +117,7 @@ def define_commands(client: discord.Client, port: int) -> None:
                     if client.task:
                         # Final step: run the task - add to requests dict to be stoppable
                         request["_id"] = inserted_id
-                        client.requests[inserted_id] = request
-                        client.channels[inserted_id] = channel
+                        client.add_request(request, channel)
 
                         logging.info(f"Running task for channel: {channel}, request: {request}")
                         await interaction.followup.send(f"✅ Recherche: {request}, association: {association} tourne désormais "
@@ -141,16 +136,16 @@ def define_commands(client: discord.Client, port: int) -> None:
                                   f"[{error_code}])")
                     await interaction.followup.send("⚠️ Il y a eu un souci avec l'insertion dans la base "
                                                     f"de données, veuillez réessayer. [{error_code}]", ephemeral=True)
-                    await client.logs_channel.send("⚠️ Il y a eu un souci avec l'insertion dans la base "
-                                                    f"de données, veuillez réessayer. [{error_code}]")
+                    client.sender.log(client.logs_channel, "⚠️ Il y a eu un souci avec l'insertion dans la base "
+                                                            f"de données, veuillez réessayer. [{error_code}]")
 
             else:
                 error_code = 1
                 logging.error(f"Could not insert request: {request} in DB (displayed error code [{error_code}])")
                 await interaction.followup.send("⚠️ Il y a eu un souci avec l'insertion dans la base "
                                                 f"de données, veuillez réessayer. [{error_code}]", ephemeral=True)
-                await client.logs_channel.send("⚠️ Il y a eu un souci avec l'insertion dans la base "
-                                                f"de données, veuillez réessayer. [{error_code}]")
+                client.sender.log(client.logs_channel, "⚠️ Il y a eu un souci avec l'insertion dans la base "
+                                                        f"de données, veuillez réessayer. [{error_code}]")
 
         except Exception as e:
             error_code = 3
@@ -158,8 +153,8 @@ def define_commands(client: discord.Client, port: int) -> None:
             logging.error(f"Displayed error code [{error_code}]")
             await interaction.followup.send("⚠️ Il y a eu un souci avec l'insertion dans la base "
                                             f"de données, veuillez réessayer. [{error_code}]", ephemeral=True)
-            await client.logs_channel.send("⚠️ Il y a eu un souci avec l'insertion dans la base "
-                                            f"de données, veuillez réessayer. [{error_code}]")
+            client.sender.log(client.logs_channel, "⚠️ Il y a eu un souci avec l'insertion dans la base "
+                                                    f"de données, veuillez réessayer. [{error_code}]")
 
 
     @client.tree.command(name="get_running_requests", description="Voir les recherches en cours")
@@ -178,10 +173,14 @@ def define_commands(client: discord.Client, port: int) -> None:
 
         msg = ""
 
-        for request, channel in zip(client.requests.values(), client.channels.values()):
-            channel_name = channel.name
+        for request_id, request in client.requests.items():
+            channel_name = client.channels[request_id].name
             msg += f"ℹ️ Nom de salon: {channel_name}, nom de recherche: {request['name']}\n"
 
+        for request, channel in client.paused.values():
+            channel_name = channel.name if channel else "?"
+            msg += f"⏸️ Nom de salon: {channel_name}, nom de recherche: {request['name']} (en pause)\n"
+
         if not msg:
             msg = "ℹ️ Aucune recherche active."
 
@@ -189,6 +188,83 @@ def define_commands(client: discord.Client, port: int) -> None:
 
         await interaction.followup.send(msg)
 
+    @client.tree.command(name="pause_request", description="Met une recherche en pause")
+    async def pause_request(interaction: discord.Interaction, name: str) -> None:
+        """
+        Pauses a running request (the other ones keep running)
+
+        Args:
+            interaction (discord.Interaction): interaction to use
+            name (str): request name
+
+        Returns: None
+        """
+        logging.info(f"Pausing request {name} - user: {interaction.user} (user_id: {interaction.user.id})")
+
+        request_id = client.find_request_id(name)
+
+        if request_id is not None and client.pause_request(request_id):
+            await interaction.response.send_message(f"⏸️ Recherche {name} en pause.", ephemeral=True)
+            client.sender.log(client.logs_channel, f"⏸️ Recherche {name} en pause.")
+
+        else:
+            await interaction.response.send_message(f"ℹ️ Aucune recherche active nommée {name}.", ephemeral=True)
+
+    @client.tree.command(name="resume_request", description="Relance une recherche en pause")
+    async def resume_request(interaction: discord.Interaction, name: str) -> None:
+        """
+        Resumes a paused request
+
+        Args:
+            interaction (discord.Interaction): interaction to use
+            name (str): request name
+
+        Returns: None
+        """
+        logging.info(f"Resuming request {name} - user: {interaction.user} (user_id: {interaction.user.id})")
+
+        request_id = client.find_request_id(name)
+
+        if request_id is not None and client.resume_request(request_id):
+            await interaction.response.send_message(f"▶️ Recherche {name} relancée.", ephemeral=True)
+            client.sender.log(client.logs_channel, f"▶️ Recherche {name} relancée.")
+
+        else:
+            await interaction.response.send_message(f"ℹ️ Aucune recherche en pause nommée {name}.", ephemeral=True)
+
+    @client.tree.command(name="stats", description="Délais entre la mise en ligne et le post / l'achat")
+    async def stats(interaction: discord.Interaction) -> None:
+        """
+        Rolling summary of the listing to post and listing to AutoBuy click delays, and of each pipeline stage
+
+        Args:
+            interaction (discord.Interaction): interaction to use
+
+        Returns: None
+        """
+        logging.info(f"Getting stats (user: {interaction.user}, user_id: {interaction.user.id})")
+
+        summary = client.traces.summary()
+        msg = f"📊 Statistiques des {TRACE_WINDOW // 60} dernières minutes\n"
+
+        for name, label in (("listing_to_post", "Mise en ligne → post"),
+                            ("listing_to_buy_click", "Mise en ligne → clic AutoBuy")):
+            if name in summary:
+                delays = summary[name]
+                msg += (f"⏱️ {label}: médiane {delays['p50']:.1f}s, p90 {delays['p90']:.1f}s, "
+                        f"p99 {delays['p99']:.1f}s, max {delays['max']:.1f}s ({delays['count']} vêtement(s))\n")
+
+            else:
+                msg += f"⏱️ {label}: aucune donnée\n"
+
+        stages = [f"{stage} {summary[stage]['p50']:.2f}s / {summary[stage]['p99']:.2f}s"
+                  for stage in STAGES if stage in summary]
+
+        if stages:
+            msg += f"🔎 Étapes (médiane / p99): {', '.join(stages)}"
+
+        await interaction.response.send_message(msg, ephemeral=True)
+
     @client.tree.command(name="hello", description="Check si bot vivant")
     async def hello(interaction: discord.Interaction) -> None:
         """
@@ -216,8 +292,21 @@ def define_commands(client: discord.Client, port: int) -> None:
         logging.info(f"Starting all requests - user: {interaction.user} (user_id: {interaction.user.id})")
         await interaction.response.defer()
 
-        if not client.task:
-            await client.setup_hook()
+        if client.startup_task is not None and not client.startup_task.done():
+            await interaction.followup.send("ℹ️ Le bot démarre, les recherches vont être lancées.")
+
+        elif not client.task:
+            try:
+                await client.launch_requests()
+
+            except Exception as e:
+                error_code = 21
+                logging.error(f"Could not start requests: {e!r}")
+                logging.error(f"Displayed error code [{error_code}]")
+                await interaction.followup.send(f"⚠️ Les recherches n'ont pas pu être récupérées, veuillez "
+                                                f"réessayer. [{error_code}]")
+                return
+
             await interaction.followup.send("✅ Toutes les recherches sont lancées.")
 
             logging.info("All requests started successfully")
@@ -272,12 +361,11 @@ def define_commands(client: discord.Client, port: int) -> None:
 
         try:
             # Attempt the request save
-            save_request = requests.post(f"{API_HOST}:{port}/{LOGIN_ROUTE}",
-                                         data=json.dumps(request))
+            save_request = await client.api.post(LOGIN_ROUTE, request)
 
             if save_request.status_code == 200:
                 await interaction.followup.send("✅ Login réussi !", ephemeral=True)
-                await client.logs_channel.send("✅ Login réussi !")
+                client.sender.log(client.logs_channel, "✅ Login réussi !")
                 logging.info("Successfully logged in using bearer")
 
             else:
@@ -287,8 +375,8 @@ def define_commands(client: discord.Client, port: int) -> None:
                 logging.error(f"Could not log in (displayed error code [{error_code}])")
                 await interaction.followup.send("⚠️ Il y a eu un souci avec le login, veuillez réessayer. "
                                                 f"[{error_code}]", ephemeral=True)
-                await client.logs_channel.send("⚠️ Il y a eu un souci avec le login, veuillez réessayer. "
-                                                f"[{error_code}]")
+                client.sender.log(client.logs_channel, "⚠️ Il y a eu un souci avec le login, veuillez réessayer. "
+                                                        f"[{error_code}]")
 
         except Exception as e:
             error_code = 9
@@ -296,8 +384,8 @@ def define_commands(client: discord.Client, port: int) -> None:
             logging.error(f"Displayed error code [{error_code}]")
             await interaction.followup.send("⚠️ Il y a eu un souci avec la connexion à Vinted, "
                                             f"veuillez réessayer. [{error_code}]", ephemeral=True)
-            await client.logs_channel.send("⚠️ Il y a eu un souci avec la connexion à Vinted, "
-                                            f"veuillez réessayer. [{error_code}]")
+            client.sender.log(client.logs_channel, "⚠️ Il y a eu un souci avec la connexion à Vinted, "
+                                                    f"veuillez réessayer. [{error_code}]")
 
     @client.tree.command(name="pickup", description="Choix des points relais")
     async def pickup(interaction: discord.Interaction) -> None:
@@ -334,14 +422,13 @@ def define_commands(client: discord.Client, port: int) -> None:
         logging.info("Getting closest pickup points")
 
         try:
-            get_pickup = requests.get(f"{API_HOST}:{port}/{PICKUP_GET_ROUTE}",
-                                      data=json.dumps(request))
+            get_pickup = await client.api.get(PICKUP_GET_ROUTE, request)
 
             if get_pickup.status_code == 200:
 
-                user_misc = json.loads(get_pickup.json()["data"])["user_misc"]
-                col = json.loads(get_pickup.json()["data"])["col"]
-                mon = json.loads(get_pickup.json()["data"])["mon"]
+                user_misc = get_pickup.data["user_misc"]
+                col = get_pickup.data["col"]
+                mon = get_pickup.data["mon"]
 
                 logging.info(f"Received col pickups: {col}")
                 logging.info(f"Received mon pickups: {mon}")
@@ -362,12 +449,11 @@ def define_commands(client: discord.Client, port: int) -> None:
                            "mon": mon_chosen,
                            "user_position": user_misc}
 
-                save_pickup = requests.post(f"{API_HOST}:{port}/{PICKUP_POST_ROUTE}",
-                                           data=json.dumps(request))
+                save_pickup = await client.api.post(PICKUP_POST_ROUTE, request)
 
                 if save_pickup.status_code == 200:
                     await interaction.followup.send("✅ Enregistrement des points relais réussi !", ephemeral=True)
-                    await client.logs_channel.send("✅ Enregistrement des points relais réussi !")
+                    client.sender.log(client.logs_channel, "✅ Enregistrement des points relais réussi !")
                     logging.info("Successfully saved pickup points")
 
                 else:
@@ -376,8 +462,8 @@ def define_commands(client: discord.Client, port: int) -> None:
                     logging.error(f"Displayed error code [{error_code}]")
                     await interaction.followup.send("⚠️ Il y a eu un souci avec les points relais, "
                                                     f"veuillez réessayer. [{error_code}]", ephemeral=True)
-                    await client.logs_channel.send("⚠️ Il y a eu un souci avec les points relais, "
-                                                   f"veuillez réessayer. [{error_code}]")
+                    client.sender.log(client.logs_channel, "⚠️ Il y a eu un souci avec les points relais, "
+                                                           f"veuillez réessayer. [{error_code}]")
 
             else:
                 code = get_pickup.status_code
@@ -386,8 +472,8 @@ def define_commands(client: discord.Client, port: int) -> None:
                 logging.error(f"Could not get pickup points (displayed error code [{error_code}])")
                 await interaction.followup.send("⚠️ Il y a eu un souci avec les points relais, veuillez réessayer. "
                                                 f"[{error_code}]", ephemeral=True)
-                await client.logs_channel.send("⚠️ Il y a eu un souci avec les points relais, veuillez réessayer. "
-                                               f"[{error_code}]")
+                client.sender.log(client.logs_channel, "⚠️ Il y a eu un souci avec les points relais, veuillez réessayer. "
+                                                       f"[{error_code}]")
 
         except Exception as e:
             error_code = 14
@@ -395,8 +481,8 @@ def define_commands(client: discord.Client, port: int) -> None:
             logging.error(f"Displayed error code [{error_code}]")
             await interaction.followup.send("⚠️ Il y a eu un souci avec les points relais, "
                                             f"veuillez réessayer. [{error_code}]", ephemeral=True)
-            await client.logs_channel.send("⚠️ Il y a eu un souci avec les points relais, "
-                                           f"veuillez réessayer. [{error_code}]")
+            client.sender.log(client.logs_channel, "⚠️ Il y a eu un souci avec les points relais, "
+                                                   f"veuillez réessayer. [{error_code}]")
 
 
 
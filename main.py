@@ -11,11 +11,14 @@ import discord
 import os
 import argparse
 import time
-import logging
 
 from dotenv import load_dotenv
 from bot import GuysVintedBot
+from utils.api_client import parse_endpoints
+from utils.log import setup_logging
 from commands import define_commands
+from utils.defines import MAX_WORKERS, CATCH_UP_WINDOW, SEEN_CACHE_FILE, ENRICH_CONCURRENCY, \
+    POSTED_STORE_FILE, LOG_MODULE_LEVELS, LOG_MAX_MB, LOG_BACKUPS, METRICS_PORT
 
 if __name__ == "__main__":
     # Get arguments
@@ -24,8 +27,8 @@ if __name__ == "__main__":
         "-p",
         "--port",
         action="store",
-        default=8000,
-        help="Specify API port",
+        default="8000",
+        help="Specify API port(s), comma separated - host:port or full URL also accepted (e.g. 8000,8001)",
         required=False
     )
     parser.add_argument(
@@ -37,20 +40,137 @@ if __name__ == "__main__":
         required=False
     )
 
+    parser.add_argument(
+        "-w",
+        "--workers",
+        action="store",
+        default=MAX_WORKERS,
+        help="Specify max number of matching jobs running concurrently",
+        required=False
+    )
+
+    parser.add_argument(
+        "-c",
+        "--catch-up",
+        action="store",
+        default=CATCH_UP_WINDOW,
+        help="Specify max age in seconds of clothes published while the bot was down to still be posted",
+        required=False
+    )
+    parser.add_argument(
+        "--cache-file",
+        action="store",
+        default=SEEN_CACHE_FILE,
+        help="Specify file where seen clothes ids are persisted",
+        required=False
+    )
+
+    parser.add_argument(
+        "--store-file",
+        action="store",
+        default=POSTED_STORE_FILE,
+        help="Specify SQLite file where posted clothes are kept for their buy buttons",
+        required=False
+    )
+
+    parser.add_argument(
+        "-e",
+        "--enrich-concurrency",
+        action="store",
+        default=ENRICH_CONCURRENCY,
+        help="Specify max number of matching clothes enriched (seller infos and images) concurrently",
+        required=False
+    )
+
+    parser.add_argument(
+        "-m",
+        "--metrics-port",
+        action="store",
+        default=METRICS_PORT,
+        help="Specify local port serving Prometheus metrics on /metrics (0: disabled)",
+        required=False
+    )
+
+    parser.add_argument(
+        "--record",
+        action="store",
+        default=None,
+        help="Specify directory where API calls are recorded for replay (not recorded if not given)",
+        required=False
+    )
+
+    parser.add_argument(
+        "--log-level",
+        action="store",
+        default="INFO",
+        help="Specify default log level",
+        required=False
+    )
+    parser.add_argument(
+        "--log-levels",
+        action="store",
+        default=LOG_MODULE_LEVELS,
+        help="Specify per module log levels, comma separated (e.g. enrichment=WARNING,discord=ERROR)",
+        required=False
+    )
+    parser.add_argument(
+        "--log-text",
+        action="store_true",
+        help="Write plain text log records instead of JSON ones",
+        required=False
+    )
+    parser.add_argument(
+        "--log-max-mb",
+        action="store",
+        default=LOG_MAX_MB,
+        help="Specify max log file size in MB before rotation (0: no rotation)",
+        required=False
+    )
+    parser.add_argument(
+        "--log-when",
+        action="store",
+        default=None,
+        help="Rotate log file on time instead of size (e.g. midnight, H)",
+        required=False
+    )
+    parser.add_argument(
+        "--log-backups",
+        action="store",
+        default=LOG_BACKUPS,
+        help="Specify number of rotated log files kept",
+        required=False
+    )
+
     args = parser.parse_args()
 
     # Set timezone to UTC
     os.environ["TZ"] = "UTC"
     time.tzset()
 
-    logging.basicConfig(
-        filename=args.log,
-        level=logging.INFO,
-        format="%(asctime)s -- %(filename)s -- %(funcName)s -- %(levelname)s -- %(message)s"
-    )
+    # Non-blocking logs: written by a background thread
+    log_listener = setup_logging(args.log,
+                                 level=args.log_level,
+                                 levels=args.log_levels,
+                                 json_format=not args.log_text,
+                                 max_bytes=int(float(args.log_max_mb) * 1024 * 1024),
+                                 when=args.log_when,
+                                 backups=int(args.log_backups))
 
     load_dotenv()
     TOKEN, GUILD_ID = os.getenv('DISCORD_TOKEN'), os.getenv('GUILD_ID')
-    client = GuysVintedBot(intents=discord.Intents.all(), guild_id=GUILD_ID, port=int(args.port))
-    define_commands(client, args.port)
-    client.run(TOKEN)
+    client = GuysVintedBot(intents=discord.Intents.all(), guild_id=GUILD_ID, endpoints=parse_endpoints(args.port),
+                           workers=int(args.workers),
+                           cache_file=args.cache_file,
+                           store_file=args.store_file,
+                           catch_up_window=int(args.catch_up),
+                           enrich_concurrency=int(args.enrich_concurrency),
+                           metrics_port=int(args.metrics_port),
+                           record_dir=args.record)
+    define_commands(client)
+
+    try:
+        # Discord logs go through our handlers
+        client.run(TOKEN, log_handler=None)
+
+    finally:
+        log_listener.stop()
@@ -0,0 +1,63 @@
+###############################################################################
+#
+# File:      replay.py
+# Author(s): Nico
+# Scope:     Serves a recording of API calls (main.py --record) as a stub vintedbot_api
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import asyncio
+import logging
+import argparse
+
+from utils.stub_api import serve_replay
+
+if __name__ == "__main__":
+    # Get arguments
+    parser = argparse.ArgumentParser(description="vintedbot_api replay stub (point the bot to it with -p)")
+    parser.add_argument(
+        "directory",
+        action="store",
+        help="Specify recording directory (see main.py --record)"
+    )
+    parser.add_argument(
+        "-p",
+        "--port",
+        action="store",
+        default=8000,
+        help="Specify port to listen on",
+        required=False
+    )
+    parser.add_argument(
+        "--host",
+        action="store",
+        default="127.0.0.1",
+        help="Specify interface to listen on",
+        required=False
+    )
+    parser.add_argument(
+        "-s",
+        "--speed",
+        action="store",
+        default=1.0,
+        help="Specify replay speed (1: original speed, 10: ten times faster)",
+        required=False
+    )
+    parser.add_argument(
+        "--latency",
+        action="store_true",
+        help="Answer after the recorded call durations (divided by speed)",
+        required=False
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s -- %(filename)s -- %(funcName)s -- %(levelname)s -- %(message)s")
+
+    try:
+        asyncio.run(serve_replay(args.directory, float(args.speed), args.latency, args.host, int(args.port)))
+
+    except KeyboardInterrupt:
+        pass
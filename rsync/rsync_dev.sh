@@ -12,7 +12,7 @@ branch=$(git rev-parse --abbrev-ref HEAD)
 
 if [[ "$branch" =~ (dev)$ ]]; then
     rsync -e "ssh" --exclude=".idea/" --exclude='.git/' --exclude="__pycache__/" \
-    --exclude="/venv" --exclude="*.csv" --exclude="*.log" --exclude=".gitignore" \
+    --exclude="/venv" --exclude="*.csv" --exclude="*.log" --exclude="seen_clothes.bin*" --exclude="posted_clothes.db*" --exclude=".gitignore" \
     -rav . guys@guysmachine:/home/guys/guysvintedbot/guysvintedbot_dev
 else
     echo "Branch is not dev. Skipping rsync command."
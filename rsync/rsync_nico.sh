@@ -12,7 +12,7 @@ branch=$(git rev-parse --abbrev-ref HEAD)
 
 if [[ ! "$branch" =~ ^(dev|main)$ ]]; then
     rsync -e "ssh" --exclude=".idea/" --exclude='.git/' --exclude="__pycache__/" \
-    --exclude="/venv" --exclude="*.csv" --exclude="*.log" --exclude=".gitignore" \
+    --exclude="/venv" --exclude="*.csv" --exclude="*.log" --exclude="seen_clothes.bin*" --exclude="posted_clothes.db*" --exclude=".gitignore" \
     -rav . guys@guysmachine:/home/guys/guysvintedbot/tests/nico
 else
     echo "Branch is dev or main. Skipping rsync command."
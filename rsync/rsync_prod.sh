@@ -12,7 +12,7 @@ branch=$(git rev-parse --abbrev-ref HEAD)
 
 if [[ "$branch" =~ (main)$ ]]; then
     rsync -e "ssh" --exclude=".idea/" --exclude='.git/' --exclude="__pycache__/" \
-    --exclude="/venv" --exclude="*.csv" --exclude="*.log" --exclude=".gitignore"\
+    --exclude="/venv" --exclude="*.csv" --exclude="*.log" --exclude="seen_clothes.bin*" --exclude="posted_clothes.db*" --exclude=".gitignore"\
     -rav . guys@guysmachine:/home/guys/guysvintedbot/guysvintedbot_prod
 else
     echo "Branch is not main. Skipping rsync command."
@@ -19,5 +19,5 @@ echo "Checking venv..."
 pip install -U pip
 pip install -r requirements.txt
 echo "DONE!"
-echo "Running main.py script - dev mode (API port 5000)"
-nohup python main.py -p 5000 -l guysvintedbot_dev.log &
+echo "Running main.py script - dev mode (API port 5000, metrics port 9109)"
+nohup python main.py -p 5000 -m 9109 -l guysvintedbot_dev.log &
@@ -19,5 +19,5 @@ echo "Checking venv..."
 pip install -U pip
 pip install -r requirements.txt
 echo "DONE!"
-echo "Running main.py script - hugo mode (API port 5001)"
-nohup python main.py -p 5001 -l guysvintedbot_hugo.log &
+echo "Running main.py script - hugo mode (API port 5001, metrics port 9110)"
+nohup python main.py -p 5001 -m 9110 -l guysvintedbot_hugo.log &
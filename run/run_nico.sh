@@ -19,5 +19,5 @@ echo "Checking venv..."
 pip install -U pip
 pip install -r requirements.txt
 echo "DONE!"
-echo "Running main.py script - nico mode (API port 5002)"
-nohup python main.py -p 5002 -l guysvintedbot_nico.log &
+echo "Running main.py script - nico mode (API port 5002, metrics port 9111)"
+nohup python main.py -p 5002 -m 9111 -l guysvintedbot_nico.log &
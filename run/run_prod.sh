@@ -19,5 +19,5 @@ echo "Checking venv..."
 pip install -U pip
 pip install -r requirements.txt
 echo "DONE!"
-echo "Running main.py script - prod mode (API port 8000)"
-nohup python main.py -p 8000 -l guysvintedbot_prod.log &
+echo "Running main.py script - prod mode (API port 8000, metrics port 9108)"
+nohup python main.py -p 8000 -m 9108 -l guysvintedbot_prod.log &
@@ -0,0 +1,442 @@
+###############################################################################
+#
+# File:      api_client.py
+# Author(s): Nico
+# Scope:     Shared asynchronous client for all vintedbot_api calls
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import json
+import time
+import asyncio
+import logging
+import aiohttp
+
+from typing import Any, Optional
+from utils.retry import CircuitBreaker, backoff_delay
+from utils.recorder import ApiRecorder
+from utils.defines import API_HOST, API_POOL_SIZE, API_KEEPALIVE_TIMEOUT, API_DEFAULT_TIMEOUT, ROUTE_TIMEOUTS, \
+    API_ENDPOINT_MAX_FAILURES, API_ENDPOINT_COOLDOWN, API_HEALTH_INTERVAL, API_HEALTH_TIMEOUT, API_RETRIES, \
+    RECORDED_ROUTES
+
+
+class ApiResponse:
+    """
+    Decoded vintedbot_api response. Mimics the bits of requests.Response we used to rely on.
+    """
+    def __init__(self, status_code: int, text: str) -> None:
+        """
+        Args:
+            status_code: int, HTTP status code
+            text: str, raw response body
+        """
+        self.status_code = status_code
+        self.text = text
+        self._json = None
+        self._data = None
+
+    def json(self) -> dict:
+        """
+        Returns: dict, decoded response body (decoded once, then cached)
+        """
+        if self._json is None:
+            self._json = json.loads(self.text)
+
+        return self._json
+
+    @property
+    def data(self) -> Any:
+        """
+        The API wraps its payload in a "data" field, most of the time as a JSON string
+
+        Returns: Any, decoded "data" field (decoded once, then cached)
+        """
+        if self._data is None:
+            data = self.json()["data"]
+            self._data = json.loads(data) if isinstance(data, str) else data
+
+        return self._data
+
+    @property
+    def message(self) -> str:
+        """
+        Returns: str, API message (used for error reporting)
+        """
+        try:
+            return self.json().get("message", self.text)
+
+        except ValueError:
+            return self.text
+
+
+class ApiEndpoint:
+    """
+    One vintedbot_api instance, with its health and latency
+    """
+    def __init__(self, base_url: str) -> None:
+        """
+        Args:
+            base_url: str, API base URL (e.g. http://127.0.0.1:8000)
+        """
+        self.base_url = base_url
+        self.in_flight = 0
+        # Exponential moving average of calls duration in seconds
+        self.latency = 0.0
+        self.consecutive_failures = 0
+        # Not used before this timestamp (unless every endpoint is down)
+        self.down_until = 0.0
+        # Metrics
+        self.requests = 0
+        self.failures = 0
+
+    def is_up(self, now: float) -> bool:
+        """
+        Args:
+            now: float, current timestamp
+
+        Returns: bool, whether the endpoint can be used
+        """
+        return self.down_until <= now
+
+    def score(self) -> float:
+        """
+        Returns: float, expected wait of a new call (the lower, the better - unmeasured endpoints are tried first)
+        """
+        return self.latency * (self.in_flight + 1)
+
+    def record_success(self, duration: float) -> None:
+        """
+        Args:
+            duration: float, call duration in seconds
+
+        Returns: None
+        """
+        self.latency = duration if not self.latency else 0.8 * self.latency + 0.2 * duration
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+
+    def record_failure(self, now: float) -> None:
+        """
+        Marks the endpoint down for a while after too many failures in a row
+
+        Args:
+            now: float, current timestamp
+
+        Returns: None
+        """
+        self.failures += 1
+        self.consecutive_failures += 1
+
+        if self.consecutive_failures >= API_ENDPOINT_MAX_FAILURES:
+            self.down_until = now + API_ENDPOINT_COOLDOWN
+            logging.warning(f"API endpoint {self.base_url} marked down for {API_ENDPOINT_COOLDOWN} seconds "
+                            f"({self.consecutive_failures} failures in a row)")
+
+    def stats(self, now: float) -> dict:
+        """
+        Returns: dict, endpoint metrics
+        """
+        return {"up": self.is_up(now),
+                "latency": round(self.latency, 3),
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "failures": self.failures}
+
+
+def parse_endpoints(spec: str) -> list[str]:
+    """
+    Parses API endpoints given in the command line, comma separated: port, host:port or full URL
+    (e.g. "8000,8001,10.0.0.2:8000")
+
+    Args:
+        spec: str, endpoints
+
+    Returns: list[str], API base URLs
+    """
+    endpoints = []
+
+    for endpoint in str(spec).split(","):
+        endpoint = endpoint.strip().rstrip("/")
+
+        if not endpoint:
+            continue
+
+        if endpoint.isdigit():
+            endpoint = f"{API_HOST}:{endpoint}"
+
+        elif "://" not in endpoint:
+            endpoint = f"http://{endpoint}"
+
+        endpoints.append(endpoint)
+
+    return endpoints
+
+
+class ApiClient:
+    """
+    Single pooled keep-alive HTTP session shared by the bot, the buttons and the commands.
+    Calls are spread over one or several API instances (least expected latency first). An instance failing too many
+    times in a row is left aside for a while, calls fail over to the other ones. Health checks bring it back.
+    """
+    def __init__(self, endpoints: list[str], recorder: Optional[ApiRecorder] = None) -> None:
+        """
+        Args:
+            endpoints: list[str], API base URLs (see parse_endpoints)
+            recorder: Optional[ApiRecorder], where RECORDED_ROUTES calls are recorded for replay (None: not recorded)
+        """
+        self.endpoints = [ApiEndpoint(base_url) for base_url in endpoints]
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.health_task: Optional[asyncio.Task] = None
+        # Round-robin between equally good endpoints
+        self.turn = 0
+        # route -> CircuitBreaker
+        self.breakers = {}
+        self.retries = 0
+        self.recorder = recorder
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """
+        Lazily creates the session - it has to be created inside the running event loop
+
+        Returns: aiohttp.ClientSession
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=API_POOL_SIZE, keepalive_timeout=API_KEEPALIVE_TIMEOUT)
+            self.session = aiohttp.ClientSession(connector=connector,
+                                                 headers={"Content-Type": "application/json"})
+            logging.info(f"Opened API session on {[endpoint.base_url for endpoint in self.endpoints]} "
+                         f"(pool size: {API_POOL_SIZE})")
+
+        return self.session
+
+    def start_health_checks(self) -> None:
+        """
+        Starts checking endpoints health in background - has to be called inside the running event loop
+
+        Returns: None
+        """
+        if self.health_task is None or self.health_task.done():
+            self.health_task = asyncio.create_task(self.check_health_forever())
+
+    async def close(self) -> None:
+        """
+        Stops health checks and closes the underlying session
+
+        Returns: None
+        """
+        if self.health_task is not None:
+            self.health_task.cancel()
+            self.health_task = None
+
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+            logging.info("Closed API session")
+
+        self.session = None
+
+    def pick(self, excluded: list) -> Optional[ApiEndpoint]:
+        """
+        Picks the endpoint with the lowest expected latency among the up ones (round-robin on ties).
+        If every endpoint is down, picks the one coming back first.
+
+        Args:
+            excluded: list, endpoints already tried for this call
+
+        Returns: Optional[ApiEndpoint], None if every endpoint was tried
+        """
+        candidates = [endpoint for endpoint in self.endpoints if endpoint not in excluded]
+
+        if not candidates:
+            return None
+
+        now = time.time()
+        up = [endpoint for endpoint in candidates if endpoint.is_up(now)]
+
+        if not up:
+            return min(candidates, key=lambda endpoint: endpoint.down_until)
+
+        self.turn += 1
+        best = min(endpoint.score() for endpoint in up)
+        best_endpoints = [endpoint for endpoint in up if endpoint.score() <= best]
+
+        return best_endpoints[self.turn % len(best_endpoints)]
+
+    async def request(self, method: str, route: str, payload: Optional[dict] = None) -> ApiResponse:
+        """
+        Sends a request to the API. Payload is sent as a JSON body, even for GET requests (API convention).
+        Network errors are retried with jittered backoff (any of them for GET requests, only connection errors for
+        POST requests since they may have been processed). Each route has its circuit breaker: after too many
+        failures in a row (network errors or 5xx responses), calls fail right away with CircuitOpenError for a while.
+
+        Args:
+            method: str, HTTP method
+            route: str, API route (see defines)
+            payload: Optional[dict], body to send
+
+        Returns: ApiResponse
+        """
+        breaker = self.breakers.get(route)
+
+        if breaker is None:
+            breaker = self.breakers[route] = CircuitBreaker(route)
+
+        trial = breaker.check()
+
+        timeout = aiohttp.ClientTimeout(total=ROUTE_TIMEOUTS.get(route, API_DEFAULT_TIMEOUT))
+        data = json.dumps(payload) if payload is not None else None
+
+        try:
+            for attempt in range(API_RETRIES + 1):
+                start = time.time()
+
+                try:
+                    response = await self.send(method, route, data, timeout)
+
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    retry = method == "GET" or isinstance(e, aiohttp.ClientConnectorError)
+
+                    if not retry or attempt == API_RETRIES:
+                        breaker.record_failure()
+                        raise
+
+                    delay = backoff_delay(attempt)
+                    self.retries += 1
+                    logging.warning(f"API call {method} {route} failed ({e!r}), retry #{attempt + 1} in "
+                                    f"{delay:.2f} seconds")
+                    await asyncio.sleep(delay)
+                    continue
+
+                # API up but failing (e.g. Vinted unreachable from it): counts as a failure too
+                if response.status_code >= 500:
+                    breaker.record_failure()
+
+                else:
+                    breaker.record_success()
+
+                # Allow-listed reads only (poll pages, seller infos, images, requests, stock)
+                if self.recorder is not None and route in RECORDED_ROUTES:
+                    self.recorder.record(method, route, payload, response.status_code, response.text, start,
+                                         time.time() - start)
+
+                return response
+
+        finally:
+            # Cancelled or unexpected error: the trial slot is freed anyway
+            if trial:
+                breaker.release()
+
+    async def send(self, method: str, route: str, data: Optional[str],
+                   timeout: aiohttp.ClientTimeout) -> ApiResponse:
+        """
+        Sends a request to the best endpoint. Fails over to another endpoint if the connection fails (or on any
+        network error for GET requests).
+
+        Args:
+            method: str, HTTP method
+            route: str, API route (see defines)
+            data: Optional[str], JSON body to send
+            timeout: aiohttp.ClientTimeout, call timeout
+
+        Returns: ApiResponse
+        """
+        tried = []
+
+        while True:
+            endpoint = self.pick(tried)
+            tried.append(endpoint)
+            endpoint.requests += 1
+            endpoint.in_flight += 1
+            start = time.time()
+
+            try:
+                async with self.get_session().request(method, f"{endpoint.base_url}/{route}", data=data,
+                                                      timeout=timeout) as response:
+                    api_response = ApiResponse(response.status, await response.text())
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                endpoint.record_failure(time.time())
+                retry = method == "GET" or isinstance(e, aiohttp.ClientConnectorError)
+
+                if not retry or len(tried) == len(self.endpoints):
+                    raise
+
+                logging.warning(f"API call {method} {route} failed on {endpoint.base_url} ({e!r}), failing over")
+                continue
+
+            finally:
+                endpoint.in_flight -= 1
+
+            endpoint.record_success(time.time() - start)
+
+            return api_response
+
+    async def check_health(self) -> None:
+        """
+        Probes every endpoint: any HTTP answer means the instance is alive
+
+        Returns: None
+        """
+        timeout = aiohttp.ClientTimeout(total=API_HEALTH_TIMEOUT)
+
+        for endpoint in self.endpoints:
+            start = time.time()
+
+            try:
+                async with self.get_session().get(f"{endpoint.base_url}/", timeout=timeout):
+                    pass
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if endpoint.is_up(start):
+                    logging.warning(f"API endpoint {endpoint.base_url} health check failed: {e!r}")
+
+                endpoint.consecutive_failures = max(endpoint.consecutive_failures, API_ENDPOINT_MAX_FAILURES - 1)
+                endpoint.record_failure(time.time())
+                continue
+
+            if not endpoint.is_up(start):
+                logging.info(f"API endpoint {endpoint.base_url} is back up")
+
+            endpoint.consecutive_failures = 0
+            endpoint.down_until = 0.0
+
+    async def check_health_forever(self) -> None:
+        """
+        Health checks loop
+
+        Returns: None
+        """
+        while True:
+            await asyncio.sleep(API_HEALTH_INTERVAL)
+            await self.check_health()
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, endpoints metrics (by base URL), retries, circuit breakers not closed (by route)
+        """
+        now = time.time()
+
+        return {"endpoints": {endpoint.base_url: endpoint.stats(now) for endpoint in self.endpoints},
+                "retries": self.retries,
+                "breakers": {route: breaker.stats() for route, breaker in self.breakers.items()
+                             if breaker.state != "closed" or breaker.opened}}
+
+    async def get(self, route: str, payload: Optional[dict] = None) -> ApiResponse:
+        """
+        Args:
+            route: str, API route
+            payload: Optional[dict], body to send
+
+        Returns: ApiResponse
+        """
+        return await self.request("GET", route, payload)
+
+    async def post(self, route: str, payload: Optional[dict] = None) -> ApiResponse:
+        """
+        Args:
+            route: str, API route
+            payload: Optional[dict], body to send
+
+        Returns: ApiResponse
+        """
+        return await self.request("POST", route, payload)
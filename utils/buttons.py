@@ -7,184 +7,341 @@
 # Created:   07 February 2024
 #
 ###############################################################################
+import time
+import asyncio
 import logging
 import discord
-import requests
-import json
 
-from utils.defines import API_HOST, ADD_CLOTHE_IN_STOCK_ROUTE, GET_CLOTHES_FROM_STOCK_ROUTE, SELL_CLOTHES_ROUTE, \
+from utils.api_client import ApiClient
+from utils.store import PostedStore
+from utils.stock import StockIndex
+from utils.sender import MessageScheduler, PRIORITY_STOCK
+from utils.latency import LatencyStats
+from utils.metrics import MetricsRegistry
+from utils.tracing import TraceRecorder
+from utils.defines import ADD_CLOTHE_IN_STOCK_ROUTE, SELL_CLOTHES_ROUTE, \
     DELETE_CLOTHES_ROUTE, AUTOBUY_ROUTE
 from utils.utils import notify_something_went_wrong
 from utils.stock_views import SellClotheView, DeleteClotheView
-from typing import Union
+from typing import Callable, Optional, Union
 
 
 class BuyButtons(discord.ui.View):
     """
-    Represents buttons to show details, buy clothes or not pertinent
+    Represents buttons to show details, buy clothes or not pertinent.
+    Layout only: clicks are routed from the buttons custom_id to BuyHandler, so the view is not kept after being sent
+    and buttons keep working after a restart.
     """
     def __init__(self,
                  request_id: str,
                  clothe: dict,
-                 embeds: list[discord.Embed],
-                 ratio: int,
-                 logs_channel: discord.TextChannel,
-                 stock_channel: discord.TextChannel,
-                 port: int) -> None:
+                 ratio: int) -> None:
         """
-        Inits the 'Détails' buttons in a view and parses attributes to enable 'AutoBuy' to work
+        Inits the 'Détails', 'AutoBuy' and 'Non pertinent' buttons in a view
         Args:
             request_id: str, request id in our DB used to find this clothe
-            clothe: dict, clothe dict
-            embeds: list[discord.Embed], list of embeds to post in the stock channel (when autobuy button is pressed)
+            clothe: dict, clothe dict (has to be in the PostedStore for 'AutoBuy' to work)
             ratio: int, fuzz ratio
-            logs_channel: discord.TextChannel, channel to post in if "Non pertinent" is pressed
-            stock_channel: discord.TextChannel, channel to post in when autobuy button is pressed
-            port: int, API port to use
         """
         super().__init__(timeout=None)
-        self.request_id = request_id
-        self.clothe = clothe
-        self.embeds = embeds
-        self.ratio = ratio
-        self.logs_channel = logs_channel
-        self.stock_channel = stock_channel
-        self.port = port
         # Add "Détails" button
-        self.add_item(discord.ui.Button(label="Détails", url=self.clothe["url"]))
+        self.add_item(discord.ui.Button(label="Détails", url=clothe["url"]))
+        self.add_item(discord.ui.Button(label="✅ AutoBuy",
+                                        style=discord.ButtonStyle.blurple,
+                                        custom_id=f"{request_id}:{clothe['id']}:{ratio}:autobuy"))
+        self.add_item(discord.ui.Button(label="Non pertinent",
+                                        style=discord.ButtonStyle.red,
+                                        custom_id=f"{request_id}:{clothe['id']}:{ratio}:not_pertinent"))
 
-    @discord.ui.button(label="✅ AutoBuy", style=discord.ButtonStyle.blurple)
-    async def autobuy(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        # Nothing to dispatch to this view (see BuyHandler), do not let discord.py store it
+        self.stop()
+
+
+class BuyHandler:
+    """
+    Handles 'AutoBuy' and 'Non pertinent' clicks of every clothe post, from their custom_id
+    ("{request_id}:{clothe_id}:{ratio}:autobuy" or "...:not_pertinent"). Clothes details are read from the PostedStore.
+    """
+    # custom_id pattern (see ComponentRouter)
+    PATTERN = r"(?P<request_id>[^:]+):(?P<clothe_id>\d+):(?P<ratio>\d+):(?P<action>autobuy|not_pertinent)"
+
+    def __init__(self,
+                 store: PostedStore,
+                 stock: StockIndex,
+                 channels: Callable[[str], Optional[discord.TextChannel]],
+                 api: ApiClient,
+                 sender: MessageScheduler,
+                 latencies: LatencyStats,
+                 metrics: MetricsRegistry,
+                 traces: TraceRecorder) -> None:
+        """
+        Args:
+            store: PostedStore, posted clothes and their embeds
+            stock: StockIndex, ids of clothes in stock
+            channels: Callable[[str], Optional[discord.TextChannel]], bot channel by attribute name, read on each
+                      click ("logs_channel": posted in if "Non pertinent" is pressed, "stock_channel": posted in when
+                      autobuy button is pressed)
+            api: ApiClient, shared API client
+            sender: MessageScheduler, bot messages scheduler
+            latencies: LatencyStats, where to record autobuy latencies
+            metrics: MetricsRegistry, where to export autobuy metrics
+            traces: TraceRecorder, where to record listing to click delays
+        """
+        self.store = store
+        self.stock = stock
+        self.channels = channels
+        self.api = api
+        self.sender = sender
+        self.latencies = latencies
+        self.traces = traces
+        self.autobuy_total = metrics.counter("autobuy_total", "AutoBuy clicks by outcome", ("outcome",))
+        self.stock_registrations_total = metrics.counter("stock_registrations_total",
+                                                         "Bought clothes registrations in stock by outcome",
+                                                         ("outcome",))
+        self.not_pertinent_total = metrics.counter("not_pertinent_total", "Non pertinent clicks")
+        self.purchase_seconds = metrics.histogram("autobuy_purchase_seconds", "AutoBuy purchase API call duration")
+        self.click_to_purchase_seconds = metrics.histogram("autobuy_click_to_purchase_seconds",
+                                                           "Time from AutoBuy click to purchase response")
+        # Clothes ids being bought (one purchase at a time per clothe, whatever the post clicked)
+        self.buying = set()
+        # Running stock registrations (keeps a reference to the tasks)
+        self.background = set()
+
+    @property
+    def logs_channel(self) -> Optional[discord.TextChannel]:
+        """
+        Returns: Optional[discord.TextChannel], logs channel (None until the bot is ready)
+        """
+        return self.channels("logs_channel")
+
+    @property
+    def stock_channel(self) -> Optional[discord.TextChannel]:
+        """
+        Returns: Optional[discord.TextChannel], stock channel (None until the bot is ready)
+        """
+        return self.channels("stock_channel")
+
+    async def handle(self, interaction: discord.Interaction, request_id: str, clothe_id: str, ratio: str,
+                     action: str) -> None:
+        """
+        Args:
+            interaction: discord.Interaction
+            request_id: str, request id in our DB used to find this clothe
+            clothe_id: str, Vinted clothe id
+            ratio: str, fuzz ratio
+            action: str, "autobuy" or "not_pertinent"
+
+        Returns: None
+        """
+        if action == "autobuy":
+            await self.autobuy(interaction, request_id, clothe_id, int(ratio))
+
+        else:
+            await self.not_pertinent(interaction, int(ratio))
+
+    async def autobuy(self, interaction: discord.Interaction, request_id: str, clothe_id: str, ratio: int) -> None:
         """
         'AutoBuy' button
-        Performs autobuy action
+        Performs autobuy action: the purchase is sent right away (the click is acknowledged meanwhile), stock
+        registration and notifications run in background afterwards
         Args:
             interaction: discord.Interaction
-            button: button: discord.ui.Button
+            request_id: str, request id in our DB used to find this clothe
+            clothe_id: str, Vinted clothe id
+            ratio: int, fuzz ratio
 
         Returns: None
 
         """
-        try:
-            await interaction.response.defer()
+        posted = self.store.load(clothe_id)
 
-            # Check if clothe in stock already
-            clothes_in_stock = requests.get(f"{API_HOST}:{self.port}/{GET_CLOTHES_FROM_STOCK_ROUTE}",
-                                            data=json.dumps({"which": "in_stock"}))
+        # Case clothe posted too long ago (pruned from store)
+        if posted is None:
+            self.autobuy_total.inc("expired")
+            logging.warning(f"Clothe not found in posted clothes store (id: {clothe_id})")
+            await interaction.response.send_message(f"ℹ️ Vêtement trop ancien, achat impossible depuis ce message "
+                                                    f"(id: {clothe_id})", ephemeral=True)
+            return
 
-            if clothes_in_stock.status_code == 200:
-                stock_clothes = json.loads(clothes_in_stock.json()["data"])["found_clothes"]
-                clothes_ids = [clothe["clothe_id"] for clothe in stock_clothes]
+        clothe, embeds = posted
+        self.traces.buy_click(clothe, interaction.created_at.timestamp())
 
-                # Case clothe already in stock
-                if str(self.clothe["id"]) in clothes_ids:
-                    logging.warning(f"Clothe already in stock (id: {self.clothe['id']})")
+        # Check if clothe in stock already, or being bought from another post (local, no API call)
+        if clothe["id"] in self.stock or clothe_id in self.buying:
+            self.autobuy_total.inc("duplicate")
+            logging.warning(f"Clothe already in stock or being bought (id: {clothe['id']})")
 
-                    await interaction.followup.send(f"ℹ️ Vêtement déjà en stock: (nom: {self.clothe['title']}, "
-                                                    f"url: {self.clothe['url']})", ephemeral=True)
+            await interaction.response.send_message(f"ℹ️ Vêtement déjà en stock: (nom: {clothe['title']}, "
+                                                    f"url: {clothe['url']})", ephemeral=True)
 
-                    return
+            return
 
-            else:
-                # Case API error
-                error_code = 18
-                logging.error(f"Error getting clothes from stock, full response: {clothes_in_stock.text}")
-                logging.error(f"Displayed error code [{error_code}]")
+        self.buying.add(clothe_id)
 
-                await interaction.followup.send(f"⚠️ Vêtement non acheté (id: {self.clothe['id']}, "
-                                                f"nom: {self.clothe['title']}) car erreur du programme [{error_code}]",
-                                                ephemeral=True)
-                await self.logs_channel.send(f"⚠️ Vêtement non acheté (id: {self.clothe['id']}, "
-                                                f"nom: {self.clothe['title']}) car erreur du programme [{error_code}]")
-                return
+        try:
+            logging.info(f"Processing autobuy for clothe {clothe['id']}", extra={"clothe_id": clothe["id"]})
+
+            request = {"item_id": clothe["id"],
+                       "seller_id": clothe["seller_id"],
+                       "item_url": clothe["url"]}
 
-            logging.info(f"Processing autobuy for clothe: {self.clothe}")
+            # Purchase first, the click is acknowledged in the meantime
+            start = time.time()
+            purchase = asyncio.ensure_future(self.api.post(AUTOBUY_ROUTE, request))
 
-            request = {"item_id": self.clothe["id"],
-                       "seller_id": self.clothe["seller_id"],
-                       "item_url": self.clothe["url"]}
+            try:
+                await interaction.response.defer()
+
+            except Exception as e:
+                logging.warning(f"Could not acknowledge autobuy click (id: {clothe['id']}), purchase goes on: {e!r}")
 
-            autobuy = requests.post(f"{API_HOST}:{self.port}/{AUTOBUY_ROUTE}", data=json.dumps(request))
+            autobuy = await purchase
+            self.record_attempt(interaction, clothe_id, start, autobuy.status_code)
 
             if autobuy.status_code != 200:
                 # Case item already bought
                 if autobuy.status_code == 501:
+                    self.autobuy_total.inc("already_sold")
                     logging.warning(f"Clothe already sold:")
-                    await interaction.followup.send(f"ℹ️ Vêtement déjà vendu: (id: {self.clothe['id']}, "
-                                                 f"nom: {self.clothe['title']}, url: {self.clothe['url']})",
+                    await interaction.followup.send(f"ℹ️ Vêtement déjà vendu: (id: {clothe['id']}, "
+                                                 f"nom: {clothe['title']}, url: {clothe['url']})",
                                                     ephemeral=True)
                     return
 
                 # Case error
                 else:
+                    self.autobuy_total.inc("failed")
                     error_code = 19
-                    logging.error(f"Could not autobuy clothe: {self.clothe}. Full response: {autobuy.text}")
+                    logging.error(f"Could not autobuy clothe {clothe['id']}. Full response: {autobuy.text}",
+                                  extra={"clothe_id": clothe["id"]})
                     logging.error(f"Displayed error code [{error_code}]")
 
-                    await interaction.followup.send(f"⚠️ Vêtement non acheté (id: {self.clothe['id']}, "
-                                                    f"nom: {self.clothe['title']}) car erreur du programme: "
-                                                    f"{autobuy.json()['message']} [{error_code}]",
+                    await interaction.followup.send(f"⚠️ Vêtement non acheté (id: {clothe['id']}, "
+                                                    f"nom: {clothe['title']}) car erreur du programme: "
+                                                    f"{autobuy.message} [{error_code}]",
                                                     ephemeral=True)
-                    await self.logs_channel.send(f"⚠️ Vêtement non acheté (id: {self.clothe['id']}, "
-                                                 f"nom: {self.clothe['title']}) car erreur du programme: "
-                                                 f"{autobuy.json()['message']} [{error_code}]")
+                    self.sender.log(self.logs_channel, f"⚠️ Vêtement non acheté (id: {clothe['id']}, "
+                                                       f"nom: {clothe['title']}) car erreur du programme: "
+                                                       f"{autobuy.message} [{error_code}]")
                     return
 
-            logging.info(f"Autobuy OK, inserting clothe in DB (id: {self.clothe['id']})")
+            self.autobuy_total.inc("bought")
+            logging.info(f"Autobuy OK, inserting clothe in DB (id: {clothe['id']})")
+
+            # Bought - in stock from now on, even if the DB insertion fails
+            self.stock.add(clothe["id"])
+
+            # Stock registration and notifications in background
+            task = asyncio.create_task(self.register_in_stock(interaction, request_id, clothe, embeds, ratio))
+            self.background.add(task)
+            task.add_done_callback(self.background.discard)
+
+        except Exception as e:
+            self.autobuy_total.inc("error")
+            error_code = 4
+            logging.error(f"There was an exception while buying clothe {clothe['id']}: {e}",
+                          extra={"clothe_id": clothe["id"]})
+            logging.error(f"Displayed error code [{error_code}]")
+            await interaction.followup.send(f"⚠️ Il y a eu un souci avec l'achat du vêtement (id: {clothe['id']}, "
+                                                 f"nom: {clothe['title']}, url: {clothe['url']}), veuillez "
+                                            f"réessayer. [{error_code}]", ephemeral=True)
+            self.sender.log(self.logs_channel, f"⚠️ Il y a eu un souci avec l'achat du vêtement (id: {clothe['id']}, "
+                                               f"nom: {clothe['title']}, url: {clothe['url']}), veuillez "
+                                               f"réessayer. [{error_code}]")
+
+        finally:
+            self.buying.discard(clothe_id)
+
+    def record_attempt(self, interaction: discord.Interaction, clothe_id: str, start: float, status_code: int) -> None:
+        """
+        Records an autobuy attempt latencies: purchase API call and click to purchase response
+
+        Args:
+            interaction: discord.Interaction, click
+            clothe_id: str, Vinted clothe id
+            start: float, purchase call timestamp
+            status_code: int, purchase API status code
+
+        Returns: None
+        """
+        purchase = time.time() - start
+        click_to_purchase = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+
+        self.latencies.record("autobuy_purchase", purchase)
+        self.latencies.record("autobuy_click_to_purchase", click_to_purchase)
+        self.purchase_seconds.observe(purchase)
+        self.click_to_purchase_seconds.observe(click_to_purchase)
+
+        logging.info(f"Autobuy attempt (id: {clothe_id}, status_code: {status_code}): purchase call {purchase:.3f}s, "
+                     f"click to purchase {click_to_purchase:.3f}s")
+
+    async def register_in_stock(self, interaction: discord.Interaction, request_id: str, clothe: dict,
+                                embeds: list[discord.Embed], ratio: int) -> None:
+        """
+        After a purchase: registers the clothe in stock through the API and notifies
+
+        Args:
+            interaction: discord.Interaction, click
+            request_id: str, request id in our DB used to find this clothe
+            clothe: dict, bought clothe
+            embeds: list[discord.Embed], embeds to post in the stock channel
+            ratio: int, fuzz ratio
 
+        Returns: None
+        """
+        try:
             # Case purchase OK
             # Add missing keys
-            self.clothe["request_id"] = self.request_id
-            self.clothe["clothe_id"] = self.clothe["id"]
-            self.clothe["ratio"] = self.ratio
+            clothe["request_id"] = request_id
+            clothe["clothe_id"] = clothe["id"]
+            clothe["ratio"] = ratio
 
             # Register clothe in stock through the API
-            add_in_stock = requests.post(f"{API_HOST}:{self.port}/{ADD_CLOTHE_IN_STOCK_ROUTE}",
-                                         data=json.dumps(self.clothe))
+            add_in_stock = await self.api.post(ADD_CLOTHE_IN_STOCK_ROUTE, clothe)
 
             # Status OK - post in channels
             if add_in_stock.status_code == 200:
-                logging.info(f"Successfully added clothe to stock (id: {self.clothe['id']})")
+                self.stock_registrations_total.inc("ok")
+                logging.info(f"Successfully added clothe to stock (id: {clothe['id']})")
 
-                await interaction.followup.send(f"✅ Achat bien effectué: {self.clothe['title']}", ephemeral=True)
-                await self.logs_channel.send(f"✅ Vêtement mis en stock: (id: {self.clothe['id']}, "
-                                             f"nom: {self.clothe['title']}, url: {self.clothe['url']})")
-                await self.stock_channel.send(embeds=self.embeds,
-                                              view=StockButtons(clothe_id=self.clothe["id"],
-                                                                port=self.port,
-                                                                logs_channel=self.logs_channel))
+                await interaction.followup.send(f"✅ Achat bien effectué: {clothe['title']}", ephemeral=True)
+                self.sender.log(self.logs_channel, f"✅ Vêtement mis en stock: (id: {clothe['id']}, "
+                                                   f"nom: {clothe['title']}, url: {clothe['url']})")
+                await self.sender.send(self.stock_channel,
+                                       PRIORITY_STOCK,
+                                       embeds=embeds,
+                                       view=StockButtons(clothe_id=clothe["id"]))
 
             # Status not OK - issue with the API, post in logs channel
             else:
+                self.stock_registrations_total.inc("failed")
                 error_code = 20
-                logging.error(f"Could not add clothe to DB: {self.clothe}. Full response: {add_in_stock.text}")
+                logging.error(f"Could not add clothe {clothe['id']} to DB. Full response: {add_in_stock.text}",
+                              extra={"clothe_id": clothe["id"]})
                 logging.error(f"Displayed error code [{error_code}]")
 
-                await interaction.followup.send(f"⚠️ Vêtement bien acheté (id: {self.clothe['id']}, "
-                                             f"nom: {self.clothe['title']}) mais non mis en stock [{error_code}]",
+                await interaction.followup.send(f"⚠️ Vêtement bien acheté (id: {clothe['id']}, "
+                                             f"nom: {clothe['title']}) mais non mis en stock [{error_code}]",
                                                 ephemeral=True)
-                await self.logs_channel.send(f"⚠️ Vêtement bien acheté (id: {self.clothe['id']}, "
-                                             f"nom: {self.clothe['title']}) mais non mis en stock [{error_code}]")
+                self.sender.log(self.logs_channel, f"⚠️ Vêtement bien acheté (id: {clothe['id']}, "
+                                                   f"nom: {clothe['title']}) mais non mis en stock [{error_code}]")
 
         except Exception as e:
-            error_code = 4
-            logging.error(f"There was an exception while buying clothe {self.clothe}: {e}")
+            self.stock_registrations_total.inc("error")
+            error_code = 20
+            logging.error(f"There was an exception while adding clothe {clothe['id']} to DB: {e}",
+                          extra={"clothe_id": clothe["id"]})
             logging.error(f"Displayed error code [{error_code}]")
-            await interaction.followup.send(f"⚠️ Il y a eu un souci avec l'achat du vêtement (id: {self.clothe['id']}, "
-                                                 f"nom: {self.clothe['title']}, url: {self.clothe['url']}), veuillez "
-                                            f"réessayer. [{error_code}]", ephemeral=True)
-            await self.logs_channel.send(f"⚠️ Il y a eu un souci avec l'achat du vêtement (id: {self.clothe['id']}, "
-                                                 f"nom: {self.clothe['title']}, url: {self.clothe['url']}), veuillez "
-                                            f"réessayer. [{error_code}]")
+            self.sender.log(self.logs_channel, f"⚠️ Vêtement bien acheté (id: {clothe['id']}, "
+                                               f"nom: {clothe['title']}) mais non mis en stock [{error_code}]")
 
-    @discord.ui.button(label="Non pertinent", style=discord.ButtonStyle.red)
-    async def not_pertinent(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+    async def not_pertinent(self, interaction: discord.Interaction, ratio: int) -> None:
         """
         'Non pertinent' button
         Adds fuzz ratio to log file for non pertinent items. Also posts result in logs channel
         Args:
             interaction: discord.Interaction
-            button: button: discord.ui.Button
+            ratio: int, fuzz ratio
 
         Returns: None
 
@@ -192,13 +349,14 @@ class BuyButtons(discord.ui.View):
         try:
             await interaction.response.defer()
 
-            logging.warning(f"Bad fuzz ratio: {self.ratio}")
+            logging.warning(f"Bad fuzz ratio: {ratio}")
+            self.not_pertinent_total.inc()
 
             await interaction.followup.send("Merci du feedback !", ephemeral=True)
-            await self.logs_channel.send(f"ℹ️ Fuzz ratio non pertinent: {self.ratio}")
+            self.sender.log(self.logs_channel, f"ℹ️ Fuzz ratio non pertinent: {ratio}")
 
         except Exception as e:
-            await notify_something_went_wrong("BuyButtons",
+            await notify_something_went_wrong("BuyHandler",
                                               "not_pertinent",
                                               5,
                                               e,
@@ -206,153 +364,203 @@ class BuyButtons(discord.ui.View):
 
 
 class StockButtons(discord.ui.View):
-    def __init__(self, clothe_id: Union[str, int], port: int, logs_channel: discord.TextChannel):
+    def __init__(self, clothe_id: Union[str, int]):
         """
-        Represents buttons in stock - to cancel purchase or to change clothe state to "sold"
+        Represents buttons in stock - to cancel purchase or to change clothe state to "sold".
+        Layout only: clicks are routed from the buttons custom_id to StockHandler, so the view is not kept after being
+        sent and buttons keep working after a restart.
         Args:
             clothe_id: Union[str, int], Vinted clothe id
-            port: int, API port to use
-            logs_channel: discord.TextChannel, lohs channel to post in
         """
-        self.clothe_id = clothe_id
-        self.port = port
-        self.logs_channel = logs_channel
         super().__init__(timeout=None)
-        self.display_stock_buttons()
 
-    def display_stock_buttons(self):
+        # "Vendu"
+        self.add_item(discord.ui.Button(label="✅ Vendu",
+                                        style=discord.ButtonStyle.green,
+                                        custom_id=f"{clothe_id}:sold"))
+
+        # "Supprimer"
+        self.add_item(discord.ui.Button(label="⚠️ Supprimer",
+                                        style=discord.ButtonStyle.red,
+                                        custom_id=f"{clothe_id}:delete"))
+
+        # Nothing to dispatch to this view (see StockHandler), do not let discord.py store it
+        self.stop()
+
+
+class StockHandler:
+    """
+    Handles "Vendu" and "Supprimer" clicks of every stock post, from their custom_id ("{clothe_id}:sold" or
+    "{clothe_id}:delete")
+    """
+    # custom_id pattern (see ComponentRouter)
+    PATTERN = r"(?P<clothe_id>[^:]+):(?P<action>sold|delete)"
+
+    def __init__(self, stock: StockIndex, api: ApiClient, channels: Callable[[str], Optional[discord.TextChannel]],
+                 sender: MessageScheduler, metrics: MetricsRegistry) -> None:
         """
-        Adds "Vendu" and "Supprimer" buttons, to either sell or delete clothe in stock.
-        Defines their respective callbacks
-        Returns: None
+        Args:
+            stock: StockIndex, ids of clothes in stock
+            api: ApiClient, shared API client
+            channels: Callable[[str], Optional[discord.TextChannel]], bot channel by attribute name, read on each
+                      click ("logs_channel": logs channel to post in)
+            sender: MessageScheduler, bot messages scheduler
+            metrics: MetricsRegistry, where to export stock actions metrics
+        """
+        self.stock = stock
+        self.api = api
+        self.sender = sender
+        self.channels = channels
+        self.actions_total = metrics.counter("stock_actions_total", "Stock buttons clicks by action and outcome",
+                                             ("action", "outcome"))
+        self.action_seconds = metrics.histogram("stock_action_seconds", "Stock API call duration", ("action",))
+
+    @property
+    def logs_channel(self) -> Optional[discord.TextChannel]:
+        """
+        Returns: Optional[discord.TextChannel], logs channel (None until the bot is ready)
+        """
+        return self.channels("logs_channel")
 
+    async def handle(self, interaction: discord.Interaction, clothe_id: str, action: str) -> None:
         """
-        async def sold(interaction: discord.Interaction):
-            """
-            Performs sell operation
-            Args:
-                interaction: discord.Iteraction
+        Args:
+            interaction: discord.Interaction
+            clothe_id: str, Vinted clothe id
+            action: str, "sold" or "delete"
 
-            Returns: None
+        Returns: None
+        """
+        if action == "sold":
+            await self.sold(interaction, clothe_id)
 
-            """
-            sell_clothes_form = SellClotheView()
-            await interaction.response.send_modal(sell_clothes_form)
-            await sell_clothes_form.wait()
+        else:
+            await self.delete(interaction, clothe_id)
 
-            sale_date, selling_price = sell_clothes_form.sale_date.value, sell_clothes_form.selling_price.value
+    async def sold(self, interaction: discord.Interaction, clothe_id: str) -> None:
+        """
+        Performs sell operation
+        Args:
+            interaction: discord.Iteraction
+            clothe_id: str, Vinted clothe id
 
-            # Register sale
-            try:
-                sell_clothes = requests.post(f"{API_HOST}:{self.port}/{SELL_CLOTHES_ROUTE}",
-                                             data=json.dumps({"clothe_id": str(self.clothe_id),
-                                                              "sale_date": sale_date,
-                                                              "selling_price": selling_price}))
-
-                if sell_clothes.status_code == 200:
-                    logging.info(f"Successfully registered clothe as sold: (id: {self.clothe_id}, "
-                                                 f"selling_price: {selling_price}€, "
-                                                 f"sale_date: {sale_date})")
-                    await interaction.followup.send(f"✅ Vente bien enregistrée: {self.clothe_id}", ephemeral=True)
-                    await self.logs_channel.send(f"✅ Vêtement vendu: (id: {self.clothe_id}, "
-                                                 f"prix de vente: {selling_price}€, "
-                                                 f"date de vente: {sale_date})")
-
-                    # Delete the stock entry
-                    await interaction.message.delete()
-
-                elif sell_clothes.status_code == 501:
-                    logging.warning(f"Bad date format: {sale_date}, full API response: {sell_clothes.text}")
-                    await interaction.followup.send(f"ℹ️ Vente non enregistrée: {self.clothe_id}, car la date "
-                                                    f"n'est pas au bon format.", ephemeral=True)
+        Returns: None
 
-                else:
-                    error_code = 6
-                    logging.error(f"There was an issue while registering clothe as sold {self.clothe_id}")
-                    logging.error(f"Displayed error code [{error_code}]")
-                    await interaction.followup.send(
-                        f"⚠️ Il y a eu un souci avec la vente du vêtement (id: {self.clothe_id}), veuillez "
-                        f"réessayer. [{error_code}]", ephemeral=True)
-                    await self.logs_channel.send(
-                        f"⚠️ Il y a eu un souci avec la vente du vêtement (id: {self.clothe_id}), veuillez "
-                        f"réessayer. [{error_code}]")
+        """
+        sell_clothes_form = SellClotheView()
+        await interaction.response.send_modal(sell_clothes_form)
+        await sell_clothes_form.wait()
 
-            except Exception as e:
-                error_code = 5
-                logging.error(f"There was an exception while registering clothe as sold {self.clothe_id}: {e}")
+        sale_date, selling_price = sell_clothes_form.sale_date.value, sell_clothes_form.selling_price.value
+
+        # Register sale
+        try:
+            start = time.time()
+            sell_clothes = await self.api.post(SELL_CLOTHES_ROUTE, {"clothe_id": str(clothe_id),
+                                                                    "sale_date": sale_date,
+                                                                    "selling_price": selling_price})
+            self.action_seconds.observe(time.time() - start, "sold")
+
+            if sell_clothes.status_code == 200:
+                self.actions_total.inc("sold", "ok")
+                self.stock.discard(clothe_id)
+                logging.info(f"Successfully registered clothe as sold: (id: {clothe_id}, "
+                                             f"selling_price: {selling_price}€, "
+                                             f"sale_date: {sale_date})")
+                await interaction.followup.send(f"✅ Vente bien enregistrée: {clothe_id}", ephemeral=True)
+                self.sender.log(self.logs_channel, f"✅ Vêtement vendu: (id: {clothe_id}, "
+                                                   f"prix de vente: {selling_price}€, "
+                                                   f"date de vente: {sale_date})")
+
+                # Delete the stock entry
+                await interaction.message.delete()
+
+            elif sell_clothes.status_code == 501:
+                self.actions_total.inc("sold", "bad_date")
+                logging.warning(f"Bad date format: {sale_date}, full API response: {sell_clothes.text}")
+                await interaction.followup.send(f"ℹ️ Vente non enregistrée: {clothe_id}, car la date "
+                                                f"n'est pas au bon format.", ephemeral=True)
+
+            else:
+                self.actions_total.inc("sold", "failed")
+                error_code = 6
+                logging.error(f"There was an issue while registering clothe as sold {clothe_id}")
                 logging.error(f"Displayed error code [{error_code}]")
                 await interaction.followup.send(
-                    f"⚠️ Il y a eu un souci avec la vente du vêtement (id: {self.clothe_id}), veuillez "
+                    f"⚠️ Il y a eu un souci avec la vente du vêtement (id: {clothe_id}), veuillez "
                     f"réessayer. [{error_code}]", ephemeral=True)
-                await self.logs_channel.send(
-                    f"⚠️ Il y a eu un souci avec la vente du vêtement (id: {self.clothe_id}), veuillez "
-                    f"réessayer. [{error_code}]")
+                self.sender.log(self.logs_channel, f"⚠️ Il y a eu un souci avec la vente du vêtement "
+                                                   f"(id: {clothe_id}), veuillez réessayer. [{error_code}]")
 
-        async def delete(interaction: discord.Interaction):
-            """
-            Performs delete operation
-            Args:
-                interaction: discord.Iteraction
+        except Exception as e:
+            self.actions_total.inc("sold", "error")
+            error_code = 5
+            logging.error(f"There was an exception while registering clothe as sold {clothe_id}: {e}")
+            logging.error(f"Displayed error code [{error_code}]")
+            await interaction.followup.send(
+                f"⚠️ Il y a eu un souci avec la vente du vêtement (id: {clothe_id}), veuillez "
+                f"réessayer. [{error_code}]", ephemeral=True)
+            self.sender.log(self.logs_channel, f"⚠️ Il y a eu un souci avec la vente du vêtement "
+                                               f"(id: {clothe_id}), veuillez réessayer. [{error_code}]")
 
-            Returns: None
+    async def delete(self, interaction: discord.Interaction, clothe_id: str) -> None:
+        """
+        Performs delete operation
+        Args:
+            interaction: discord.Iteraction
+            clothe_id: str, Vinted clothe id
 
-            """
-            delete_clothes_form = DeleteClotheView()
-            await interaction.response.send_modal(delete_clothes_form)
-            await delete_clothes_form.wait()
+        Returns: None
 
-            deletion_confirmation = delete_clothes_form.deletion_confirmation.value
+        """
+        delete_clothes_form = DeleteClotheView()
+        await interaction.response.send_modal(delete_clothes_form)
+        await delete_clothes_form.wait()
 
-            # Check confirmation validity
-            if deletion_confirmation.lower() != "oui":
-                logging.warning(f"Confirmation undone - skipping clothe deletion: {self.clothe_id}")
-                await interaction.followup.send(f"ℹ️ Suppression non effectuée: {self.clothe_id}", ephemeral=True)
-                return
+        deletion_confirmation = delete_clothes_form.deletion_confirmation.value
 
-            # Else we delete the item in stock
-            try:
-                delete_clothes = requests.post(f"{API_HOST}:{self.port}/{DELETE_CLOTHES_ROUTE}",
-                                               data=json.dumps({"clothe_id": str(self.clothe_id)}))
+        # Check confirmation validity
+        if deletion_confirmation.lower() != "oui":
+            self.actions_total.inc("delete", "cancelled")
+            logging.warning(f"Confirmation undone - skipping clothe deletion: {clothe_id}")
+            await interaction.followup.send(f"ℹ️ Suppression non effectuée: {clothe_id}", ephemeral=True)
+            return
 
-                if delete_clothes.status_code == 200:
-                    logging.info(f"Successfully deleted clothe from stock: (id: {self.clothe_id})")
-                    await interaction.followup.send(f"✅ Suppression du vêtement effectuée: {self.clothe_id}",
-                                                    ephemeral=True)
-                    await self.logs_channel.send(f"✅ Suppression du vêtement effectuée: {self.clothe_id}")
+        # Else we delete the item in stock
+        try:
+            start = time.time()
+            delete_clothes = await self.api.post(DELETE_CLOTHES_ROUTE, {"clothe_id": str(clothe_id)})
+            self.action_seconds.observe(time.time() - start, "delete")
+
+            if delete_clothes.status_code == 200:
+                self.actions_total.inc("delete", "ok")
+                self.stock.discard(clothe_id)
+                logging.info(f"Successfully deleted clothe from stock: (id: {clothe_id})")
+                await interaction.followup.send(f"✅ Suppression du vêtement effectuée: {clothe_id}",
+                                                ephemeral=True)
+                self.sender.log(self.logs_channel, f"✅ Suppression du vêtement effectuée: {clothe_id}")
 
-                    # Delete the stock entry
-                    await interaction.message.delete()
+                # Delete the stock entry
+                await interaction.message.delete()
 
-                else:
-                    error_code = 7
-                    logging.error(f"There was an issue while deleting clothe from stock {self.clothe_id}")
-                    logging.error(f"Displayed error code [{error_code}]")
-                    await interaction.followup.send(
-                        f"⚠️ Il y a eu un souci avec la suppression du vêtement du stock (id: {self.clothe_id}), "
-                        f"veuillez réessayer. [{error_code}]", ephemeral=True)
-                    await self.logs_channel.send(f"⚠️ Il y a eu un souci avec la suppression du vêtement du stock "
-                                                 f"(id: {self.clothe_id}), veuillez réessayer. [{error_code}]")
-
-            except Exception as e:
-                error_code = 8
-                logging.error(f"There was an exception while deleting clothe from stock {self.clothe_id}: {e}")
+            else:
+                self.actions_total.inc("delete", "failed")
+                error_code = 7
+                logging.error(f"There was an issue while deleting clothe from stock {clothe_id}")
                 logging.error(f"Displayed error code [{error_code}]")
                 await interaction.followup.send(
-                    f"⚠️ Il y a eu un souci avec la suppression du vêtement du stock (id: {self.clothe_id}), "
+                    f"⚠️ Il y a eu un souci avec la suppression du vêtement du stock (id: {clothe_id}), "
                     f"veuillez réessayer. [{error_code}]", ephemeral=True)
-                await self.logs_channel.send(f"⚠️ Il y a eu un souci avec la suppression du vêtement du stock "
-                                             f"(id: {self.clothe_id}), veuillez réessayer. [{error_code}]")
-
-        # "Vendu"
-        sold_button = discord.ui.Button(label="✅ Vendu",
-                                        style=discord.ButtonStyle.green,
-                                        custom_id=f"{self.clothe_id}:sold")
-        sold_button.callback = sold
-        self.add_item(sold_button)
+                self.sender.log(self.logs_channel, f"⚠️ Il y a eu un souci avec la suppression du vêtement du stock "
+                                                   f"(id: {clothe_id}), veuillez réessayer. [{error_code}]")
 
-        # "Supprimer"
-        delete_button = discord.ui.Button(label="⚠️ Supprimer",
-                                          style=discord.ButtonStyle.red,
-                                          custom_id=f"{self.clothe_id}:delete")
-        delete_button.callback = delete
-        self.add_item(delete_button)
+        except Exception as e:
+            self.actions_total.inc("delete", "error")
+            error_code = 8
+            logging.error(f"There was an exception while deleting clothe from stock {clothe_id}: {e}")
+            logging.error(f"Displayed error code [{error_code}]")
+            await interaction.followup.send(
+                f"⚠️ Il y a eu un souci avec la suppression du vêtement du stock (id: {clothe_id}), "
+                f"veuillez réessayer. [{error_code}]", ephemeral=True)
+            self.sender.log(self.logs_channel, f"⚠️ Il y a eu un souci avec la suppression du vêtement du stock "
+                                               f"(id: {clothe_id}), veuillez réessayer. [{error_code}]")
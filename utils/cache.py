@@ -0,0 +1,202 @@
+###############################################################################
+#
+# File:      cache.py
+# Author(s): Nico
+# Scope:     Cache of already seen clothes ids (optionally persisted on disk)
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import os
+import time
+import struct
+import logging
+
+from collections import OrderedDict
+from typing import Optional, Union
+
+# One record of the persisted cache: int64 clothe id + float64 timestamp
+RECORD = struct.Struct("<qd")
+
+
+class SeenCache:
+    """
+    Set of already seen clothes ids with insertion-ordered eviction.
+    Lookups, insertions and evictions are O(1). Ids seen again are refreshed (LRU), so a clothe still
+    present in the API pages never expires.
+    Can be persisted in an append-only log of (id, timestamp) records, compacted from time to time.
+    """
+    def __init__(self, max_size: int, max_age: float) -> None:
+        """
+        Args:
+            max_size: int, max number of ids kept
+            max_age: float, max time in seconds an id is kept without being seen again
+        """
+        self.max_size = max_size
+        self.max_age = max_age
+        # id -> last time seen, oldest first
+        self.items = OrderedDict()
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Persistence
+        self.path = None
+        self.file = None
+        self.records = 0
+        self.last_update = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, clothe_id: Union[str, int]) -> bool:
+        return clothe_id in self.items
+
+    def seen(self, clothe_id: Union[str, int], now: Optional[float] = None) -> bool:
+        """
+        Checks whether a clothe id was already seen - refreshes it if so
+
+        Args:
+            clothe_id: Union[str, int], Vinted clothe id
+            now: Optional[float], current timestamp
+
+        Returns: bool, True if already seen
+        """
+        if clothe_id in self.items:
+            self.hits += 1
+            self.items[clothe_id] = time.time() if now is None else now
+            self.items.move_to_end(clothe_id)
+            return True
+
+        self.misses += 1
+        return False
+
+    def add(self, clothe_id: Union[str, int], now: Optional[float] = None) -> None:
+        """
+        Marks a clothe id as seen
+
+        Args:
+            clothe_id: Union[str, int], Vinted clothe id
+            now: Optional[float], current timestamp
+
+        Returns: None
+        """
+        now = time.time() if now is None else now
+        self.items[clothe_id] = now
+        self.items.move_to_end(clothe_id)
+
+        if self.file is not None:
+            self.file.write(RECORD.pack(int(clothe_id), now))
+            self.records += 1
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """
+        Drops the oldest ids while the cache is too big or ids are too old
+
+        Args:
+            now: Optional[float], current timestamp
+
+        Returns: int, number of evicted ids
+        """
+        limit = (time.time() if now is None else now) - self.max_age
+        evicted = 0
+
+        while self.items:
+            clothe_id, last_seen = next(iter(self.items.items()))
+
+            if len(self.items) <= self.max_size and last_seen >= limit:
+                break
+
+            self.items.popitem(last=False)
+            evicted += 1
+
+        self.evictions += evicted
+
+        return evicted
+
+    def load(self, path: str) -> None:
+        """
+        Reloads the ids persisted in the given file then keeps appending new ids to it
+
+        Args:
+            path: str, path of the persisted cache
+
+        Returns: None
+        """
+        self.path = path
+
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                content = f.read()
+
+            # Drop a possibly truncated last record (crash while writing)
+            content = content[:len(content) - len(content) % RECORD.size]
+
+            for clothe_id, last_seen in RECORD.iter_unpack(content):
+                self.items[clothe_id] = last_seen
+                self.items.move_to_end(clothe_id)
+
+            if self.items:
+                self.last_update = max(self.items.values())
+
+            logging.info(f"Loaded {len(self.items)} seen clothes ids from {path} (last update: {self.last_update})")
+
+        self.evict()
+        self.compact()
+
+    def compact(self) -> None:
+        """
+        Rewrites the persisted cache with the ids currently kept (and their last seen time)
+
+        Returns: None
+        """
+        if self.path is None:
+            return
+
+        if self.file is not None:
+            self.file.close()
+
+        tmp_path = f"{self.path}.tmp"
+
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(RECORD.pack(int(clothe_id), last_seen) for clothe_id, last_seen in self.items.items()))
+
+        os.replace(tmp_path, self.path)
+
+        self.file = open(self.path, "ab")
+        self.records = len(self.items)
+
+    def flush(self) -> None:
+        """
+        Flushes appended ids to disk, compacts the file once it got much bigger than the cache
+
+        Returns: None
+        """
+        if self.file is None:
+            return
+
+        if self.records > 2 * max(self.max_size, len(self.items)):
+            self.compact()
+
+        else:
+            self.file.flush()
+
+    def close(self) -> None:
+        """
+        Compacts and closes the persisted cache
+
+        Returns: None
+        """
+        if self.file is not None:
+            self.compact()
+            self.file.close()
+            self.file = None
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, cache metrics
+        """
+        return {"size": len(self.items),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions}
@@ -0,0 +1,77 @@
+###############################################################################
+#
+# File:      components.py
+# Author(s): Nico
+# Scope:     Persistent buttons handling, routed from their custom_id
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import re
+import logging
+import discord
+
+from typing import Callable
+
+
+class ComponentRouter:
+    """
+    Routes button clicks to handlers from the button custom_id, whatever the message they belong to.
+    Nothing is kept per posted message, and buttons keep working after a restart.
+    """
+    def __init__(self) -> None:
+        # name -> (compiled custom_id pattern, handler)
+        self.routes = {}
+        # Metrics
+        self.dispatched = 0
+        self.failed = 0
+
+    def add(self, name: str, pattern: str, handler: Callable) -> None:
+        """
+        Registers (or replaces) a route
+
+        Args:
+            name: str, route name
+            pattern: str, regex the whole custom_id has to match, its named groups are passed to the handler
+            handler: Callable, coroutine function (interaction, **groups)
+
+        Returns: None
+        """
+        self.routes[name] = (re.compile(pattern), handler)
+
+    async def dispatch(self, interaction: discord.Interaction) -> bool:
+        """
+        Args:
+            interaction: discord.Interaction, any interaction
+
+        Returns: bool, whether a route handled the interaction
+        """
+        if interaction.type != discord.InteractionType.component:
+            return False
+
+        custom_id = (interaction.data or {}).get("custom_id", "")
+
+        for name, (pattern, handler) in self.routes.items():
+            match = pattern.fullmatch(custom_id)
+
+            if match is None:
+                continue
+
+            self.dispatched += 1
+
+            try:
+                await handler(interaction, **match.groupdict())
+
+            except Exception as e:
+                self.failed += 1
+                logging.error(f"There was an exception while handling {name} component {custom_id}: {e!r}")
+
+            return True
+
+        return False
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, router metrics
+        """
+        return {"routes": list(self.routes), "dispatched": self.dispatched, "failed": self.failed}
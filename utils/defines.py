@@ -7,8 +7,32 @@
 # Created:   07 February 2024
 #
 ###############################################################################
-# API Host (port handled in entry point parameters)
+# API Host (ports handled in entry point parameters)
 API_HOST = "http://127.0.0.1"
+# Number of network failures in a row after which an API instance is left aside
+API_ENDPOINT_MAX_FAILURES = 3
+# Time in seconds an API instance is left aside (unless a health check succeeds in the meantime)
+API_ENDPOINT_COOLDOWN = 30
+# Number of retries of an API call failing on network errors (jittered exponential backoff between attempts)
+API_RETRIES = 2
+# Max delay in seconds before the first retry, doubled at each retry
+RETRY_BASE_DELAY = 0.2
+# Max delay in seconds between two attempts
+RETRY_MAX_DELAY = 2
+# Number of failed API calls in a row (retries included) opening the circuit breaker of a route
+BREAKER_MAX_FAILURES = 5
+# Time in seconds a route circuit breaker stays open before a trial call
+BREAKER_COOLDOWN = 15
+# Time in seconds between two API instances health checks
+API_HEALTH_INTERVAL = 10
+# Health check timeout in seconds
+API_HEALTH_TIMEOUT = 3
+# Max number of pooled connections to the API
+API_POOL_SIZE = 100
+# Time in seconds an idle keep-alive connection to the API is kept open
+API_KEEPALIVE_TIMEOUT = 60
+# Default total timeout in seconds for an API call
+API_DEFAULT_TIMEOUT = 30
 # Route to get_clothes
 GET_CLOTHES_ROUTE = "api/operations/get_clothes"
 # Route to get_requests
@@ -39,14 +63,114 @@ PICKUP_GET_ROUTE = "api/operations/get_close_pickup_points"
 PICKUP_POST_ROUTE = "api/operations/save_pickup_points"
 # Route to autobuy
 AUTOBUY_ROUTE = "api/operations/autobuy"
+# Pacing of messages posted in one channel (messages per second and max burst) - Discord allows 5 per 5s
+SEND_RATE_PER_CHANNEL = 1
+SEND_BURST_PER_CHANNEL = 5
+# Pacing of all messages posted by the bot (messages per second and max burst) - Discord allows 50 per second
+SEND_RATE_GLOBAL = 40
+SEND_BURST_GLOBAL = 40
+# Discord max message length, used when coalescing log messages
+LOG_MESSAGE_MAX_LENGTH = 2000
+# Per route total timeout in seconds (API_DEFAULT_TIMEOUT otherwise)
+ROUTE_TIMEOUTS = {
+    GET_CLOTHES_ROUTE: 10,
+    USER_INFOS_ROUTE: 5,
+    GET_IMAGES_URL_ROUTE: 10,
+    REQUESTS_CHANNEL_IDS_ROUTE: 10,
+    GET_CLOTHES_FROM_STOCK_ROUTE: 10,
+    AUTOBUY_ROUTE: 60,
+}
 # In which category we create new text channel upon saving a clothe request
 CATEGORY = "buybuybuybuy"
 # Time in seconds to wait for a new API call to get_clothes
 WAIT_TIME = "1"
+# Adaptive polling: min interval in seconds when pages are nearly full of new clothes
+POLL_MIN_INTERVAL = 0.5
+# Adaptive polling: max interval in seconds when no new clothes show up
+POLL_MAX_QUIET_INTERVAL = 5
+# Adaptive polling: max interval in seconds when the API fails
+POLL_MAX_ERROR_INTERVAL = 60
+# Adaptive polling: part of a page being new clothes above which we poll faster (0 to 1)
+POLL_SATURATION = 0.5
+# Adaptive polling: multiplying factor when speeding up or backing off
+POLL_BACKOFF = 1.5
+# Max number of pages fetched when a whole page is new clothes (page overflow)
+POLL_MAX_PAGES = 5
+# Max delay in seconds between two attempts to load stock and active requests on startup
+STARTUP_RETRY_MAX_DELAY = 30
+# Time in seconds between two reconciliations of the local stock index with the API
+STOCK_RECONCILE_INTERVAL = 5 * 60
+# Time in seconds between two syncs of running requests with active requests in DB
+REQUESTS_SYNC_INTERVAL = 60
+# Max number of brands per global request shard (each shard is polled on its own schedule)
+SHARD_SIZE = 4
+# Number of API errors in a row after which a warning is posted in the logs channel (polling goes on)
+POLL_MAX_ERRORS = 10
+# Max number of matching jobs (find_matching_and_post calls) running concurrently
+MAX_WORKERS = 16
+# Max number of matching jobs waiting for a worker: beyond it the polling loop waits (flat memory when posts lag)
+MAX_QUEUED_JOBS = MAX_WORKERS
 # API parameter, in case too low can be increased up to 96
 PER_PAGE = "96"
+# Max number of clothes ids kept in the seen clothes cache
+CACHE_MAX_SIZE = 20 * int(PER_PAGE)
+# Max time in seconds a clothe id is kept in the seen clothes cache without being seen again
+CACHE_MAX_AGE = 24 * 60 * 60
+# Local port of the Prometheus metrics endpoint (0: disabled)
+METRICS_PORT = 9108
+# Prefix of every metric name
+METRICS_PREFIX = "guysvintedbot_"
+# Latency histograms buckets in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# New clothes per poll histogram buckets
+NEW_ITEMS_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 96)
+# Listing to post / click delays histograms buckets in seconds
+LISTING_DELAY_BUCKETS = (5, 10, 15, 20, 30, 45, 60, 90, 120, 300, 600)
+# Time in seconds covered by the /stats rolling summary
+TRACE_WINDOW = 60 * 60
+# Max number of clothes traced at the same time: matching clothes of the running matching jobs (every page of a poll
+# matching at worst)
+TRACE_MAX_OPEN = MAX_WORKERS * POLL_MAX_PAGES * int(PER_PAGE)
+# Max number of samples kept per delay or stage for the /stats rolling summary
+TRACE_MAX_SAMPLES = 10000
+# Uncompressed size in MB of an API recording segment file before a new one is started (see --record)
+RECORD_SEGMENT_MB = 64
+# API routes recorded with --record: reads needed for replay only, never anything about the users (logins, pickup
+# points, purchases...)
+RECORDED_ROUTES = frozenset({
+    GET_CLOTHES_ROUTE,
+    USER_INFOS_ROUTE,
+    GET_IMAGES_URL_ROUTE,
+    REQUESTS_CHANNEL_IDS_ROUTE,
+    GET_REQUESTS_ROUTE,
+    GET_CLOTHES_FROM_STOCK_ROUTE,
+})
+# Default per module log levels (see --log-levels)
+LOG_MODULE_LEVELS = "discord=WARNING"
+# Max log file size in MB before rotation
+LOG_MAX_MB = 100
+# Number of rotated log files kept
+LOG_BACKUPS = 10
+# File where seen clothes ids are persisted for warm restarts
+SEEN_CACHE_FILE = "seen_clothes.bin"
+# SQLite file where posted clothes are kept for their buy buttons (survives restarts)
+POSTED_STORE_FILE = "posted_clothes.db"
+# Time in seconds a posted clothe can still be bought from its post buttons
+POSTED_STORE_MAX_AGE = 7 * 24 * 60 * 60
+# Number of posted clothes saved between two prunes of the store
+POSTED_STORE_PRUNE_EVERY = 1000
+# Max age in seconds of clothes published while the bot was down to still be posted on restart
+CATCH_UP_WINDOW = 10 * 60
 # Minimal matching ratio between found clothe and search text if provided (0 to 100)
 FUZZ_RATIO = 80
+# Max number of memoized (title, search text) ratios
+FUZZ_MEMO_SIZE = 50000
+# Time in seconds sellers ratings are cached
+SELLER_CACHE_TTL = 30 * 60
+# Max number of cached sellers ratings
+SELLER_CACHE_SIZE = 10000
+# Max number of clothes enriched (seller infos and images) concurrently
+ENRICH_CONCURRENCY = 10
 # In case we could not retrieve clothe images
 NO_IMAGE_AVAILABLE_URL = "https://upload.wikimedia.org/wikipedia/commons/1/14/No_Image_Available.jpg"
 # Define referenced brands
@@ -0,0 +1,192 @@
+###############################################################################
+#
+# File:      enrichment.py
+# Author(s): Nico
+# Scope:     Seller infos and images fetching, shared between matching requests
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import time
+import asyncio
+import logging
+
+from collections import OrderedDict
+from typing import Optional
+from utils.api_client import ApiClient
+from utils.latency import LatencyStats
+from utils.defines import USER_INFOS_ROUTE, GET_IMAGES_URL_ROUTE, NO_IMAGE_AVAILABLE_URL, SELLER_CACHE_TTL, \
+    SELLER_CACHE_SIZE, ENRICH_CONCURRENCY
+
+
+class Enricher:
+    """
+    Fetches what we need to post a clothe (seller reviews and images).
+    Each clothe is enriched at most once per poll, whatever the number of matching requests: concurrent callers
+    share the same in-flight task. Sellers ratings are cached (TTL) across polls.
+    Seller and images lookups run concurrently, at most `concurrency` clothes being enriched at the same time.
+    """
+    def __init__(self, api: ApiClient, seller_ttl: float = SELLER_CACHE_TTL,
+                 seller_cache_size: int = SELLER_CACHE_SIZE, concurrency: int = ENRICH_CONCURRENCY,
+                 latencies: Optional[LatencyStats] = None) -> None:
+        """
+        Args:
+            api: ApiClient, shared API client
+            seller_ttl: float, time in seconds seller ratings are cached
+            seller_cache_size: int, max number of cached sellers
+            concurrency: int, max number of clothes enriched concurrently
+            latencies: Optional[LatencyStats], where to record stages latencies
+        """
+        self.api = api
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.latencies = latencies if latencies is not None else LatencyStats()
+        self.seller_ttl = seller_ttl
+        self.seller_cache_size = seller_cache_size
+        # seller_id -> (expiry timestamp, (number_reviews, number_stars)), oldest first
+        self.sellers = OrderedDict()
+        # seller_id -> in-flight task
+        self.sellers_in_flight = {}
+        # clothe_id -> enrichment task (current poll)
+        self.clothes = {}
+        # Metrics
+        self.seller_hits = 0
+        self.api_calls = 0
+
+    def start_poll(self) -> None:
+        """
+        Forgets clothes enriched during the previous poll
+
+        Returns: None
+        """
+        self.clothes = {}
+
+    async def enrich(self, clothe: dict) -> tuple:
+        """
+        Enriches a clothe, once per poll
+
+        Args:
+            clothe: dict, clothe dict
+
+        Returns: tuple, (number of reviews, number of stars, list of images urls)
+        """
+        task = self.clothes.get(clothe["id"])
+
+        if task is None:
+            task = asyncio.ensure_future(self.fetch(clothe))
+            self.clothes[clothe["id"]] = task
+
+        return await asyncio.shield(task)
+
+    async def fetch(self, clothe: dict) -> tuple:
+        """
+        Fetches seller ratings and images of a clothe, concurrently
+
+        Args:
+            clothe: dict, clothe dict
+
+        Returns: tuple, (number of reviews, number of stars, list of images urls)
+        """
+        async with self.semaphore:
+            start = time.time()
+            (user_reviews, user_stars), url_list = await asyncio.gather(self.get_seller(clothe["seller_id"]),
+                                                                        self.get_images(clothe))
+            self.latencies.record("enrichment", time.time() - start)
+
+        return user_reviews, user_stars, url_list
+
+    async def get_seller(self, seller_id) -> tuple:
+        """
+        Gets seller ratings, from cache if fresh enough. Concurrent calls for one seller share the same API call
+
+        Args:
+            seller_id: Vinted seller id
+
+        Returns: tuple, (number of reviews, number of stars)
+        """
+        cached = self.sellers.get(seller_id)
+
+        if cached is not None and cached[0] > time.time():
+            self.seller_hits += 1
+            return cached[1]
+
+        task = self.sellers_in_flight.get(seller_id)
+
+        if task is None:
+            task = asyncio.ensure_future(self.fetch_seller(seller_id))
+            self.sellers_in_flight[seller_id] = task
+            task.add_done_callback(lambda _: self.sellers_in_flight.pop(seller_id, None))
+
+        return await asyncio.shield(task)
+
+    async def fetch_seller(self, seller_id) -> tuple:
+        """
+        Calls the API to get user infos, caches the ratings
+
+        Args:
+            seller_id: Vinted seller id
+
+        Returns: tuple, (number of reviews, number of stars)
+        """
+        self.api_calls += 1
+        start = time.time()
+        user_infos = await self.api.get(USER_INFOS_ROUTE, {"user_id": seller_id})
+        self.latencies.record("seller", time.time() - start)
+
+        if user_infos.status_code != 200:
+            logging.error(f"Could not retrieve user infos for user_id: {seller_id}")
+            raise Exception(f"Could not retrieve user infos for user_id: {seller_id}")
+
+        ratings = (user_infos.data["number_reviews"], user_infos.data["number_stars"])
+
+        logging.debug(f"Found user_infos for user_id: {seller_id}: {ratings}", extra={"seller_id": seller_id})
+
+        self.sellers[seller_id] = (time.time() + self.seller_ttl, ratings)
+        self.sellers.move_to_end(seller_id)
+
+        # Security for cache length
+        while len(self.sellers) > self.seller_cache_size:
+            self.sellers.popitem(last=False)
+
+        return ratings
+
+    async def get_images(self, clothe: dict) -> list[str]:
+        """
+        Calls the API to get clothe images
+
+        Args:
+            clothe: dict, clothe dict
+
+        Returns: list[str], images urls (default no image available image if none)
+        """
+        self.api_calls += 1
+        start = time.time()
+        images_url = await self.api.get(GET_IMAGES_URL_ROUTE, {"clothe_url": clothe["url"]})
+        self.latencies.record("images", time.time() - start)
+
+        # Handle case where we have no images (internal server error)
+        if images_url.status_code != 200:
+            logging.warning(f"No status_code 200 but {images_url.status_code} for clothe: {clothe['id']} "
+                            f"- forcing default no image available image")
+            # Default no image available image
+            return [NO_IMAGE_AVAILABLE_URL]
+
+        # Retrieve images
+        url_list = images_url.data["images_url"]
+
+        # Case no image received
+        if not url_list:
+            logging.warning(f"No image found for clothe: {clothe['id']} - forcing default no image available image")
+            # Default no image available image
+            return [NO_IMAGE_AVAILABLE_URL]
+
+        logging.debug(f"Found {len(url_list)} images for clothe: {clothe['id']}", extra={"clothe_id": clothe["id"]})
+
+        return url_list
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, enrichment metrics
+        """
+        return {"cached_sellers": len(self.sellers),
+                "seller_hits": self.seller_hits,
+                "api_calls": self.api_calls}
@@ -0,0 +1,107 @@
+###############################################################################
+#
+# File:      fuzzy.py
+# Author(s): Nico
+# Scope:     Batched and memoized search text matching
+#
+# Created:   17 October 2026
+#
+###############################################################################
+from collections import OrderedDict
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+from utils.defines import FUZZ_RATIO, FUZZ_MEMO_SIZE
+
+
+class FuzzyMatcher:
+    """
+    Scores clothes titles against requests search texts (partial ratio, as thefuzz.fuzz.partial_ratio).
+    Titles and search texts are normalized once (lowercase, no punctuation), each search text is scored against
+    all its candidate titles in a single rapidfuzz call, and scores are memoized by (title hash, search text).
+    """
+    def __init__(self, score_cutoff: int = FUZZ_RATIO, memo_size: int = FUZZ_MEMO_SIZE) -> None:
+        """
+        Args:
+            score_cutoff: int, minimal ratio for a title to match (0 to 100)
+            memo_size: int, max number of memoized scores
+        """
+        self.score_cutoff = score_cutoff
+        self.memo_size = memo_size
+        # (title hash, search text) -> score (0 if below cutoff)
+        self.memo = OrderedDict()
+        # Metrics
+        self.memo_hits = 0
+        self.scored = 0
+
+    def score_batch(self, titles_by_search_text: dict) -> dict:
+        """
+        Scores candidate titles for each search text
+
+        Args:
+            titles_by_search_text: dict, search_text -> list of candidate titles
+
+        Returns: dict, (title, search_text) -> ratio, only for pairs reaching the score cutoff
+        """
+        scores = {}
+        # Normalize each title only once per batch
+        processed_titles = {}
+
+        for titles in titles_by_search_text.values():
+            for title in titles:
+                if title not in processed_titles:
+                    processed_titles[title] = default_process(title)
+
+        for search_text, titles in titles_by_search_text.items():
+            to_score = []
+
+            for title in dict.fromkeys(titles):
+                key = (hash(processed_titles[title]), search_text)
+
+                if key in self.memo:
+                    self.memo_hits += 1
+                    self.memo.move_to_end(key)
+                    ratio = self.memo[key]
+
+                    if ratio:
+                        scores[(title, search_text)] = ratio
+
+                else:
+                    to_score.append(title)
+
+            if not to_score:
+                continue
+
+            # One call for all titles - thefuzz rounds ratios, hence the 0.5 margin on the cutoff
+            results = process.extract(default_process(search_text),
+                                      [processed_titles[title] for title in to_score],
+                                      scorer=fuzz.partial_ratio,
+                                      processor=None,
+                                      score_cutoff=max(self.score_cutoff - 0.5, 0),
+                                      limit=None)
+            ratios = {index: int(round(ratio)) for _, ratio, index in results}
+
+            for index, title in enumerate(to_score):
+                ratio = ratios.get(index, 0)
+                ratio = ratio if ratio >= self.score_cutoff else 0
+
+                self.memo[(hash(processed_titles[title]), search_text)] = ratio
+
+                if ratio:
+                    scores[(title, search_text)] = ratio
+
+            self.scored += len(to_score)
+
+        # Security for memo length
+        while len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+
+        return scores
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, matcher metrics
+        """
+        return {"memo_size": len(self.memo),
+                "memo_hits": self.memo_hits,
+                "scored": self.scored}
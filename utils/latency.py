@@ -0,0 +1,38 @@
+###############################################################################
+#
+# File:      latency.py
+# Author(s): Nico
+# Scope:     Per-stage latency tracking
+#
+# Created:   17 October 2026
+#
+###############################################################################
+class LatencyStats:
+    """
+    Count, total and max duration of each pipeline stage (e.g. "seller", "images", "post")
+    """
+    def __init__(self) -> None:
+        # stage -> [count, total duration, max duration]
+        self.stages = {}
+
+    def record(self, stage: str, duration: float) -> None:
+        """
+        Records the duration of one stage execution
+
+        Args:
+            stage: str, stage name
+            duration: float, duration in seconds
+
+        Returns: None
+        """
+        stage_stats = self.stages.setdefault(stage, [0, 0.0, 0.0])
+        stage_stats[0] += 1
+        stage_stats[1] += duration
+        stage_stats[2] = max(stage_stats[2], duration)
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, stage -> {count, avg, max} (durations in seconds)
+        """
+        return {stage: {"count": count, "avg": round(total / count, 3), "max": round(maximum, 3)}
+                for stage, (count, total, maximum) in self.stages.items()}
@@ -0,0 +1,142 @@
+###############################################################################
+#
+# File:      log.py
+# Author(s): Nico
+# Scope:     Non-blocking structured logging (queue, JSON records, rotation)
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import json
+import queue
+import logging
+import logging.handlers
+
+from typing import Optional
+
+# Fields of a LogRecord, anything else comes from `extra` and is written as is in JSON records
+RECORD_FIELDS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, module, function, message and `extra` fields (e.g. clothe_id, request_id)
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Args:
+            record: logging.LogRecord
+
+        Returns: str, JSON line
+        """
+        entry = {"time": self.formatTime(record),
+                 "level": record.levelname,
+                 "module": record.module,
+                 "func": record.funcName,
+                 "msg": record.getMessage()}
+
+        for key, value in record.__dict__.items():
+            if key not in RECORD_FIELDS:
+                entry[key] = value
+
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LevelFilter(logging.Filter):
+    """
+    Per module levels: the bot logs through the root logger, so records are filtered on their module name
+    (e.g. "bot", "enrichment"), then on their logger name for libraries (e.g. "discord", "discord.gateway")
+    """
+    def __init__(self, default: int, levels: dict) -> None:
+        """
+        Args:
+            default: int, level of everything not in levels
+            levels: dict, module or logger name -> level
+        """
+        super().__init__()
+        self.default = default
+        self.levels = levels
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Args:
+            record: logging.LogRecord
+
+        Returns: bool, whether the record is kept
+        """
+        level = self.levels.get(record.module)
+
+        if level is None:
+            name = record.name
+
+            while name and level is None:
+                level = self.levels.get(name)
+                name = name.rpartition(".")[0]
+
+        return record.levelno >= (self.default if level is None else level)
+
+
+def parse_levels(spec: Optional[str]) -> dict:
+    """
+    Parses per module levels given in the command line (e.g. "enrichment=WARNING,discord=ERROR")
+
+    Args:
+        spec: Optional[str], comma separated name=LEVEL pairs
+
+    Returns: dict, name -> level
+    """
+    levels = {}
+
+    for pair in (spec or "").split(","):
+        if "=" in pair:
+            name, level = pair.split("=", 1)
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+
+    return levels
+
+
+def setup_logging(path: str, level: str = "INFO", levels: Optional[str] = None, json_format: bool = True,
+                  max_bytes: int = 0, when: Optional[str] = None, backups: int = 0) -> logging.handlers.QueueListener:
+    """
+    Sets the root logger up: records are put in a queue (no I/O in the caller), a background thread formats and
+    writes them to a rotating file (by size, or by time if `when` is given)
+
+    Args:
+        path: str, log file
+        level: str, default level
+        levels: Optional[str], per module levels (see parse_levels)
+        json_format: bool, JSON records (plain text otherwise)
+        max_bytes: int, max file size before rotation (0: no size rotation)
+        when: Optional[str], time rotation (TimedRotatingFileHandler `when`, e.g. "midnight")
+        backups: int, number of rotated files kept
+
+    Returns: logging.handlers.QueueListener, background writer, to be stopped on exit
+    """
+    default = logging.getLevelName(level.upper())
+    module_levels = parse_levels(levels)
+
+    if when:
+        handler = logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backups, utc=True)
+
+    else:
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+
+    handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(
+        "%(asctime)s -- %(filename)s -- %(funcName)s -- %(levelname)s -- %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(LevelFilter(default, module_levels))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    # Records have to be created to be filtered per module
+    root.setLevel(min([default, *module_levels.values()]))
+
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+
+    return listener
@@ -0,0 +1,114 @@
+###############################################################################
+#
+# File:      matcher.py
+# Author(s): Nico
+# Scope:     Compiled index routing new clothes to the matching requests
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import bisect
+import logging
+
+from utils.defines import BRANDS, CLOTHES_STATES
+
+
+class CompiledRequest:
+    """
+    Clothe request with pre-parsed filters
+    """
+    __slots__ = ("request_id", "request", "price_from", "price_to", "search_text")
+
+    def __init__(self, request: dict) -> None:
+        """
+        Args:
+            request: dict, clothe request
+
+        Raises:
+            ValueError if prices can't be parsed
+        """
+        self.request_id = str(request["_id"])
+        self.request = request
+        self.price_from = float(request["price_from"])
+        self.price_to = float(request["price_to"])
+        self.search_text = request["search_text"]
+
+
+class RequestMatcher:
+    """
+    Requests bucketed by (brand id, status id), each bucket sorted by minimal price.
+    A clothe is routed to its bucket, then a binary search on prices gives the candidate requests.
+    Has to be rebuilt whenever the requests change.
+    """
+    def __init__(self, requests: dict) -> None:
+        """
+        Args:
+            requests: dict, request_id -> clothe request
+        """
+        # (brand_id, status_id) -> (sorted price_from list, compiled requests in the same order)
+        self.index = {}
+        buckets = {}
+
+        for request in requests.values():
+            try:
+                compiled = CompiledRequest(request)
+
+            except (KeyError, ValueError) as e:
+                logging.warning(f"Skipping request {request.get('_id')} with invalid filters: {e}")
+                continue
+
+            for status_id in str(request["status_ids"]).split(","):
+                buckets.setdefault((request["brand_ids"], status_id.strip()), []).append(compiled)
+
+        for key, bucket in buckets.items():
+            bucket.sort(key=lambda compiled: compiled.price_from)
+            self.index[key] = ([compiled.price_from for compiled in bucket], bucket)
+
+        self.size = len(requests)
+
+        logging.info(f"Compiled matcher: {self.size} request(s) in {len(self.index)} bucket(s)")
+
+    def candidates(self, clothe: dict) -> list[CompiledRequest]:
+        """
+        Finds requests matching a clothe on brand, state and price
+
+        Args:
+            clothe: dict, clothe dict
+
+        Returns: list[CompiledRequest], candidate requests (search text not checked)
+        """
+        brand_id = BRANDS.get(clothe["brand_title"])
+        status_id = CLOTHES_STATES.get(clothe["status"])
+
+        if brand_id is None or status_id is None:
+            return []
+
+        bucket = self.index.get((brand_id, status_id))
+
+        if bucket is None:
+            return []
+
+        price_froms, compiled_requests = bucket
+        price = float(clothe["price_no_fee"])
+
+        # Requests with price_from <= price, then filter on price_to
+        upper = bisect.bisect_right(price_froms, price)
+
+        return [compiled for compiled in compiled_requests[:upper] if price <= compiled.price_to]
+
+    def match(self, new_clothes: list) -> dict:
+        """
+        Routes new clothes to candidate requests
+
+        Args:
+            new_clothes: list, new clothes found (order is kept)
+
+        Returns: dict, request_id -> (CompiledRequest, list of candidate clothes)
+        """
+        matches = {}
+
+        for clothe in new_clothes:
+            for compiled in self.candidates(clothe):
+                matches.setdefault(compiled.request_id, (compiled, []))[1].append(clothe)
+
+        return matches
@@ -0,0 +1,350 @@
+###############################################################################
+#
+# File:      metrics.py
+# Author(s): Nico
+# Scope:     Counters, gauges and histograms exposed in Prometheus text format
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import bisect
+import logging
+
+from aiohttp import web
+from typing import Callable, Optional
+from utils.defines import METRICS_PREFIX, LATENCY_BUCKETS
+
+
+def escape(value) -> str:
+    """
+    Args:
+        value: label value
+
+    Returns: str, label value escaped for the text format
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    """
+    Args:
+        names: tuple, label names
+        values: tuple, label values, same order
+        extra: str, already formatted label to add (histogram bucket "le")
+
+    Returns: str, Prometheus labels (e.g. '{outcome="ok"}'), empty string if no label
+    """
+    labels = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+
+    if extra:
+        labels.append(extra)
+
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+class Counter:
+    """
+    Monotonic counter, one value per label values
+    """
+    def __init__(self, name: str, documentation: str, labels: tuple = ()) -> None:
+        """
+        Args:
+            name: str, metric name
+            documentation: str, metric help
+            labels: tuple, label names
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        # label values -> value
+        self.values = {}
+
+    def inc(self, *label_values, value: float = 1) -> None:
+        """
+        Args:
+            *label_values: label values, same order as label names
+            value: float, increment
+
+        Returns: None
+        """
+        self.values[label_values] = self.values.get(label_values, 0) + value
+
+    def get(self, *label_values) -> float:
+        """
+        Args:
+            *label_values: label values, same order as label names
+
+        Returns: float, current value
+        """
+        return self.values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        """
+        Returns: list[str], exposition lines
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+
+        for label_values, value in self.values.items():
+            lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value}")
+
+        return lines
+
+
+class Gauge:
+    """
+    Value that goes up and down, one value per label values. Either set, or read from `collect` on each scrape (queue
+    depths, current intervals... nothing to do between scrapes)
+    """
+    def __init__(self, name: str, documentation: str, labels: tuple = (),
+                 collect: Optional[Callable[[], dict]] = None) -> None:
+        """
+        Args:
+            name: str, metric name
+            documentation: str, metric help
+            labels: tuple, label names
+            collect: Optional[Callable[[], dict]], returns label values -> value, replaces set values if given
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.collect = collect
+        # label values -> value
+        self.values = {}
+
+    def set(self, value: float, *label_values) -> None:
+        """
+        Args:
+            value: float, current value
+            *label_values: label values, same order as label names
+
+        Returns: None
+        """
+        self.values[label_values] = value
+
+    def get(self, *label_values) -> float:
+        """
+        Args:
+            *label_values: label values, same order as label names
+
+        Returns: float, current value
+        """
+        values = self.collect() if self.collect is not None else self.values
+
+        return values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        """
+        Returns: list[str], exposition lines
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+
+        try:
+            values = self.collect() if self.collect is not None else self.values
+
+        except Exception as e:
+            # One failing gauge must not break the whole scrape
+            logging.warning(f"Could not collect gauge {self.name}: {e!r}")
+            return lines
+
+        for label_values, value in values.items():
+            lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value}")
+
+        return lines
+
+
+class Histogram:
+    """
+    Observations counted in cumulative buckets, one set of buckets per label values
+    """
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> None:
+        """
+        Args:
+            name: str, metric name
+            documentation: str, metric help
+            labels: tuple, label names
+            buckets: tuple, sorted bucket upper bounds (+Inf is added)
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per bucket counts (last one: +Inf), sum, count]
+        self.values = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        """
+        Args:
+            value: float, observation
+            *label_values: label values, same order as label names
+
+        Returns: None
+        """
+        stats = self.values.get(label_values)
+
+        if stats is None:
+            stats = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+        stats[0][bisect.bisect_left(self.buckets, value)] += 1
+        stats[1] += value
+        stats[2] += 1
+
+    def summary(self, *label_values) -> tuple:
+        """
+        Args:
+            *label_values: label values, same order as label names
+
+        Returns: tuple, (count, sum) of observations
+        """
+        stats = self.values.get(label_values)
+
+        return (stats[2], stats[1]) if stats is not None else (0, 0.0)
+
+    def render(self) -> list[str]:
+        """
+        Returns: list[str], exposition lines
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+
+        for label_values, (counts, total, count) in self.values.items():
+            cumulative = 0
+
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, label_values, le)} {cumulative}")
+
+            lines.append(f"{self.name}_sum{format_labels(self.labels, label_values)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, label_values)} {count}")
+
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Bot metrics, created on first use (same name, same metric) and rendered in Prometheus text format
+    """
+    def __init__(self, prefix: str = METRICS_PREFIX) -> None:
+        """
+        Args:
+            prefix: str, prepended to every metric name
+        """
+        self.prefix = prefix
+        # name -> metric
+        self.metrics = {}
+
+    def counter(self, name: str, documentation: str, labels: tuple = ()) -> Counter:
+        """
+        Args:
+            name: str, metric name (without prefix, "_total" suffix expected)
+            documentation: str, metric help
+            labels: tuple, label names
+
+        Returns: Counter
+        """
+        if name not in self.metrics:
+            self.metrics[name] = Counter(self.prefix + name, documentation, labels)
+
+        return self.metrics[name]
+
+    def gauge(self, name: str, documentation: str, labels: tuple = (),
+              collect: Optional[Callable[[], dict]] = None) -> Gauge:
+        """
+        Args:
+            name: str, metric name (without prefix)
+            documentation: str, metric help
+            labels: tuple, label names
+            collect: Optional[Callable[[], dict]], returns label values -> value on each scrape (see Gauge), replaces
+                     the previous one (e.g. new sender on the same registry)
+
+        Returns: Gauge
+        """
+        if name not in self.metrics:
+            self.metrics[name] = Gauge(self.prefix + name, documentation, labels, collect)
+
+        elif collect is not None:
+            self.metrics[name].collect = collect
+
+        return self.metrics[name]
+
+    def histogram(self, name: str, documentation: str, labels: tuple = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        """
+        Args:
+            name: str, metric name (without prefix)
+            documentation: str, metric help
+            labels: tuple, label names
+            buckets: tuple, sorted bucket upper bounds
+
+        Returns: Histogram
+        """
+        if name not in self.metrics:
+            self.metrics[name] = Histogram(self.prefix + name, documentation, labels, buckets)
+
+        return self.metrics[name]
+
+    def render(self) -> str:
+        """
+        Returns: str, every metric in Prometheus text format
+        """
+        lines = []
+
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Local HTTP endpoint serving the registry on /metrics
+    """
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> None:
+        """
+        Args:
+            registry: MetricsRegistry, metrics to serve
+            port: int, port to listen on
+            host: str, interface to listen on
+        """
+        self.registry = registry
+        self.port = port
+        self.host = host
+        self.runner: Optional[web.AppRunner] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Args:
+            request: web.Request
+
+        Returns: web.Response, metrics in Prometheus text format
+        """
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self) -> None:
+        """
+        Starts serving - has to be called inside the running event loop. The bot runs without metrics if the port
+        can't be bound (e.g. already used by another instance).
+
+        Returns: None
+        """
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+
+        try:
+            await web.TCPSite(self.runner, self.host, self.port).start()
+
+        except OSError as e:
+            logging.warning(f"Could not serve metrics on {self.host}:{self.port}, metrics not exposed: {e!r}")
+            await self.stop()
+            return
+
+        logging.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        """
+        Returns: None
+        """
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
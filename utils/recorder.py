@@ -0,0 +1,165 @@
+###############################################################################
+#
+# File:      recorder.py
+# Author(s): Nico
+# Scope:     Recording of API traffic to compressed segment files, for replay
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import os
+import gzip
+import json
+import time
+import queue
+import struct
+import logging
+import threading
+
+from typing import Iterator, Optional
+from utils.defines import RECORD_SEGMENT_MB
+
+# Record length prefix (big-endian unsigned int)
+LENGTH = struct.Struct(">I")
+# Segment files extension
+SEGMENT_SUFFIX = ".seg.gz"
+
+
+class ApiRecorder:
+    """
+    Writes every recorded API call (timestamp, route, payload, status, body, duration) as a length-prefixed JSON
+    record in gzip segment files, rotated on size. Records are written by a background thread (no I/O in the event
+    loop).
+    """
+    def __init__(self, directory: str, segment_bytes: int = RECORD_SEGMENT_MB * 1024 * 1024) -> None:
+        """
+        Args:
+            directory: str, where segment files are written (created if needed)
+            segment_bytes: int, uncompressed size in bytes after which a new segment is started
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.queue = queue.SimpleQueue()
+        self.file: Optional[gzip.GzipFile] = None
+        self.written = 0
+        # Metrics
+        self.records = 0
+        self.segments = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.thread = threading.Thread(target=self.write_forever, name="api-recorder", daemon=True)
+        self.thread.start()
+
+    def record(self, method: str, route: str, payload: Optional[dict], status_code: int, text: str, start: float,
+               duration: float) -> None:
+        """
+        Args:
+            method: str, HTTP method
+            route: str, API route
+            payload: Optional[dict], sent body
+            status_code: int, HTTP status code
+            text: str, response body
+            start: float, call timestamp
+            duration: float, call duration in seconds
+
+        Returns: None
+        """
+        self.queue.put({"ts": start, "duration": round(duration, 4), "method": method, "route": route,
+                        "payload": payload, "status": status_code, "text": text})
+
+    def open_segment(self) -> None:
+        """
+        Closes the current segment, starts a new one
+
+        Returns: None
+        """
+        if self.file is not None:
+            self.file.close()
+
+        self.segments += 1
+        path = os.path.join(self.directory, f"api-{time.time_ns() // 1000000}-{self.segments:04d}{SEGMENT_SUFFIX}")
+        self.file = gzip.open(path, "wb")
+        self.written = 0
+
+        logging.info(f"Recording API calls in {path}")
+
+    def write_forever(self) -> None:
+        """
+        Writer thread loop, until close() is called
+
+        Returns: None
+        """
+        while True:
+            record = self.queue.get()
+
+            if record is None:
+                break
+
+            try:
+                if self.file is None or self.written >= self.segment_bytes:
+                    self.open_segment()
+
+                data = json.dumps(record, separators=(",", ":")).encode("utf-8")
+                self.file.write(LENGTH.pack(len(data)) + data)
+                self.written += LENGTH.size + len(data)
+                self.records += 1
+
+                # Make what is recorded readable as soon as the bot is idle
+                if self.queue.empty():
+                    self.file.flush()
+
+            except Exception as e:
+                logging.error(f"Could not record API call {record['method']} {record['route']}: {e!r}")
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def close(self) -> None:
+        """
+        Writes pending records, closes the current segment
+
+        Returns: None
+        """
+        self.queue.put(None)
+        self.thread.join()
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, recorder metrics
+        """
+        return {"records": self.records, "segments": self.segments, "pending": self.queue.qsize()}
+
+
+def read_records(directory: str) -> Iterator[dict]:
+    """
+    Reads the records of every segment of a directory, oldest segment first. A truncated segment (bot killed while
+    recording) is read up to its last complete record.
+
+    Args:
+        directory: str, recording directory
+
+    Returns: Iterator[dict], records
+    """
+    for name in sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX)):
+        path = os.path.join(directory, name)
+
+        try:
+            with gzip.open(path, "rb") as file:
+                while True:
+                    prefix = file.read(LENGTH.size)
+
+                    if len(prefix) < LENGTH.size:
+                        break
+
+                    (length,) = LENGTH.unpack(prefix)
+                    data = file.read(length)
+
+                    if len(data) < length:
+                        break
+
+                    yield json.loads(data)
+
+        except (EOFError, gzip.BadGzipFile) as e:
+            logging.warning(f"Segment {path} is truncated, read up to its last complete record: {e!r}")
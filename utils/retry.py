@@ -0,0 +1,126 @@
+###############################################################################
+#
+# File:      retry.py
+# Author(s): Nico
+# Scope:     Retries with jittered backoff and per route circuit breakers
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import time
+import random
+import logging
+import aiohttp
+
+from utils.defines import RETRY_BASE_DELAY, RETRY_MAX_DELAY, BREAKER_MAX_FAILURES, BREAKER_COOLDOWN
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """
+    Raised instead of calling a route whose circuit breaker is open
+    """
+
+
+def backoff_delay(attempt: int, base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY) -> float:
+    """
+    Exponential backoff with full jitter (random delay between 0 and base_delay * 2 ** attempt, capped)
+
+    Args:
+        attempt: int, number of failed attempts so far minus one (0 for the first retry)
+        base_delay: float, first retry max delay in seconds
+        max_delay: float, max delay in seconds
+
+    Returns: float, delay in seconds before the next attempt
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Stops calling a route after max_failures failures in a row (open), for cooldown seconds.
+    Then lets one trial call go through (half open): success closes the circuit, failure opens it again.
+    """
+    def __init__(self, name: str, max_failures: int = BREAKER_MAX_FAILURES,
+                 cooldown: float = BREAKER_COOLDOWN) -> None:
+        """
+        Args:
+            name: str, protected route (for logs)
+            max_failures: int, failures in a row opening the circuit
+            cooldown: float, time in seconds the circuit stays open
+        """
+        self.name = name
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        # Metrics
+        self.opened = 0
+        self.rejected = 0
+
+    def check(self) -> bool:
+        """
+        To be called before each call
+
+        Returns: bool, whether the call is the half open trial (see release), raises CircuitOpenError if the call must
+                 not be made
+        """
+        if self.state == "closed":
+            return False
+
+        if self.state == "open" and time.time() - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+            self.trial_in_flight = False
+
+        if self.state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+
+        self.rejected += 1
+        raise CircuitOpenError(f"Circuit open for route {self.name}")
+
+    def record_success(self) -> None:
+        """
+        Returns: None
+        """
+        if self.state != "closed":
+            logging.info(f"Circuit closed for route {self.name}")
+
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """
+        Returns: None
+        """
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+
+        if self.state == "half_open" or self.consecutive_failures >= self.max_failures:
+            if self.state != "open":
+                self.opened += 1
+                logging.warning(f"Circuit opened for route {self.name} for {self.cooldown} seconds "
+                                f"({self.consecutive_failures} failures in a row)")
+
+            self.state = "open"
+            self.opened_at = time.time()
+
+    def release(self) -> None:
+        """
+        To be called once the trial call is over, whatever its outcome: a trial ending without success or failure
+        (cancelled, unexpected error) must not keep the circuit open for good
+
+        Returns: None
+        """
+        self.trial_in_flight = False
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, breaker metrics
+        """
+        return {"state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "opened": self.opened,
+                "rejected": self.rejected}
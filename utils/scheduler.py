@@ -0,0 +1,139 @@
+###############################################################################
+#
+# File:      scheduler.py
+# Author(s): Nico
+# Scope:     Adaptive polling interval of the global clothes request
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import logging
+
+from utils.defines import WAIT_TIME, PER_PAGE, POLL_MIN_INTERVAL, POLL_MAX_QUIET_INTERVAL, \
+    POLL_MAX_ERROR_INTERVAL, POLL_SATURATION, POLL_BACKOFF
+
+
+class PollScheduler:
+    """
+    Decides how long to wait before the next API call, from what the previous calls returned:
+    - page nearly full of new clothes: we may miss some, poll faster (down to min_interval)
+    - no new clothe: quiet period, slowly back off (up to max_quiet_interval)
+    - otherwise: come back to the base interval
+    - API error: exponential backoff (up to max_error_interval)
+    """
+    def __init__(self,
+                 base_interval: float = float(WAIT_TIME),
+                 min_interval: float = POLL_MIN_INTERVAL,
+                 max_quiet_interval: float = POLL_MAX_QUIET_INTERVAL,
+                 max_error_interval: float = POLL_MAX_ERROR_INTERVAL,
+                 saturation: float = POLL_SATURATION,
+                 backoff: float = POLL_BACKOFF,
+                 per_page: int = int(PER_PAGE)) -> None:
+        """
+        Args:
+            base_interval: float, interval in seconds in normal conditions
+            min_interval: float, min interval in seconds
+            max_quiet_interval: float, max interval in seconds when no new clothe shows up
+            max_error_interval: float, max interval in seconds when the API fails
+            saturation: float, part of a page being new above which we poll faster (0 to 1)
+            backoff: float, multiplying factor when backing off
+            per_page: int, API page size
+        """
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_quiet_interval = max_quiet_interval
+        self.max_error_interval = max_error_interval
+        self.saturation = saturation
+        self.backoff = backoff
+        self.per_page = per_page
+        self.interval = base_interval
+        self.consecutive_errors = 0
+        # Metrics
+        self.decision = "base"
+        self.ema_new_items = 0.0
+        self.speedups = 0
+        self.slowdowns = 0
+        self.errors = 0
+        self.overflows = 0
+        self.extra_pages = 0
+        self.unresolved_overflows = 0
+        self.possibly_missed = 0
+
+    def record(self, new_items: int) -> float:
+        """
+        Records a successful API call
+
+        Args:
+            new_items: int, number of new clothes in the returned page
+
+        Returns: float, interval in seconds to wait before the next call
+        """
+        self.consecutive_errors = 0
+        self.ema_new_items = 0.8 * self.ema_new_items + 0.2 * new_items
+
+        if new_items >= self.saturation * self.per_page:
+            self.interval = max(self.min_interval, min(self.interval, self.base_interval) / self.backoff)
+            self.decision = "saturated"
+            self.speedups += 1
+
+        elif new_items == 0:
+            self.interval = min(self.max_quiet_interval, max(self.interval, self.base_interval) * self.backoff)
+            self.decision = "quiet"
+            self.slowdowns += 1
+
+        else:
+            self.interval = self.base_interval
+            self.decision = "base"
+
+        return self.interval
+
+    def record_error(self) -> float:
+        """
+        Records a failed API call
+
+        Returns: float, interval in seconds to wait before the next call
+        """
+        self.errors += 1
+        self.consecutive_errors += 1
+        self.interval = min(self.max_error_interval, self.base_interval * 2 ** self.consecutive_errors)
+        self.decision = "error"
+
+        logging.warning(f"API error #{self.consecutive_errors} in a row, next call in {self.interval} seconds")
+
+        return self.interval
+
+    def record_overflow(self, pages: int, resolved: bool) -> None:
+        """
+        Records a page overflow (whole page of new clothes, next pages fetched)
+
+        Args:
+            pages: int, number of fetched pages (first one included)
+            resolved: bool, whether we reconnected with already seen clothes
+
+        Returns: None
+        """
+        self.overflows += 1
+        self.extra_pages += pages - 1
+
+        if not resolved:
+            self.unresolved_overflows += 1
+            # Estimate, we can't know how many clothes are beyond the last fetched page: count one more page
+            self.possibly_missed += self.per_page
+
+            logging.warning(f"Page overflow not resolved after {pages} pages, clothes may have been missed")
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, scheduler metrics and last decision
+        """
+        return {"interval": round(self.interval, 3),
+                "decision": self.decision,
+                "ema_new_items": round(self.ema_new_items, 2),
+                "speedups": self.speedups,
+                "slowdowns": self.slowdowns,
+                "errors": self.errors,
+                "consecutive_errors": self.consecutive_errors,
+                "overflows": self.overflows,
+                "extra_pages": self.extra_pages,
+                "unresolved_overflows": self.unresolved_overflows,
+                "possibly_missed": self.possibly_missed}
@@ -0,0 +1,360 @@
+###############################################################################
+#
+# File:      sender.py
+# Author(s): Nico
+# Scope:     Outbound Discord messages scheduling (rate limits and priorities)
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import time
+import heapq
+import asyncio
+import logging
+import discord
+
+from typing import Optional
+from utils.latency import LatencyStats
+from utils.metrics import MetricsRegistry
+from utils.defines import SEND_RATE_PER_CHANNEL, SEND_BURST_PER_CHANNEL, SEND_RATE_GLOBAL, SEND_BURST_GLOBAL, \
+    LOG_MESSAGE_MAX_LENGTH
+
+# Priority lanes, lowest first
+PRIORITY_MATCH = 0
+PRIORITY_STOCK = 1
+PRIORITY_LOG = 2
+PRIORITY_NAMES = {PRIORITY_MATCH: "match", PRIORITY_STOCK: "stock", PRIORITY_LOG: "log"}
+
+
+class TokenBucket:
+    """
+    Token bucket pacing: `rate` tokens per second, at most `burst` tokens saved
+    """
+    def __init__(self, rate: float, burst: int) -> None:
+        """
+        Args:
+            rate: float, tokens per second
+            burst: int, max number of tokens
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        """
+        Takes a token if one is available
+
+        Returns: bool, whether a token was taken
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+
+        return False
+
+    def wait_time(self) -> float:
+        """
+        Returns: float, time in seconds until the next token
+        """
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    async def acquire(self) -> None:
+        """
+        Waits until a token is available and takes it
+
+        Returns: None
+        """
+        while not self.take():
+            await asyncio.sleep(self.wait_time())
+
+
+class PriorityTokenBucket(TokenBucket):
+    """
+    Token bucket shared by every channel worker: when tokens run short, waiting workers get them by priority lane
+    (match posts, then stock posts, then logs), then in arrival order
+    """
+    def __init__(self, rate: float, burst: int) -> None:
+        """
+        Args:
+            rate: float, tokens per second
+            burst: int, max number of tokens
+        """
+        super().__init__(rate, burst)
+        # Heap of (priority, sequence, future) waiting for a token
+        self.waiters = []
+        self.sequence = 0
+        self.dispatcher: Optional[asyncio.Task] = None
+
+    async def acquire(self, priority: int = PRIORITY_MATCH) -> None:
+        """
+        Waits until a token is given to this priority lane and takes it
+
+        Args:
+            priority: int, priority lane
+
+        Returns: None
+        """
+        if not self.waiters and self.take():
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self.sequence += 1
+        heapq.heappush(self.waiters, (priority, self.sequence, future))
+
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.create_task(self.dispatch())
+
+        await future
+
+    async def dispatch(self) -> None:
+        """
+        Gives tokens to waiting workers as they come, highest priority first
+
+        Returns: None
+        """
+        while self.waiters:
+            # Worker cancelled while waiting
+            if self.waiters[0][2].done():
+                heapq.heappop(self.waiters)
+
+            elif self.take():
+                heapq.heappop(self.waiters)[2].set_result(None)
+
+            else:
+                await asyncio.sleep(self.wait_time())
+
+    def close(self) -> None:
+        """
+        Stops the dispatcher, waiting workers are left waiting (they are cancelled with it)
+
+        Returns: None
+        """
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+
+        self.waiters = []
+
+
+class MessageScheduler:
+    """
+    Every message the bot posts in a channel goes through here.
+    One priority queue and one worker per channel, paced by a per-channel and a global token bucket so that bursts
+    don't hit Discord rate limits. Match posts go before stock posts, which go before logs: in each channel queue,
+    and for the global bucket tokens shared by every channel. Log messages waiting for the same channel are coalesced
+    into as few messages as possible.
+    """
+    def __init__(self,
+                 channel_rate: float = SEND_RATE_PER_CHANNEL,
+                 channel_burst: int = SEND_BURST_PER_CHANNEL,
+                 global_rate: float = SEND_RATE_GLOBAL,
+                 global_burst: int = SEND_BURST_GLOBAL,
+                 metrics: Optional[MetricsRegistry] = None) -> None:
+        """
+        Args:
+            channel_rate: float, messages per second per channel
+            channel_burst: int, max burst of messages per channel
+            global_rate: float, messages per second for the whole bot
+            global_burst: int, max burst of messages for the whole bot
+            metrics: Optional[MetricsRegistry], where to export send metrics (own registry if None)
+        """
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
+        self.global_bucket = PriorityTokenBucket(global_rate, global_burst)
+        # channel_id -> (channel, priority queue, token bucket, worker task)
+        self.channels = {}
+        # channel_id -> pending log messages
+        self.pending_logs = {}
+        self.sequence = 0
+        # Metrics
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.latencies = LatencyStats()
+        self.metrics = metrics or MetricsRegistry()
+        self.messages_total = self.metrics.counter("messages_total", "Messages sent to Discord",
+                                                   ("priority", "outcome"))
+        self.send_seconds = self.metrics.histogram("send_seconds", "Time from enqueue to sent message", ("priority",))
+        self.metrics.gauge("sender_queued_messages", "Messages waiting in each channel queue", ("channel_id",),
+                           collect=self.collect_queued)
+        self.metrics.gauge("sender_global_waiters", "Channel workers waiting for a global token, by priority",
+                           ("priority",), collect=self.collect_global_waiters)
+
+    def get_queue(self, channel: discord.abc.Messageable) -> asyncio.PriorityQueue:
+        """
+        Gets the queue of a channel, starts its worker on first use
+
+        Args:
+            channel: discord.abc.Messageable, channel to post in
+
+        Returns: asyncio.PriorityQueue
+        """
+        if channel.id not in self.channels:
+            queue = asyncio.PriorityQueue()
+            bucket = TokenBucket(self.channel_rate, self.channel_burst)
+            worker = asyncio.create_task(self.work(channel, queue, bucket))
+            self.channels[channel.id] = (channel, queue, bucket, worker)
+
+        return self.channels[channel.id][1]
+
+    def enqueue(self, channel: discord.abc.Messageable, priority: int, kwargs: Optional[dict]) -> asyncio.Future:
+        """
+        Args:
+            channel: discord.abc.Messageable, channel to post in
+            priority: int, priority lane
+            kwargs: Optional[dict], channel.send arguments (None for a coalesced logs flush)
+
+        Returns: asyncio.Future, resolved with the sent message
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.sequence += 1
+        self.get_queue(channel).put_nowait((priority, self.sequence, time.monotonic(), kwargs, future))
+
+        return future
+
+    def send(self, channel: discord.abc.Messageable, priority: int = PRIORITY_MATCH, **kwargs) -> asyncio.Future:
+        """
+        Schedules a message
+
+        Args:
+            channel: discord.abc.Messageable, channel to post in
+            priority: int, priority lane (PRIORITY_MATCH, PRIORITY_STOCK or PRIORITY_LOG)
+            **kwargs: channel.send arguments
+
+        Returns: asyncio.Future, resolved with the sent message (can be awaited or not)
+        """
+        return self.enqueue(channel, priority, kwargs)
+
+    def log(self, channel: Optional[discord.abc.Messageable], content: str) -> None:
+        """
+        Schedules a log message (lowest priority, coalesced with other pending logs of the channel)
+
+        Args:
+            channel: Optional[discord.abc.Messageable], logs channel
+            content: str, message
+
+        Returns: None
+        """
+        if not channel:
+            logging.warning(f"No logs channel to post: {content}")
+            return
+
+        pending = self.pending_logs.setdefault(channel.id, [])
+        pending.append(content)
+
+        # Only one flush queued per channel, next logs are added to it
+        if len(pending) == 1:
+            self.enqueue(channel, PRIORITY_LOG, None)
+
+        else:
+            self.coalesced += 1
+
+    def pop_logs(self, channel_id: int) -> list[str]:
+        """
+        Joins pending logs of a channel into messages fitting Discord max length
+
+        Args:
+            channel_id: int, logs channel id
+
+        Returns: list[str], messages to send
+        """
+        messages = []
+
+        for content in self.pending_logs.pop(channel_id, []):
+            if messages and len(messages[-1]) + len(content) + 1 <= LOG_MESSAGE_MAX_LENGTH:
+                messages[-1] += "\n" + content
+
+            else:
+                messages.append(content[:LOG_MESSAGE_MAX_LENGTH])
+
+        return messages
+
+    async def work(self, channel: discord.abc.Messageable, queue: asyncio.PriorityQueue,
+                   bucket: TokenBucket) -> None:
+        """
+        Channel worker, sends queued messages in priority order
+
+        Args:
+            channel: discord.abc.Messageable, channel to post in
+            queue: asyncio.PriorityQueue, channel queue
+            bucket: TokenBucket, channel pacing
+
+        Returns: None
+        """
+        while True:
+            priority, _, enqueued_at, kwargs, future = await queue.get()
+            all_kwargs = [kwargs] if kwargs is not None else [{"content": content}
+                                                              for content in self.pop_logs(channel.id)]
+            message = None
+
+            try:
+                for send_kwargs in all_kwargs:
+                    await bucket.acquire()
+                    await self.global_bucket.acquire(priority)
+                    message = await channel.send(**send_kwargs)
+                    self.sent += 1
+                    self.messages_total.inc(PRIORITY_NAMES[priority], "sent")
+
+                self.latencies.record(PRIORITY_NAMES[priority], time.monotonic() - enqueued_at)
+                self.send_seconds.observe(time.monotonic() - enqueued_at, PRIORITY_NAMES[priority])
+
+                if not future.done():
+                    future.set_result(message)
+
+            except Exception as e:
+                self.failed += 1
+                self.messages_total.inc(PRIORITY_NAMES[priority], "failed")
+                logging.error(f"Could not send message in channel {channel} ({PRIORITY_NAMES[priority]}): {e}")
+
+                if not future.done():
+                    future.set_exception(e)
+                    # Nobody may be waiting for it (logs)
+                    future.exception()
+
+    def close(self) -> None:
+        """
+        Stops every channel worker
+
+        Returns: None
+        """
+        for _, queue, _, worker in self.channels.values():
+            worker.cancel()
+
+        self.global_bucket.close()
+
+        self.channels = {}
+        self.pending_logs = {}
+
+    def collect_queued(self) -> dict:
+        """
+        Returns: dict, (channel_id,) -> number of messages waiting in its queue (sender_queued_messages gauge)
+        """
+        return {(channel_id,): queue.qsize() for channel_id, (_, queue, _, _) in self.channels.items()}
+
+    def collect_global_waiters(self) -> dict:
+        """
+        Returns: dict, (priority name,) -> number of channel workers waiting for a global token
+                 (sender_global_waiters gauge)
+        """
+        waiters = {(name,): 0 for name in PRIORITY_NAMES.values()}
+
+        for priority, _, future in self.global_bucket.waiters:
+            if not future.done():
+                waiters[(PRIORITY_NAMES[priority],)] += 1
+
+        return waiters
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, scheduler metrics (queue depths, totals, send latencies from enqueue)
+        """
+        return {"queued": sum(queue.qsize() for _, queue, _, _ in self.channels.values()),
+                "max_channel_queue": max([queue.qsize() for _, queue, _, _ in self.channels.values()], default=0),
+                "sent": self.sent,
+                "failed": self.failed,
+                "coalesced": self.coalesced,
+                "latencies": self.latencies.stats()}
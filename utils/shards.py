@@ -0,0 +1,159 @@
+###############################################################################
+#
+# File:      shards.py
+# Author(s): Nico
+# Scope:     Query planner splitting the global clothes request into shards
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import time
+import logging
+
+from typing import Optional
+from utils.scheduler import PollScheduler
+from utils.utils import reformat_list_strings, get_publish_timestamp
+from utils.defines import SHARD_SIZE, BRANDS, CLOTHES_STATES
+
+
+class Shard:
+    """
+    One global clothes request (a few brands and their watched states), polled on its own schedule
+    """
+    def __init__(self, brand_ids: list[str], status_ids: list[str], carried: Optional[dict] = None) -> None:
+        """
+        Args:
+            brand_ids: list[str], brand ids to query
+            status_ids: list[str], status ids to query
+            carried: Optional[dict], (brand_id, status_id) -> (highest clothe id seen or None, last poll timestamp),
+                     pairs already polled by the shards this one replaces
+        """
+        self.key = (tuple(brand_ids), tuple(status_ids))
+        self.brand_ids = reformat_list_strings(brand_ids, "brand_ids")
+        self.status_ids = reformat_list_strings(status_ids)
+        self.poller = PollScheduler()
+        self.next_due = time.time()
+        # First poll: clothes already there are not posted, or only the recent ones when catching up (restart)
+        self.first_poll = True
+        self.catch_up = False
+        # (brand_id, status_id) -> highest clothe id seen so far, and last poll timestamp (None: not polled yet)
+        self.high_ids = {}
+        self.last_poll: Optional[float] = None
+        # Pairs polled before this shard existed: on the first poll, their clothes newer than what the previous
+        # shards saw are still posted
+        pairs = {(brand_id, status_id) for brand_id in brand_ids for status_id in status_ids}
+        self.carried = {pair: mark for pair, mark in (carried or {}).items() if pair in pairs}
+
+    def observe(self, clothes: list, polled_at: float) -> None:
+        """
+        Keeps track of the newest clothe of each pair, for the shards that may replace this one
+
+        Args:
+            clothes: list, clothes returned by a poll
+            polled_at: float, poll timestamp
+
+        Returns: None
+        """
+        for clothe in clothes:
+            pair = clothe_pair(clothe)
+            clothe_id = int(clothe["id"])
+
+            if clothe_id > self.high_ids.get(pair, 0):
+                self.high_ids[pair] = clothe_id
+
+        self.last_poll = polled_at
+
+    def marks(self) -> dict:
+        """
+        Returns: dict, (brand_id, status_id) -> (highest clothe id seen or None, last poll timestamp) of the pairs
+                 polled so far (carried marks if this shard was never polled)
+        """
+        if self.last_poll is None:
+            return dict(self.carried)
+
+        return {(brand_id, status_id): (self.high_ids.get((brand_id, status_id)), self.last_poll)
+                for brand_id in self.key[0] for status_id in self.key[1]}
+
+    def is_carried_new(self, clothe: dict) -> bool:
+        """
+        Args:
+            clothe: dict, clothe found by the first poll of this shard
+
+        Returns: bool, whether its brand and state were polled before this shard existed, and it is newer than what
+                 was seen then (Vinted ids increase over time): higher id, or published after the last poll
+        """
+        mark = self.carried.get(clothe_pair(clothe))
+
+        if mark is None:
+            return False
+
+        high_id, last_poll = mark
+        publish_ts = get_publish_timestamp(clothe)
+
+        return (high_id is not None and int(clothe["id"]) > high_id) or \
+            (publish_ts != "NA" and publish_ts > last_poll)
+
+    def __repr__(self) -> str:
+        return f"Shard(brand_ids={self.brand_ids}, status_ids={self.status_ids})"
+
+
+def clothe_pair(clothe: dict) -> tuple:
+    """
+    Args:
+        clothe: dict, clothe returned by the API
+
+    Returns: tuple, (brand_id, status_id) of the clothe (None for unknown ones)
+    """
+    return BRANDS.get(clothe["brand_title"]), CLOTHES_STATES.get(clothe["status"])
+
+
+def plan_shards(requests: dict, previous: dict, shard_size: int = SHARD_SIZE) -> dict:
+    """
+    Splits watched brands into shards of shard_size brands, each one querying the states watched for its brands.
+    Unwatched brands are not queried. Unchanged shards are kept (with their schedule), new ones are staggered over
+    the base polling interval.
+
+    Args:
+        requests: dict, request_id -> clothe request
+        previous: dict, current shards (key -> Shard)
+        shard_size: int, max number of brands per shard
+
+    Returns: dict, key -> Shard
+    """
+    # brand_id -> watched status ids
+    watched = {}
+
+    for request in requests.values():
+        statuses = watched.setdefault(str(request["brand_ids"]), set())
+        statuses.update(status_id.strip() for status_id in str(request["status_ids"]).split(","))
+
+    brands = sorted(watched)
+    shards = {}
+    new_shards = []
+    # (brand_id, status_id) pairs polled so far -> what was seen of them: a re-planned shard must not drop their new
+    # clothes, nor post their old ones
+    polled = {}
+
+    for shard in previous.values():
+        polled.update(shard.marks())
+
+    for index in range(0, len(brands), shard_size):
+        brand_ids = brands[index:index + shard_size]
+        status_ids = sorted(set().union(*(watched[brand_id] for brand_id in brand_ids)))
+        key = (tuple(brand_ids), tuple(status_ids))
+
+        if key in previous:
+            shards[key] = previous[key]
+
+        else:
+            shards[key] = Shard(brand_ids, status_ids, polled)
+            new_shards.append(shards[key])
+
+    # Stagger new shards not to send all requests at once
+    for index, shard in enumerate(new_shards):
+        shard.next_due = time.time() + index * shard.poller.base_interval / len(new_shards)
+
+    if new_shards or len(shards) != len(previous):
+        logging.info(f"Planned {len(shards)} shard(s): {list(shards.values())}")
+
+    return shards
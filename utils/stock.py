@@ -0,0 +1,149 @@
+###############################################################################
+#
+# File:      stock.py
+# Author(s): Nico
+# Scope:     Local index of clothes ids in stock
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import asyncio
+import logging
+
+from typing import Optional
+from utils.api_client import ApiClient
+from utils.defines import GET_CLOTHES_FROM_STOCK_ROUTE, STOCK_RECONCILE_INTERVAL
+
+
+class StockIndex:
+    """
+    Ids of clothes in stock, kept in memory so that AutoBuy checks duplicates without calling the API.
+    Seeded on startup, updated on autobuy/sell/delete, periodically reconciled with the API (local changes made
+    while a reconciliation is in flight are applied on top of its result).
+    """
+    def __init__(self, api: ApiClient, reconcile_interval: float = STOCK_RECONCILE_INTERVAL) -> None:
+        """
+        Args:
+            api: ApiClient, shared API client
+            reconcile_interval: float, time in seconds between two reconciliations with the API
+        """
+        self.api = api
+        self.reconcile_interval = reconcile_interval
+        self.ids = set()
+        # Local changes (clothe_id, in stock) since the in-flight refresh started, None if no refresh in flight
+        self.pending: Optional[list] = None
+        self.reconcile_task: Optional[asyncio.Task] = None
+        # Metrics
+        self.reconciliations = 0
+        self.drifts = 0
+
+    def __contains__(self, clothe_id) -> bool:
+        return str(clothe_id) in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, clothe_id) -> None:
+        """
+        Args:
+            clothe_id: Vinted clothe id, now in stock
+
+        Returns: None
+        """
+        self.ids.add(str(clothe_id))
+
+        if self.pending is not None:
+            self.pending.append((str(clothe_id), True))
+
+    def discard(self, clothe_id) -> None:
+        """
+        Args:
+            clothe_id: Vinted clothe id, no longer in stock (sold or deleted)
+
+        Returns: None
+        """
+        self.ids.discard(str(clothe_id))
+
+        if self.pending is not None:
+            self.pending.append((str(clothe_id), False))
+
+    async def refresh(self) -> None:
+        """
+        Replaces the index with the clothes in stock according to the API
+
+        Returns: None, raises an exception if the API call fails
+        """
+        self.pending = []
+
+        try:
+            clothes_in_stock = await self.api.get(GET_CLOTHES_FROM_STOCK_ROUTE, {"which": "in_stock"})
+
+            if clothes_in_stock.status_code != 200:
+                logging.error(f"There was an issue while retrieving in_stock clothes (API status_code: "
+                              f"{clothes_in_stock.status_code})")
+                raise Exception(f"Could not retrieve in_stock clothes (API status_code: "
+                                f"{clothes_in_stock.status_code})")
+
+            stock_clothes = clothes_in_stock.data["found_clothes"]
+            ids = {str(clothe["clothe_id"]) for clothe in stock_clothes if clothe["state"] == "in_stock"}
+
+            # Local changes made during the API call are more recent
+            for clothe_id, in_stock in self.pending:
+                if in_stock:
+                    ids.add(clothe_id)
+
+                else:
+                    ids.discard(clothe_id)
+
+        finally:
+            self.pending = None
+
+        if self.reconciliations and ids != self.ids:
+            self.drifts += 1
+            logging.warning(f"Stock index out of sync with the API ({len(self.ids - ids)} removed, "
+                            f"{len(ids - self.ids)} added), reconciled")
+
+        self.ids = ids
+        self.reconciliations += 1
+
+        logging.info(f"Found following clothes ids (in_stock mode): {sorted(self.ids)}")
+
+    def start_reconciling(self) -> None:
+        """
+        Starts reconciling with the API in background - has to be called inside the running event loop
+
+        Returns: None
+        """
+        if self.reconcile_task is None or self.reconcile_task.done():
+            self.reconcile_task = asyncio.create_task(self.reconcile_forever())
+
+    async def reconcile_forever(self) -> None:
+        """
+        Reconciliation loop
+
+        Returns: None
+        """
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+
+            try:
+                await self.refresh()
+
+            except Exception as e:
+                logging.warning(f"Could not reconcile stock index, will retry: {e!r}")
+
+    def close(self) -> None:
+        """
+        Stops reconciling
+
+        Returns: None
+        """
+        if self.reconcile_task is not None:
+            self.reconcile_task.cancel()
+            self.reconcile_task = None
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, index metrics
+        """
+        return {"size": len(self.ids), "reconciliations": self.reconciliations, "drifts": self.drifts}
@@ -0,0 +1,110 @@
+###############################################################################
+#
+# File:      store.py
+# Author(s): Nico
+# Scope:     Local store of posted clothes, read when a post button is clicked
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import json
+import time
+import sqlite3
+import logging
+import discord
+
+from typing import Optional
+from utils.defines import POSTED_STORE_MAX_AGE, POSTED_STORE_PRUNE_EVERY
+
+
+class PostedStore:
+    """
+    Clothes posted with buy buttons, with their embeds (one row per clothe, whatever the number of posts), so that
+    buttons only carry ids in their custom_id. Rows older than max_age are pruned (their buttons stop working).
+    In memory if no file is given.
+    """
+    def __init__(self, path: Optional[str] = None, max_age: float = POSTED_STORE_MAX_AGE,
+                 prune_every: int = POSTED_STORE_PRUNE_EVERY) -> None:
+        """
+        Args:
+            path: Optional[str], SQLite file
+            max_age: float, time in seconds a posted clothe is kept
+            prune_every: int, number of saves between two prunes
+        """
+        self.path = path
+        self.max_age = max_age
+        self.prune_every = prune_every
+        self.db = sqlite3.connect(path or ":memory:")
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS posted (clothe_id INTEGER PRIMARY KEY, posted_at REAL NOT NULL, "
+                        "clothe TEXT NOT NULL, embeds TEXT NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS posted_at_index ON posted (posted_at)")
+        self.db.commit()
+        # Metrics
+        self.saves = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.prune()
+
+    def save(self, clothe: dict, embeds: list[discord.Embed]) -> None:
+        """
+        Args:
+            clothe: dict, clothe dict
+            embeds: list[discord.Embed], posted embeds
+
+        Returns: None
+        """
+        self.db.execute("INSERT OR REPLACE INTO posted VALUES (?, ?, ?, ?)",
+                        (int(clothe["id"]), time.time(), json.dumps(clothe, separators=(",", ":")),
+                         json.dumps([embed.to_dict() for embed in embeds], separators=(",", ":"))))
+        self.db.commit()
+        self.saves += 1
+
+        if self.saves % self.prune_every == 0:
+            self.prune()
+
+    def load(self, clothe_id) -> Optional[tuple]:
+        """
+        Args:
+            clothe_id: Vinted clothe id
+
+        Returns: Optional[tuple], (clothe dict, list of discord.Embed), None if unknown or pruned
+        """
+        row = self.db.execute("SELECT clothe, embeds FROM posted WHERE clothe_id = ?", (int(clothe_id),)).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return json.loads(row[0]), [discord.Embed.from_dict(embed) for embed in json.loads(row[1])]
+
+    def prune(self) -> None:
+        """
+        Removes clothes older than max_age
+
+        Returns: None
+        """
+        removed = self.db.execute("DELETE FROM posted WHERE posted_at < ?", (time.time() - self.max_age,)).rowcount
+        self.db.commit()
+
+        if removed:
+            logging.info(f"Pruned {removed} posted clothe(s) from store")
+
+    def close(self) -> None:
+        """
+        Returns: None
+        """
+        self.db.close()
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, store metrics
+        """
+        return {"size": self.db.execute("SELECT COUNT(*) FROM posted").fetchone()[0],
+                "saves": self.saves,
+                "hits": self.hits,
+                "misses": self.misses}
@@ -0,0 +1,438 @@
+###############################################################################
+#
+# File:      stub_api.py
+# Author(s): Nico
+# Scope:     Local stand-ins for vintedbot_api, for offline benchmarks and replays
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import os
+import json
+import time
+import bisect
+import random
+import asyncio
+import datetime
+import logging
+
+from aiohttp import web
+from typing import Optional
+from utils.api_client import ApiResponse
+from utils.recorder import read_records
+from utils.defines import GET_CLOTHES_ROUTE, USER_INFOS_ROUTE, GET_IMAGES_URL_ROUTE, BRANDS, CLOTHES_STATES, \
+    PER_PAGE
+
+# Words used in synthetic clothes titles (and synthetic requests search texts)
+TITLE_WORDS = ("veste", "pull", "sweat", "hoodie", "jean", "pantalon", "chemise", "t-shirt", "polo", "doudoune",
+               "parka", "gilet", "short", "cargo", "vintage", "logo", "zip", "laine", "coton", "noir", "bleu",
+               "vert", "beige", "gris", "oversize", "brodé", "rétro", "technique", "gore-tex", "cachemire")
+SIZES = ("XS", "S", "M", "L", "XL", "XXL")
+
+
+def load_clothes(path: str) -> list:
+    """
+    Loads recorded GET_CLOTHES_ROUTE payloads: a recording directory (see --record), or a JSON lines file with one
+    JSON document per line, either an API response body ({"data": ...}) or a list of clothes
+
+    Args:
+        path: str, recording directory or JSON lines file
+
+    Returns: list, clothes, each one once (oldest first)
+    """
+    clothes = {}
+
+    if os.path.isdir(path):
+        pages = [ApiResponse(record["status"], record["text"]).data for record in read_records(path)
+                 if record["route"] == GET_CLOTHES_ROUTE and record["status"] == 200]
+
+    else:
+        pages = []
+
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    payload = json.loads(line)
+                    pages.append(ApiResponse(200, line).data if isinstance(payload, dict) else payload)
+
+    for page in pages:
+        for clothe in page:
+            clothes[int(clothe["id"])] = clothe
+
+    return [clothes[clothe_id] for clothe_id in sorted(clothes)]
+
+
+def synthetic_clothes(count: int, seed: int = 0, start_id: int = 4000000000) -> list:
+    """
+    Generates clothes shaped like the API ones (brands and states the bot knows, random titles and prices)
+
+    Args:
+        count: int, number of clothes
+        seed: int, random seed (same seed, same clothes)
+        start_id: int, first clothe id
+
+    Returns: list, clothes (oldest first)
+    """
+    rng = random.Random(seed)
+    brands = sorted(BRANDS)
+    states = sorted(CLOTHES_STATES)
+    published = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=count)
+    clothes = []
+
+    for index in range(count):
+        brand = rng.choice(brands)
+        price = round(rng.uniform(5, 300), 2)
+        clothe_id = start_id + index
+        clothes.append({"id": clothe_id,
+                        "title": f"{brand} {' '.join(rng.sample(TITLE_WORDS, rng.randint(2, 5)))}",
+                        "brand_title": brand,
+                        "status": rng.choice(states),
+                        "size_title": rng.choice(SIZES),
+                        "price_no_fee": str(price),
+                        "service_fee": str(round(0.7 + price * 0.05, 2)),
+                        "total_item_price": str(round(0.7 + price * 1.05, 2)),
+                        "is_photo_suspicious": rng.random() < 0.02,
+                        "seller_id": rng.randint(1, count // 4 + 1),
+                        "url": f"https://www.vinted.fr/items/{clothe_id}",
+                        "created_at_ts": (published + datetime.timedelta(seconds=index)).strftime(
+                            "%Y-%m-%dT%H:%M:%S%z")})
+
+    return clothes
+
+
+class StubApi:
+    """
+    Serves a timeline of clothes the way vintedbot_api serves Vinted: GET_CLOTHES_ROUTE returns the newest published
+    clothes of the requested brands and states, advance() publishes the next ones. Seller infos and images routes
+    answer with fixed data.
+    """
+    def __init__(self, clothes: list, batch: int, initial: int = int(PER_PAGE), latency: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0) -> None:
+        """
+        Args:
+            clothes: list, clothes timeline (oldest first)
+            batch: int, number of clothes published by each advance()
+            initial: int, number of clothes published before the first call
+            latency: float, time in seconds added to each answer
+            host: str, interface to listen on
+            port: int, port to listen on (0: any free port)
+        """
+        self.clothes = clothes
+        # Brand and state ids of each clothe, for filtering
+        self.filters = [(BRANDS.get(clothe["brand_title"]), CLOTHES_STATES.get(clothe["status"]))
+                        for clothe in clothes]
+        self.batch = batch
+        self.published = min(initial, len(clothes))
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.runner: Optional[web.AppRunner] = None
+        # Metrics
+        self.calls = {}
+
+    @property
+    def url(self) -> str:
+        """
+        Returns: str, API base URL (once started)
+        """
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        Returns: bool, whether the whole timeline is published
+        """
+        return self.published >= len(self.clothes)
+
+    def advance(self) -> int:
+        """
+        Publishes the next batch of clothes
+
+        Returns: int, number of clothes published
+        """
+        published = min(self.batch, len(self.clothes) - self.published)
+        self.published += published
+
+        return published
+
+    async def answer(self, route: str, data) -> web.Response:
+        """
+        Args:
+            route: str, called route (for metrics)
+            data: API payload
+
+        Returns: web.Response, API shaped response ({"data": JSON string})
+        """
+        self.calls[route] = self.calls.get(route, 0) + 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        return web.json_response({"data": json.dumps(data)})
+
+    async def get_clothes(self, request: web.Request) -> web.Response:
+        """
+        Args:
+            request: web.Request, body with brand_ids, status_ids, per_page and page
+
+        Returns: web.Response, requested page of published clothes, newest first
+        """
+        payload = await request.json()
+        brand_ids = set(str(payload["brand_ids"]).split(","))
+        status_ids = set(str(payload["status_ids"]).split(","))
+        per_page = int(payload.get("per_page", PER_PAGE))
+        skip = (int(payload.get("page", 1)) - 1) * per_page
+        page = []
+
+        for index in range(self.published - 1, -1, -1):
+            brand_id, status_id = self.filters[index]
+
+            if brand_id in brand_ids and status_id in status_ids:
+                if skip:
+                    skip -= 1
+                    continue
+
+                page.append(self.clothes[index])
+
+                if len(page) == per_page:
+                    break
+
+        return await self.answer(GET_CLOTHES_ROUTE, page)
+
+    async def get_user_infos(self, request: web.Request) -> web.Response:
+        """
+        Args:
+            request: web.Request
+
+        Returns: web.Response, fixed seller ratings
+        """
+        return await self.answer(USER_INFOS_ROUTE, {"number_reviews": 42, "number_stars": 4})
+
+    async def get_images_url(self, request: web.Request) -> web.Response:
+        """
+        Args:
+            request: web.Request, body with the clothe url
+
+        Returns: web.Response, two images urls
+        """
+        clothe_url = (await request.json())["clothe_url"]
+
+        return await self.answer(GET_IMAGES_URL_ROUTE, {"images_url": [f"{clothe_url}/1.jpg", f"{clothe_url}/2.jpg"]})
+
+    async def health(self, request: web.Request) -> web.Response:
+        """
+        Args:
+            request: web.Request
+
+        Returns: web.Response, health checks answer
+        """
+        return web.Response(text="OK")
+
+    async def start(self) -> None:
+        """
+        Starts serving - has to be called inside the running event loop
+
+        Returns: None
+        """
+        app = web.Application()
+        app.router.add_get("/", self.health)
+        app.router.add_get(f"/{GET_CLOTHES_ROUTE}", self.get_clothes)
+        app.router.add_get(f"/{USER_INFOS_ROUTE}", self.get_user_infos)
+        app.router.add_get(f"/{GET_IMAGES_URL_ROUTE}", self.get_images_url)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        # Actual port if any free port was asked
+        self.port = self.runner.addresses[0][1]
+
+        logging.info(f"Stub API serving {len(self.clothes)} clothes on {self.url}")
+
+    async def stop(self) -> None:
+        """
+        Returns: None
+        """
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+def record_key(route: str, payload: Optional[dict]) -> str:
+    """
+    Args:
+        route: str, API route
+        payload: Optional[dict], sent body
+
+    Returns: str, key of a call (same route and body, same key)
+    """
+    return f"{route} {json.dumps(payload, sort_keys=True, default=str)}"
+
+
+class ReplayApi:
+    """
+    Serves recorded API calls back (see ApiRecorder), following the recording clock at `speed` times the original
+    speed: each call gets the latest answer recorded so far (in recording time) to the same call, or to the same
+    route if this exact call was never recorded (e.g. other shards).
+    """
+    def __init__(self, records: list, speed: float = 1.0, replay_latency: bool = False, host: str = "127.0.0.1",
+                 port: int = 0) -> None:
+        """
+        Args:
+            records: list, recorded calls (see read_records)
+            speed: float, replay speed (1: original speed, 10: ten times faster)
+            replay_latency: bool, answer after the recorded call duration (divided by speed)
+            host: str, interface to listen on
+            port: int, port to listen on (0: any free port)
+        """
+        self.speed = speed
+        self.replay_latency = replay_latency
+        self.host = host
+        self.port = port
+        self.runner: Optional[web.AppRunner] = None
+        # Recording clock origin, replay start
+        self.first_ts = min((record["ts"] for record in records), default=0.0)
+        self.started_at = time.time()
+        # call key / route -> (timestamps, records), recording order
+        self.by_key = {}
+        self.by_route = {}
+
+        for record in sorted(records, key=lambda record: record["ts"]):
+            for index, key in ((self.by_key, record_key(record["route"], record["payload"])),
+                               (self.by_route, record["route"])):
+                timestamps, entries = index.setdefault(key, ([], []))
+                timestamps.append(record["ts"])
+                entries.append(record)
+
+        # Metrics
+        self.hits = 0
+        self.fallbacks = 0
+        self.misses = 0
+
+    @property
+    def url(self) -> str:
+        """
+        Returns: str, API base URL (once started)
+        """
+        return f"http://{self.host}:{self.port}"
+
+    def clock(self) -> float:
+        """
+        Returns: float, current recording time
+        """
+        return self.first_ts + (time.time() - self.started_at) * self.speed
+
+    @staticmethod
+    def latest(index: dict, key: str, now: float) -> Optional[dict]:
+        """
+        Args:
+            index: dict, by_key or by_route
+            key: str, call key or route
+            now: float, recording time
+
+        Returns: Optional[dict], latest record before now (first one if none yet), None if never recorded
+        """
+        if key not in index:
+            return None
+
+        timestamps, entries = index[key]
+
+        return entries[max(0, bisect.bisect_right(timestamps, now) - 1)]
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Args:
+            request: web.Request, any API call
+
+        Returns: web.Response, recorded answer (404 if the route was never recorded)
+        """
+        route = request.match_info["route"]
+        payload = await request.json() if request.can_read_body else None
+        now = self.clock()
+        record = self.latest(self.by_key, record_key(route, payload), now)
+
+        if record is not None:
+            self.hits += 1
+
+        else:
+            record = self.latest(self.by_route, route, now)
+
+            if record is None:
+                self.misses += 1
+                logging.warning(f"No recorded answer for {request.method} {route}")
+                return web.json_response({"message": f"{route} not recorded"}, status=404)
+
+            self.fallbacks += 1
+
+        if self.replay_latency:
+            await asyncio.sleep(record["duration"] / self.speed)
+
+        return web.Response(status=record["status"], text=record["text"], content_type="application/json")
+
+    async def health(self, request: web.Request) -> web.Response:
+        """
+        Args:
+            request: web.Request
+
+        Returns: web.Response, health checks answer
+        """
+        return web.Response(text="OK")
+
+    async def start(self) -> None:
+        """
+        Starts serving (and the replay clock) - has to be called inside the running event loop
+
+        Returns: None
+        """
+        app = web.Application()
+        app.router.add_get("/", self.health)
+        app.router.add_route("*", "/{route:.+}", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        # Actual port if any free port was asked
+        self.port = self.runner.addresses[0][1]
+        self.started_at = time.time()
+
+        logging.info(f"Replaying {sum(len(entries) for _, entries in self.by_route.values())} recorded calls on "
+                     f"{self.url} (speed x{self.speed})")
+
+    async def stop(self) -> None:
+        """
+        Returns: None
+        """
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, replay metrics
+        """
+        return {"hits": self.hits, "fallbacks": self.fallbacks, "misses": self.misses,
+                "recording_time": round(self.clock() - self.first_ts, 1)}
+
+
+async def serve_replay(directory: str, speed: float, replay_latency: bool, host: str, port: int) -> None:
+    """
+    Serves a recording until interrupted
+
+    Args:
+        directory: str, recording directory
+        speed: float, replay speed
+        replay_latency: bool, answer after the recorded call durations
+        host: str, interface to listen on
+        port: int, port to listen on
+
+    Returns: None
+    """
+    replay = ReplayApi(list(read_records(directory)), speed=speed, replay_latency=replay_latency, host=host, port=port)
+    await replay.start()
+
+    try:
+        while True:
+            await asyncio.sleep(60)
+            logging.info(f"Replay stats: {replay.stats()}")
+
+    finally:
+        await replay.stop()
+
@@ -0,0 +1,231 @@
+###############################################################################
+#
+# File:      tracing.py
+# Author(s): Nico
+# Scope:     Per clothe pipeline traces and listing to post delays
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import time
+import logging
+
+from collections import OrderedDict, deque
+from typing import Optional
+from utils.metrics import MetricsRegistry
+from utils.utils import get_publish_timestamp
+from utils.defines import TRACE_MAX_OPEN, TRACE_WINDOW, TRACE_MAX_SAMPLES, LISTING_DELAY_BUCKETS
+
+# Pipeline stages, in order
+STAGES = ("fetch", "dedup", "match", "enrichment", "send")
+
+
+def percentile(values: list, ratio: float) -> float:
+    """
+    Args:
+        values: list, sorted values (not empty)
+        ratio: float, between 0 and 1 (e.g. 0.99)
+
+    Returns: float, nearest-rank percentile
+    """
+    return values[min(len(values) - 1, int(ratio * len(values)))]
+
+
+class ClotheTrace:
+    """
+    Timestamps of one new clothe through the pipeline: stage -> (start, end)
+    """
+    __slots__ = ("clothe_id", "listed_at", "spans")
+
+    def __init__(self, clothe_id: int, listed_at: Optional[int]) -> None:
+        """
+        Args:
+            clothe_id: int, Vinted clothe id
+            listed_at: Optional[int], Vinted publish timestamp, None if unknown
+        """
+        self.clothe_id = clothe_id
+        self.listed_at = listed_at
+        self.spans = {}
+
+    def durations(self) -> dict:
+        """
+        Returns: dict, stage -> duration in seconds
+        """
+        return {stage: round(end - start, 3) for stage, (start, end) in self.spans.items()}
+
+
+class TraceRecorder:
+    """
+    Traces matching clothes from the API call to their Discord posts, then exports the listing to post delay (time between
+    a clothe going live on Vinted and its posts being sent) and the listing to AutoBuy click delay.
+    Delays and stage durations are kept over a rolling window for /stats.
+    """
+    def __init__(self, metrics: MetricsRegistry, window: float = TRACE_WINDOW, max_open: int = TRACE_MAX_OPEN,
+                 max_samples: int = TRACE_MAX_SAMPLES) -> None:
+        """
+        Args:
+            metrics: MetricsRegistry, where to export delays and stage durations
+            window: float, time in seconds covered by the rolling summary
+            max_open: int, max number of traces in flight (oldest dropped first, counted)
+            max_samples: int, max number of samples kept per delay or stage
+        """
+        self.window = window
+        self.max_open = max_open
+        # clothe_id -> ClotheTrace, clothes not posted yet
+        self.open = OrderedDict()
+        # delay or stage name -> deque of (timestamp, seconds)
+        self.samples = {name: deque(maxlen=max_samples) for name in ("listing_to_post", "listing_to_buy_click",
+                                                                     *STAGES)}
+        self.listing_to_post_seconds = metrics.histogram("listing_to_post_seconds",
+                                                         "Time from Vinted publication to Discord posts sent",
+                                                         buckets=LISTING_DELAY_BUCKETS)
+        self.listing_to_buy_click_seconds = metrics.histogram("listing_to_buy_click_seconds",
+                                                              "Time from Vinted publication to AutoBuy click",
+                                                              buckets=LISTING_DELAY_BUCKETS)
+        self.stage_seconds = metrics.histogram("trace_stage_seconds", "Time spent by a new clothe in each stage",
+                                               ("stage",))
+        self.dropped_total = metrics.counter("traces_dropped_total",
+                                             "Traces dropped before their clothe was posted (too many in flight)")
+
+    def start(self, clothes: list, timings: dict) -> None:
+        """
+        Opens the traces of matching clothes (the others are never posted, tracing them would only push posted ones
+        out)
+
+        Args:
+            clothes: list, matching clothes
+            timings: dict, clothe id -> (API call timestamp, API response timestamp with overflow pages, seen cache
+                     comparison end timestamp) of the poll which found it
+
+        Returns: None
+        """
+        for clothe in clothes:
+            clothe_id = int(clothe["id"])
+            timing = timings.get(clothe_id)
+
+            if timing is None or clothe_id in self.open:
+                continue
+
+            fetch_start, fetch_end, dedup_end = timing
+            listed_at = get_publish_timestamp(clothe)
+            trace = ClotheTrace(clothe_id, None if listed_at == "NA" else listed_at)
+            trace.spans["fetch"] = (fetch_start, fetch_end)
+            trace.spans["dedup"] = (fetch_end, dedup_end)
+            self.open[clothe_id] = trace
+
+        while len(self.open) > self.max_open:
+            self.open.popitem(last=False)
+            self.dropped_total.inc()
+
+    def span(self, clothe_id, stage: str, start: float, end: float) -> None:
+        """
+        Args:
+            clothe_id: Vinted clothe id
+            stage: str, one of STAGES
+            start: float, stage start timestamp
+            end: float, stage end timestamp
+
+        Returns: None
+        """
+        trace = self.open.get(int(clothe_id))
+
+        if trace is not None:
+            trace.spans[stage] = (start, end)
+
+    def finish(self, clothe_id, posted_at: float) -> None:
+        """
+        Closes the trace of a posted clothe and records its delays
+
+        Args:
+            clothe_id: Vinted clothe id
+            posted_at: float, timestamp when its posts were sent
+
+        Returns: None
+        """
+        trace = self.open.pop(int(clothe_id), None)
+
+        if trace is None:
+            return
+
+        for stage, duration in trace.durations().items():
+            self.stage_seconds.observe(duration, stage)
+            self.add_sample(stage, duration, posted_at)
+
+        listing_to_post = None
+
+        if trace.listed_at is not None:
+            listing_to_post = round(posted_at - trace.listed_at, 3)
+            self.listing_to_post_seconds.observe(listing_to_post)
+            self.add_sample("listing_to_post", listing_to_post, posted_at)
+
+        logging.info(f"Clothe {trace.clothe_id} posted {listing_to_post}s after its publication",
+                     extra={"clothe_id": trace.clothe_id, "listing_to_post": listing_to_post,
+                            "spans": trace.durations()})
+
+    def discard(self, clothes: list) -> None:
+        """
+        Drops the traces of clothes that will not be posted (no matching request, skipped)
+
+        Args:
+            clothes: list, clothes of a poll
+
+        Returns: None
+        """
+        for clothe in clothes:
+            self.open.pop(int(clothe["id"]), None)
+
+    def buy_click(self, clothe: dict, clicked_at: float) -> None:
+        """
+        Args:
+            clothe: dict, clothe whose AutoBuy button was clicked
+            clicked_at: float, click timestamp
+
+        Returns: None
+        """
+        listed_at = get_publish_timestamp(clothe)
+
+        if listed_at == "NA":
+            return
+
+        listing_to_buy_click = round(clicked_at - listed_at, 3)
+        self.listing_to_buy_click_seconds.observe(listing_to_buy_click)
+        self.add_sample("listing_to_buy_click", listing_to_buy_click, clicked_at)
+
+        logging.info(f"Clothe {clothe['id']} AutoBuy clicked {listing_to_buy_click}s after its publication",
+                     extra={"clothe_id": clothe["id"], "listing_to_buy_click": listing_to_buy_click})
+
+    def add_sample(self, name: str, seconds: float, timestamp: float) -> None:
+        """
+        Args:
+            name: str, delay or stage name
+            seconds: float, sample
+            timestamp: float, sample timestamp
+
+        Returns: None
+        """
+        self.samples[name].append((timestamp, seconds))
+
+    def summary(self, now: Optional[float] = None) -> dict:
+        """
+        Args:
+            now: Optional[float], current timestamp
+
+        Returns: dict, delay or stage name -> {count, p50, p90, p99, max} over the rolling window (seconds),
+                 names without samples are left out
+        """
+        limit = (now or time.time()) - self.window
+        summary = {}
+
+        for name, samples in self.samples.items():
+            while samples and samples[0][0] < limit:
+                samples.popleft()
+
+            if samples:
+                values = sorted(seconds for _, seconds in samples)
+                summary[name] = {"count": len(values),
+                                 "p50": percentile(values, 0.5),
+                                 "p90": percentile(values, 0.9),
+                                 "p99": percentile(values, 0.99),
+                                 "max": values[-1]}
+
+        return summary
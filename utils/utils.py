@@ -8,9 +8,12 @@
 #
 ###############################################################################
 import logging
+import datetime
 
 import discord
 
+from typing import Union
+
 
 def reformat_list_strings(list_strings: list, format_type: str="clothes_states") -> str:
     """
@@ -35,6 +38,25 @@ def reformat_list_strings(list_strings: list, format_type: str="clothes_states")
     return concat_values
 
 
+def get_publish_timestamp(clothe: dict) -> Union[int, str]:
+    """
+    Converts clothe publish date to timestamp (drop milliseconds)
+    Args:
+        clothe: dict, clothe dict
+
+    Returns: Union[int, str], timestamp or "NA" if the date could not be parsed
+
+    """
+    try:
+        api_time = datetime.datetime.strptime(clothe["created_at_ts"], "%Y-%m-%dT%H:%M:%S%z")
+        return int(datetime.datetime.timestamp(api_time))
+
+    except Exception as e:
+        logging.warning(f"Exception for clothe {clothe.get('id')} encountered during date formatting: {e}",
+                        extra={"clothe_id": clothe.get("id")})
+        return "NA"
+
+
 async def notify_something_went_wrong(class_name: str,
                                       method_name: str,
                                       error_code: int,
@@ -0,0 +1,142 @@
+###############################################################################
+#
+# File:      workers.py
+# Author(s): Nico
+# Scope:     Long-lived bounded pool running the bot background jobs
+#
+# Created:   17 October 2026
+#
+###############################################################################
+import asyncio
+import logging
+
+from typing import Any, Coroutine
+from utils.defines import MAX_QUEUED_JOBS
+
+
+class TaskPool:
+    """
+    Bounded pool of coroutines, owned by the bot for its whole lifetime.
+    At most max_workers jobs run at the same time, the others wait in queue. At most max_queued background jobs wait,
+    submitting more waits for a job to be done.
+    """
+    def __init__(self, name: str, max_workers: int, max_queued: int = MAX_QUEUED_JOBS) -> None:
+        """
+        Args:
+            name: str, pool name (displayed in logs)
+            max_workers: int, max number of jobs running concurrently
+            max_queued: int, max number of background jobs waiting for a worker
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.semaphore = asyncio.Semaphore(max_workers)
+        # Background jobs, running or waiting
+        self.slots = asyncio.Semaphore(max_workers + max_queued)
+        self.tasks = set()
+        self.closed = False
+        # Metrics
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.blocked = 0
+
+    async def run(self, coro: Coroutine) -> Any:
+        """
+        Runs a coroutine once a worker slot is available
+
+        Args:
+            coro: Coroutine, job to run
+
+        Returns: Any, job result
+        """
+        if self.closed:
+            coro.close()
+            raise RuntimeError(f"Pool {self.name} is closed")
+
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+
+        try:
+            result = await coro
+            self.completed += 1
+            return result
+
+        except Exception:
+            self.failed += 1
+            raise
+
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+
+    async def submit(self, coro: Coroutine) -> asyncio.Task:
+        """
+        Runs a coroutine in background, the pool keeps track of it until it's done.
+        Waits first if max_queued jobs are already waiting (backpressure on the caller).
+
+        Args:
+            coro: Coroutine, job to run
+
+        Returns: asyncio.Task
+        """
+        if self.slots.locked():
+            self.blocked += 1
+            logging.warning(f"Pool {self.name} full ({self.max_queued} job(s) waiting), waiting for a job to be done")
+
+        try:
+            await self.slots.acquire()
+
+        except asyncio.CancelledError:
+            coro.close()
+            raise
+
+        task = asyncio.create_task(self.run(coro))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        task.add_done_callback(lambda _: self.slots.release())
+
+        return task
+
+    async def join(self) -> None:
+        """
+        Waits for every background job submitted so far
+
+        Returns: None
+        """
+        while self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def shutdown(self) -> None:
+        """
+        Closes the pool and cancels every background job still running
+
+        Returns: None
+        """
+        self.closed = True
+
+        for task in list(self.tasks):
+            task.cancel()
+
+        logging.info(f"Pool {self.name} shut down ({len(self.tasks)} job(s) cancelled), stats: {self.stats()}")
+
+    def stats(self) -> dict:
+        """
+        Returns: dict, pool metrics (queue depth, running jobs, totals)
+        """
+        return {"max_workers": self.max_workers,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "completed": self.completed,
+                "failed": self.failed,
+                "blocked": self.blocked}